@@ -0,0 +1,215 @@
+"""
+Helpers to run the function app handlers in-process, for the benchmarks and load tests.
+"""
+
+import asyncio
+import importlib.util
+import inspect
+import logging
+import re
+import sys
+import threading
+
+from collections.abc import Callable
+from collections.abc import Iterable
+from http import HTTPStatus
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+from urllib.parse import parse_qsl
+
+import azure.functions as func
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+function_app_pth = Path(__file__).parent.parent / "function-app" / "function_app.py"
+
+# Centers of the areas the locations are drawn from, as latitude/longitude
+city_centers = {
+    "septa": (39.9526, -75.1652),  # Philadelphia City Hall
+    "dcmetro": (38.8977, -77.0365),  # Washington DC, the White House
+}
+
+
+def load_function_app() -> ModuleType:
+    """
+    Import the function app module from the `function-app` folder.
+
+    The module is imported once and reused, so environment variables configuring
+    it must be set before the first call.
+
+    Returns
+    -------
+    ModuleType
+        The function app module.
+    """
+
+    module = sys.modules.get("function_app")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("function_app", function_app_pth)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Cannot import the function app from {function_app_pth}")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["function_app"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop the async handlers run on, started in a thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="function-app-loop", daemon=True).start()
+        return _loop
+
+
+def sync_handler(handler: Callable[..., Any]) -> Callable[..., func.HttpResponse]:
+    """
+    Make a handler callable from any thread, like the Functions host calls it.
+
+    Async handlers all run on one event loop in a background thread, as the host
+    runs them on the worker's event loop, while sync handlers run in the calling
+    thread.
+    """
+
+    if not inspect.iscoroutinefunction(handler):
+        return handler
+    return lambda *args: asyncio.run_coroutine_threadsafe(handler(*args), _get_loop()).result()
+
+
+def get_handler(name: str) -> Callable[[func.HttpRequest], func.HttpResponse]:
+    """
+    Get a function app handler, callable with just the request.
+
+    Parameters
+    ----------
+    name : str
+        The name of the handler function, e.g. "nearest_septa".
+
+    Returns
+    -------
+    callable
+        Calls the handler with a request and no invocation context.
+    """
+
+    handler = sync_handler(getattr(load_function_app(), name)._function.get_user_function())
+    return lambda req: handler(req, None)
+
+
+def make_request(
+    route: str,
+    params: dict[str, str] | None = None,
+    body: bytes = b"",
+    method: str = "GET",
+    route_params: dict[str, str] | None = None,
+) -> func.HttpRequest:
+    """Build an HTTP request for a route of the function app."""
+    return func.HttpRequest(
+        method, f"http://localhost/api/{route}", params=params or {}, route_params=route_params or {}, body=body
+    )
+
+
+def make_wsgi_app(prefix: str = "/api/") -> Callable[[dict[str, Any], Callable[..., Any]], Iterable[bytes]]:
+    """
+    Serve the function app handlers as a WSGI application.
+
+    Requests are routed like the Azure Functions host does, from the route
+    templates of the handlers under `prefix`, and a handler raising an exception
+    answers with a 500 error.
+
+    Parameters
+    ----------
+    prefix : str, optional
+        The path prefix of the routes.
+        Defaults to "/api/".
+
+    Returns
+    -------
+    callable
+        The WSGI application.
+    """
+
+    routes = []
+    for function in load_function_app().app.get_functions():
+        trigger = function.get_trigger()
+        pattern = re.compile(re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", trigger.route) + "$")
+        methods = {func.HttpMethod(m).value for m in trigger.methods} if trigger.methods else None
+        routes.append((pattern, methods, sync_handler(function.get_user_function())))
+
+    def respond(start_response: Callable[..., Any], status: int, body: bytes, mimetype: str = "text/plain"):
+        start_response(
+            f"{status} {HTTPStatus(status).phrase}",
+            [("Content-Type", mimetype), ("Content-Length", str(len(body)))],
+        )
+        return [body]
+
+    def app(environ: dict[str, Any], start_response: Callable[..., Any]) -> Iterable[bytes]:
+        path = environ.get("PATH_INFO", "")
+        method = environ["REQUEST_METHOD"]
+        if not path.startswith(prefix):
+            return respond(start_response, 404, b"Not Found")
+
+        for pattern, methods, handler in routes:
+            match = pattern.match(path[len(prefix) :])
+            if match is None or (methods is not None and method not in methods):
+                continue
+
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            req = func.HttpRequest(
+                method,
+                f"http://{environ.get('HTTP_HOST', 'localhost')}{path}",
+                params=dict(parse_qsl(environ.get("QUERY_STRING", ""))),
+                route_params=match.groupdict(),
+                body=environ["wsgi.input"].read(length) if length else b"",
+            )
+            try:
+                resp = handler(req, None)
+            # answer like the Functions host does, whatever the handler raised
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Handler for %s failed: %r", path, e)
+                return respond(start_response, 500, b"Internal Server Error")
+            return respond(start_response, resp.status_code, resp.get_body(), resp.mimetype or "text/plain")
+
+        return respond(start_response, 404, b"Not Found")
+
+    return app
+
+
+def random_locations(rng: np.random.Generator, n: int, network: str, spread_miles: float = 6.0) -> np.ndarray:
+    """
+    Draw user locations around the center of a network's city.
+
+    The locations are normally distributed around the center, so most are in the
+    dense downtown area and a few are out in the suburbs, like real users.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        The random generator.
+    n : int
+        The number of locations.
+    network : str
+        The network whose city the locations are in, a key of `city_centers`.
+    spread_miles : float, optional
+        The standard deviation of the distance from the center in miles.
+        Defaults to 6 miles.
+
+    Returns
+    -------
+    numpy.ndarray
+        An array of shape (n, 2) of latitudes and longitudes.
+    """
+
+    lat, lon = city_centers[network]
+    # a degree of latitude is about 69 miles, a degree of longitude shrinks with cos(lat)
+    dlat = rng.normal(0, spread_miles / 69.0, n)
+    dlon = rng.normal(0, spread_miles / (69.0 * np.cos(np.radians(lat))), n)
+    return np.column_stack([lat + dlat, lon + dlon])
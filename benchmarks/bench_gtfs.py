@@ -0,0 +1,79 @@
+"""
+Benchmark loading a large GTFS feed.
+
+A synthetic feed is generated in a temporary directory. Run from the repository
+root with `python -m benchmarks.bench_gtfs`.
+"""
+
+import argparse
+import resource
+import tempfile
+import time
+import zipfile
+
+from pathlib import Path
+
+import numpy as np
+
+from trainchallenge.gtfs.feed import load_gtfs
+
+
+def write_synthetic_gtfs(pth: Path, n_stops: int, n_routes: int, n_trips: int, stops_per_trip: int) -> int:
+    """Write a GTFS feed with trips visiting random stops, returning the number of stop times."""
+
+    rng = np.random.default_rng(0)
+    with zipfile.ZipFile(pth, "w", compression=zipfile.ZIP_DEFLATED) as feed:
+        feed.writestr(
+            "stops.txt",
+            "stop_id,stop_name,stop_lat,stop_lon\n"
+            + "".join(f"S{i},Stop {i},{40 + i * 1e-4:.6f},{-75 - i * 1e-4:.6f}\n" for i in range(n_stops)),
+        )
+        feed.writestr(
+            "routes.txt",
+            "route_id,route_short_name,route_long_name,route_type\n"
+            + "".join(f"R{i},R{i},Route {i},2\n" for i in range(n_routes)),
+        )
+        feed.writestr(
+            "trips.txt",
+            "route_id,service_id,trip_id,direction_id\n"
+            + "".join(f"R{i % n_routes},WK,T{i},{i % 2}\n" for i in range(n_trips)),
+        )
+        with feed.open("stop_times.txt", "w") as f:
+            f.write(b"trip_id,arrival_time,departure_time,stop_id,stop_sequence\n")
+            for trip in range(n_trips):
+                stops = rng.choice(n_stops, stops_per_trip, replace=False)
+                start = int(rng.integers(5 * 3600, 23 * 3600))
+                rows = []
+                for seq, stop in enumerate(stops.tolist(), start=1):
+                    t = start + 120 * seq
+                    hms = f"{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}"
+                    rows.append(f"T{trip},{hms},{hms},S{stop},{seq}\n")
+                f.write("".join(rows).encode())
+    return n_trips * stops_per_trip
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trips", type=int, default=100_000, help="Number of trips in the feed")
+    parser.add_argument("--stops-per-trip", type=int, default=20, help="Number of stop times per trip")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gtfs_pth = Path(tmp_dir) / "gtfs.zip"
+        n_stop_times = write_synthetic_gtfs(gtfs_pth, 5000, 200, args.trips, args.stops_per_trip)
+
+        started = time.perf_counter()
+        feed = load_gtfs(gtfs_pth)
+        elapsed = time.perf_counter() - started
+
+    # peak resident memory of the whole process, in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    stored = sum(v.nbytes for v in vars(feed).values() if hasattr(v, "nbytes"))
+    print(f"stop times: {n_stop_times:,}")
+    print(f"load time:  {elapsed:.2f} s")
+    print(f"peak process memory: {peak / 2**20:.0f} MiB, feed arrays: {stored / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
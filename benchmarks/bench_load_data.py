@@ -0,0 +1,55 @@
+"""
+Benchmark the station data loaders.
+
+Run from the repository root with `python -m benchmarks.bench_load_data`.
+"""
+
+import argparse
+import shutil
+import tempfile
+import timeit
+
+from collections.abc import Callable
+from pathlib import Path
+
+from trainchallenge.dcmetro.load_data import build_dcmetro_snapshot
+from trainchallenge.dcmetro.load_data import default_geojson_pth
+from trainchallenge.dcmetro.load_data import load_dcmetro_data
+from trainchallenge.septa.load_data import build_regional_rail_snapshot
+from trainchallenge.septa.load_data import default_kmz_pth
+from trainchallenge.septa.load_data import load_regional_rail_data
+
+
+def time_call(func: Callable[[], object], repeat: int) -> list[float]:
+    """Time repeated calls of a function, in milliseconds."""
+    func()  # warm up imports and caches
+    return [t * 1000 for t in timeit.repeat(func, number=1, repeat=repeat)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timed loads per loader")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # copy the data files, so the snapshots are not written into the package
+        kmz_pth = Path(shutil.copy(default_kmz_pth, tmp_dir))
+        geojson_pth = Path(shutil.copy(default_geojson_pth, tmp_dir))
+        build_regional_rail_snapshot(kmz_pth)
+        build_dcmetro_snapshot(geojson_pth)
+
+        loaders = {
+            "septa kmz": lambda: load_regional_rail_data(kmz_pth),
+            "septa snapshot": lambda: load_regional_rail_data(kmz_pth, use_snapshot=True),
+            "dcmetro geojson": lambda: load_dcmetro_data(geojson_pth),
+            "dcmetro snapshot": lambda: load_dcmetro_data(geojson_pth, use_snapshot=True),
+        }
+
+        print(f"{'loader':<20}{'min ms':>10}{'median ms':>12}")
+        for name, func in loaders.items():
+            times = sorted(time_call(func, args.repeat))
+            print(f"{name:<20}{times[0]:>10.2f}{times[len(times) // 2]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
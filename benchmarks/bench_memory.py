@@ -0,0 +1,119 @@
+"""
+Benchmark the resident memory held by the loaded station data per process.
+
+Each representation is loaded in a fresh subprocess, from the raw data files and
+from snapshots, and the growth of its resident set size over the loads is
+reported: the GeoDataFrames the loaders return, as networks used to be kept,
+against the compact `StationTable` now kept by the network registry, alone and
+with the GeoSeries spatial index the "sindex" nearest station engine builds on
+first use. Resident memory is read from `/proc`, so this only runs on Linux.
+
+Run from the repository root with `python -m benchmarks.bench_memory`.
+"""
+
+import argparse
+import gc
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from pathlib import Path
+
+from trainchallenge.dcmetro.load_data import build_dcmetro_snapshot
+from trainchallenge.dcmetro.load_data import default_geojson_pth
+from trainchallenge.septa.load_data import build_regional_rail_snapshot
+from trainchallenge.septa.load_data import default_kmz_pth
+
+
+REPRESENTATIONS = ("geodataframe", "table", "table+sindex")
+
+
+def rss_bytes() -> int:
+    """Get the current resident set size of this process, in bytes."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("VmRSS is missing from /proc/self/status")
+
+
+def measure(representation: str, kmz_pth: Path, geojson_pth: Path, use_snapshot: bool) -> dict[str, float]:
+    """Load both networks in one representation and measure the memory they hold."""
+
+    from trainchallenge.common.station_index import NearestStationIndex
+    from trainchallenge.dcmetro.load_data import load_dcmetro_data
+    from trainchallenge.dcmetro.load_data import load_dcmetro_stations
+    from trainchallenge.septa.load_data import load_regional_rail_data
+    from trainchallenge.septa.load_data import load_regional_rail_stations
+
+    gc.collect()
+    before = rss_bytes()
+
+    if representation == "geodataframe":
+        stations = [
+            load_regional_rail_data(kmz_pth, use_snapshot=use_snapshot),
+            load_dcmetro_data(geojson_pth, use_snapshot=use_snapshot),
+        ]
+        indexes = [NearestStationIndex.from_geoseries(gdf.geometry) for gdf in stations]
+    else:
+        stations = [
+            load_regional_rail_stations(kmz_pth, use_snapshot=use_snapshot),
+            load_dcmetro_stations(geojson_pth, use_snapshot=use_snapshot),
+        ]
+        indexes = [NearestStationIndex(table.lats, table.lons) for table in stations]
+        if representation == "table+sindex":
+            import geopandas as gpd
+
+            geometries = [gpd.GeoSeries(table.points(), crs="EPSG:4326") for table in stations]
+            for geometry in geometries:
+                geometry.sindex  # noqa: B018
+
+    gc.collect()
+    after = rss_bytes()
+
+    return {
+        "stations": sum(len(index) for index in indexes),
+        "rss_mib": after / 2**20,
+        "rss_growth_mib": (after - before) / 2**20,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--worker", choices=REPRESENTATIONS, help=argparse.SUPPRESS)
+    parser.add_argument("--kmz", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--geojson", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(measure(args.worker, args.kmz, args.geojson, args.snapshot)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # copy the data files, so the snapshots are not written into the package
+        kmz_pth = Path(shutil.copy(default_kmz_pth, tmp_dir))
+        geojson_pth = Path(shutil.copy(default_geojson_pth, tmp_dir))
+        build_regional_rail_snapshot(kmz_pth)
+        build_dcmetro_snapshot(geojson_pth)
+
+        print(f"{'representation':<16}{'source':<10}{'stations':>10}{'rss MiB':>10}{'growth MiB':>12}")
+        for use_snapshot in (False, True):
+            for representation in REPRESENTATIONS:
+                cmd = [sys.executable, "-m", "benchmarks.bench_memory", "--worker", representation]
+                cmd += ["--kmz", str(kmz_pth), "--geojson", str(geojson_pth)]
+                if use_snapshot:
+                    cmd.append("--snapshot")
+                proc = subprocess.run(cmd, check=True, capture_output=True, text=True)  # noqa: S603, runs this interpreter
+                result = json.loads(proc.stdout)
+                source = "snapshot" if use_snapshot else "raw"
+                print(
+                    f"{representation:<16}{source:<10}{result['stations']:>10}{result['rss_mib']:>10.1f}"
+                    f"{result['rss_growth_mib']:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
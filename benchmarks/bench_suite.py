@@ -0,0 +1,198 @@
+"""
+Benchmark the library hot paths and the HTTP handlers against a stored baseline.
+
+Run from the repository root with `python -m benchmarks.bench_suite`. Each
+benchmark is timed with `timeit`, and its fastest time per call is compared to
+the baseline in `benchmarks/baseline.json`; the run fails when any benchmark is
+slower than the baseline by more than the threshold. Timings depend on the
+machine, so record a baseline on the machine the comparisons run on with
+`--save` first.
+
+The handlers are called in-process with synthetic requests at random locations
+around each city, with the response cache disabled, and `next_septa` gets its
+trains from a local fake SEPTA Arrivals API.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+
+from collections.abc import Callable
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+
+from shapely import Point
+
+from benchmarks.app import get_handler
+from benchmarks.app import make_request
+from benchmarks.app import random_locations
+
+
+default_baseline_pth = Path(__file__).parent / "baseline.json"
+
+# Number of distinct random locations each handler benchmark cycles through
+N_LOCATIONS = 1000
+
+
+def library_benchmarks() -> dict[str, Callable[[], object]]:
+    """Benchmarks of the `trainchallenge.common` functions."""
+
+    import trainchallenge as tc
+
+    septa = tc.networks.registry.load("septa")
+    geometry = septa.geometry
+    points = itertools.cycle(
+        [Point(lon, lat, 0) for lat, lon in random_locations(np.random.default_rng(0), N_LOCATIONS, "septa")]
+    )
+    lines = [f"Line {i}" for i in range(100)]
+
+    return {
+        "get_nearest_point": lambda: tc.common.get_nearest_point(next(points), geometry),
+        "gps_to_miles": lambda: tc.common.gps_to_miles(39.9526, -75.1652, 38.8977, -77.0365),
+        "get_next_after_match": lambda: tc.common.get_next_after_match(lines, "Line 50"),
+    }
+
+
+def loader_benchmarks(tmp_dir: Path) -> dict[str, Callable[[], object]]:
+    """Benchmarks of the station loaders, from the raw data and from snapshots."""
+
+    from trainchallenge.dcmetro.load_data import build_dcmetro_snapshot
+    from trainchallenge.dcmetro.load_data import default_geojson_pth
+    from trainchallenge.dcmetro.load_data import load_dcmetro_data
+    from trainchallenge.septa.load_data import build_regional_rail_snapshot
+    from trainchallenge.septa.load_data import default_kmz_pth
+    from trainchallenge.septa.load_data import load_regional_rail_data
+
+    # copy the data files, so the snapshots are not written into the package
+    kmz_pth = Path(shutil.copy(default_kmz_pth, tmp_dir))
+    geojson_pth = Path(shutil.copy(default_geojson_pth, tmp_dir))
+    build_regional_rail_snapshot(kmz_pth)
+    build_dcmetro_snapshot(geojson_pth)
+
+    return {
+        "load_regional_rail_data": lambda: load_regional_rail_data(kmz_pth),
+        "load_regional_rail_data snapshot": lambda: load_regional_rail_data(kmz_pth, use_snapshot=True),
+        "load_dcmetro_data": lambda: load_dcmetro_data(geojson_pth),
+        "load_dcmetro_data snapshot": lambda: load_dcmetro_data(geojson_pth, use_snapshot=True),
+    }
+
+
+def handler_benchmarks(stack: ExitStack) -> dict[str, Callable[[], object]]:
+    """Benchmarks of the function app handlers, with a fake SEPTA API."""
+
+    # measure the full lookup of every request, not the response cache
+    os.environ.setdefault("NEAREST_CACHE_SIZE", "0")
+
+    import trainchallenge as tc
+
+    from trainchallenge.septa.fake_api import FakeSeptaServer
+    from trainchallenge.septa.fake_api import default_lines
+
+    # keep the fetched trains for the whole run, so only the first request to each
+    # station goes over HTTP
+    server = stack.enter_context(FakeSeptaServer())
+    client = tc.septa.septa_api.get_default_client()
+    client.url = server.url
+    client.cache_ttl = 3600
+
+    rng = np.random.default_rng(0)
+    requests = {}
+    for network in ("septa", "dcmetro"):
+        requests[network] = itertools.cycle(
+            [
+                make_request(f"nearest_{network}", {"latitude": str(lat), "longitude": str(lon)})
+                for lat, lon in random_locations(rng, N_LOCATIONS, network)
+            ]
+        )
+    next_septa_requests = itertools.cycle(
+        [
+            make_request(
+                "next_septa",
+                {"latitude": str(lat), "longitude": str(lon), "line_name": default_lines[0], "train_dir": "N"},
+            )
+            for lat, lon in random_locations(rng, N_LOCATIONS, "septa")
+        ]
+    )
+
+    nearest_septa = get_handler("nearest_septa")
+    nearest_dcmetro = get_handler("nearest_dcmetro")
+    next_septa = get_handler("next_septa")
+    for _ in range(N_LOCATIONS):
+        next_septa(next(next_septa_requests))
+    return {
+        "nearest_septa": lambda: nearest_septa(next(requests["septa"])),
+        "nearest_dcmetro": lambda: nearest_dcmetro(next(requests["dcmetro"])),
+        "next_septa": lambda: next_septa(next(next_septa_requests)),
+    }
+
+
+def time_benchmark(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Time a benchmark, returning its fastest and median time per call in microseconds."""
+
+    # warm up imports and caches, then size the loops to about 0.2 s each
+    func()
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = sorted(t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number))
+    return {"min_us": times[0], "median_us": times[len(times) // 2]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed loops per benchmark")
+    parser.add_argument("--baseline", type=Path, default=default_baseline_pth, help="The baseline file")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=1.5, help="Fail when a benchmark is this many times slower than baseline"
+    )
+    parser.add_argument("-k", "--filter", default="", help="Only run the benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["benchmarks"]
+
+    with ExitStack() as stack:
+        tmp_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        benchmarks = {**library_benchmarks(), **loader_benchmarks(tmp_dir), **handler_benchmarks(stack)}
+
+        results = {}
+        regressions = []
+        print(f"{'benchmark':<36}{'min us':>12}{'median us':>12}{'vs baseline':>13}")
+        for name, func in benchmarks.items():
+            if args.filter not in name:
+                continue
+            results[name] = time_benchmark(func, args.repeat)
+            ratio = ""
+            if name in baseline:
+                change = results[name]["min_us"] / baseline[name]["min_us"]
+                ratio = f"{change:.2f}x"
+                if change > args.threshold:
+                    regressions.append(name)
+                    ratio += " !"
+            print(f"{name:<36}{results[name]['min_us']:>12.1f}{results[name]['median_us']:>12.1f}{ratio:>13}")
+
+    if args.save:
+        args.baseline.write_text(
+            json.dumps(
+                {"python": sys.version.split()[0], "machine": platform.platform(), "benchmarks": results}, indent=2
+            )
+            + "\n"
+        )
+        print(f"Saved the baseline to {args.baseline}")
+    elif regressions:
+        print(f"Slower than {args.threshold}x the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Load test the function app locally, against a fake SEPTA upstream.
+
+Run from the repository root with `python -m benchmarks.load_test`. The function
+app handlers are served over HTTP by a local WSGI server, with SEPTA replaced by
+a fake Arrivals API with configurable latency and error rate. An open-loop load
+generator sends requests at a fixed average rate, with Poisson arrivals, whether
+or not earlier requests have finished, so a slow server shows up as growing
+latency instead of a lower request rate. Latency is measured from the time each
+request was scheduled to be sent.
+
+Locations are drawn around Philadelphia and Washington DC, and the throughput
+and latency percentiles are reported per route.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler
+from wsgiref.simple_server import WSGIServer
+from wsgiref.simple_server import make_server
+
+import numpy as np
+import requests
+
+from benchmarks.app import make_wsgi_app
+from benchmarks.app import random_locations
+
+
+# Relative frequency of each route in the generated traffic
+default_mix = {"nearest_septa": 4, "nearest_dcmetro": 3, "next_septa": 2, "nearby_septa": 1}
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """A WSGI server handling each connection on its own thread."""
+
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    """A WSGI request handler that does not log every request."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@dataclass
+class Result:
+    """The outcome of a request."""
+
+    route: str
+    scheduled: float
+    finished: float
+    status: int
+
+
+def make_params(route: str, lat: float, lon: float) -> dict[str, str]:
+    """Build the query parameters of a request to a route."""
+
+    params = {"latitude": f"{lat:.6f}", "longitude": f"{lon:.6f}"}
+    if route == "next_septa":
+        params.update(line_name="Airport", train_dir="N")
+    elif route.startswith("nearby_"):
+        params.update(k="5")
+    return params
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """Parse a route mix like `nearest_septa=4,next_septa=1`."""
+    return {route: float(weight) for route, weight in (item.split("=") for item in mix.split(","))}
+
+
+def run_load(
+    base_url: str, mix: dict[str, float], rate: float, duration: float, max_workers: int, seed: int
+) -> list[Result]:
+    """
+    Send requests at a fixed average rate for a duration, without waiting for responses.
+
+    Parameters
+    ----------
+    base_url : str
+        The URL the routes are under.
+    mix : dict of str to float
+        The relative frequency of each route.
+    rate : float
+        The average number of requests per second.
+    duration : float
+        The number of seconds to send requests for.
+    max_workers : int
+        The maximum number of requests in flight.
+    seed : int
+        Seed of the arrival times, routes and locations.
+
+    Returns
+    -------
+    list of Result
+        The outcome of every request.
+    """
+
+    rng = np.random.default_rng(seed)
+    n = max(int(rate * duration), 1)
+    offsets = np.cumsum(rng.exponential(1 / rate, n))
+    routes = list(mix)
+    weights = np.array([mix[r] for r in routes], dtype=np.float64)
+    chosen = rng.choice(len(routes), n, p=weights / weights.sum())
+    locations = {
+        network: random_locations(rng, n, network)
+        for network in ("septa", "dcmetro")
+        if any(route.endswith(network) for route in routes)
+    }
+
+    local = threading.local()
+    results: list[Result] = []
+
+    def send(route: str, params: dict[str, str], scheduled: float) -> None:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        try:
+            status = session.get(f"{base_url}/{route}", params=params, timeout=60).status_code
+        except requests.RequestException:
+            status = 0
+        results.append(Result(route, scheduled, time.perf_counter(), status))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        start = time.perf_counter()
+        for i in range(n):
+            scheduled = start + offsets[i]
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            route = routes[chosen[i]]
+            lat, lon = locations[route.rsplit("_", 1)[-1]][i]
+            executor.submit(send, route, make_params(route, lat, lon), scheduled)
+
+    return results
+
+
+def report(results: list[Result], duration: float) -> None:
+    """Print the throughput, errors and latency percentiles of each route."""
+
+    print(
+        f"{'route':<18}{'requests':>9}{'4xx':>6}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    )
+    by_route: dict[str, list[Result]] = {}
+    for result in results:
+        by_route.setdefault(result.route, []).append(result)
+    for route, route_results in [*sorted(by_route.items()), ("all", results)]:
+        latency = np.array([r.finished - r.scheduled for r in route_results]) * 1000
+        # 4xx are valid answers, e.g. for locations too far from any station
+        client_errors = sum(400 <= r.status < 500 for r in route_results)
+        errors = sum(r.status == 0 or r.status >= 500 for r in route_results)
+        p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+        print(
+            f"{route:<18}{len(route_results):>9}{client_errors:>6}{errors:>8}{len(route_results) / duration:>9.1f}"
+            f"{p50:>9.1f}{p90:>9.1f}{p99:>9.1f}{latency.max():>9.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100, help="Average requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to send requests for")
+    parser.add_argument("--max-workers", type=int, default=128, help="Maximum number of requests in flight")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=default_mix,
+        help="Relative frequency of each route, e.g. nearest_septa=4,next_septa=1",
+    )
+    parser.add_argument("--septa-latency", type=float, default=0.1, help="Mean latency of the fake SEPTA API in s")
+    parser.add_argument("--septa-error-rate", type=float, default=0.0, help="Fraction of fake SEPTA API errors")
+    parser.add_argument("--septa-timeout", type=float, default=5, help="Timeout of the requests to SEPTA in s")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated traffic")
+    args = parser.parse_args()
+
+    # failed requests are counted in the report instead of logged one by one
+    logging.getLogger("benchmarks.app").setLevel(logging.ERROR)
+
+    # the function app reads its configuration at import time
+    os.environ.setdefault("SEPTA_API_TIMEOUT_SECONDS", str(args.septa_timeout))
+
+    import trainchallenge as tc
+
+    from trainchallenge.septa.fake_api import FakeSeptaServer
+
+    with FakeSeptaServer(latency=args.septa_latency, error_rate=args.septa_error_rate, seed=args.seed) as septa:
+        client = tc.septa.septa_api.get_default_client()
+        client.url = septa.url
+        client.timeout = args.septa_timeout
+
+        server = make_server(
+            "127.0.0.1", 0, make_wsgi_app(), server_class=ThreadingWSGIServer, handler_class=QuietHandler
+        )
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        try:
+            base_url = f"http://127.0.0.1:{server.server_port}/api"
+            # load the networks before the clock starts, like a warm instance
+            for route in args.mix:
+                lat, lon = random_locations(np.random.default_rng(), 1, route.rsplit("_", 1)[-1])[0]
+                requests.get(f"{base_url}/{route}", params=make_params(route, lat, lon), timeout=60)
+
+            started = time.perf_counter()
+            results = run_load(base_url, args.mix, args.rate, args.duration, args.max_workers, args.seed)
+            elapsed = time.perf_counter() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        print(
+            f"{len(results)} requests in {elapsed:.1f} s, fake SEPTA: {sum(septa.requests.values())} requests, "
+            f"{septa.errors} errors"
+        )
+    report(results, elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,12 @@
-from datetime import datetime
-from datetime import timedelta
+import asyncio
+
 from os import getenv
+from pathlib import Path
+from typing import Any
+from typing import Literal
 
 import azure.functions as func
-import geojson
+import numpy as np
 
 from azure.functions import Context
 from azure.monitor.opentelemetry import configure_azure_monitor
@@ -21,21 +24,125 @@ if ai_conn_str:
         logger_name="trainchallenge",  # Set the namespace for the logger
     )
 
-# Load the SEPTA Regional Rail data
-septa_gdf = tc.septa.load_regional_rail_data()
-septa_date_format = "%Y-%m-%d %H:%M:%S.%f"
+# The train networks, each loaded on first use (from the precompiled snapshot when it
+# is available), so a cold start only pays for the networks that are queried
+networks = tc.networks.registry
+
+# Engine used for nearest station lookups, either "sindex" for the GeoPandas spatial
+# index, "numpy" for tc.common.NearestStationIndex, which avoids creating any
+# shapely/pandas objects per request, or "grid" for tc.common.StationGrid, which
+# only checks the few stations that can be nearest in the grid cell of a location
+nearest_station_engine = getenv("NEAREST_STATION_ENGINE", "sindex")
+
+# Response cache of the nearest station endpoints, keyed by a grid cell of about
+# 110 meters at the default precision. Whether a cell can be cached is checked with
+# tc.common.NearestStationIndex, the locations of cells that can't be cached are
+# looked up with the configured engine. A size of 0 disables the cache, so every
+# lookup uses the configured engine
+nearest_cache_size = int(getenv("NEAREST_CACHE_SIZE", "4096"))
+nearest_cache_precision = int(getenv("NEAREST_CACHE_PRECISION", "3"))
+nearest_cache_ttl = float(getenv("NEAREST_CACHE_TTL_SECONDS", "300"))
+nearest_caches: dict[str, tc.common.NearestCellCache[tuple[str, str] | None]] = {}
+
+# Stands in for the origin of the directions link in cached responses, which is the
+# only part of a nearest station response that depends on the exact location
+origin_marker = "@@origin@@"
 
-# Load the DC Metro data
-dcmetro_gdf = tc.dcmetro.load_dcmetro_data()
+# Timeout of the HTTP requests to SEPTA, also bounding how long a slow request holds
+# one of the SEPTA_MAX_CONCURRENCY slots below
+septa_client = tc.septa.septa_api.get_default_client()
+septa_client.timeout = float(getenv("SEPTA_API_TIMEOUT_SECONDS", "5"))
+
+# Once SEPTA_BREAKER_FAILURE_RATE of the recent requests to SEPTA failed, they fail
+# fast for SEPTA_BREAKER_RESET_SECONDS, then a single request probes whether SEPTA is
+# back. Meanwhile the last arrivals of each station, up to SEPTA_STALE_TTL_SECONDS
+# old, are served with their trains marked stale. A TTL of 0 disables stale arrivals
+septa_client.breaker = tc.septa.CircuitBreaker(
+    failure_rate_threshold=float(getenv("SEPTA_BREAKER_FAILURE_RATE", "0.5")),
+    reset_timeout=float(getenv("SEPTA_BREAKER_RESET_SECONDS", "30")),
+)
+septa_client.stale_ttl = float(getenv("SEPTA_STALE_TTL_SECONDS", "1800"))
+
+# Opt-in background-refreshed board of SEPTA arrivals. When enabled, next_septa is
+# served from the board and only calls SEPTA live when the board is missing or stale.
+# The board needs the SEPTA stations, so enabling it loads them at startup. It is
+# started once the client is configured, so its refreshes use the timeout and breaker
+septa_arrivals_board = None
+if getenv("SEPTA_ARRIVALS_BOARD", "").lower() in ("1", "true"):
+    septa_arrivals_board = tc.septa.ArrivalsBoard(
+        septa_client,
+        networks.load("septa").stop_ids,
+        refresh_interval=float(getenv("SEPTA_ARRIVALS_BOARD_REFRESH_SECONDS", "30")),
+    ).start()
+
+# Optional SEPTA Regional Rail GTFS feed. When given, the trains are taken from the
+# schedule when the live lookup fails or takes longer than the call timeout
+septa_gtfs_pth = getenv("SEPTA_GTFS_PATH")
+septa_schedule = None
+if septa_gtfs_pth:
+    with tc.telemetry.stage("load_gtfs"):
+        septa_schedule = tc.septa.ScheduledSeptaArrivals(
+            tc.gtfs.DepartureEngine(tc.gtfs.load_gtfs(Path(septa_gtfs_pth)))
+        )
+
+# Number of nearest SEPTA stations whose trains are considered by next_septa
+septa_plan_stations = int(getenv("SEPTA_PLAN_STATIONS", "5"))
+
+# next_septa is async, so waiting on SEPTA does not hold a worker thread. At most
+# SEPTA_MAX_CONCURRENCY calls to SEPTA run at once, a call gives up after
+# SEPTA_CALL_TIMEOUT_SECONDS (then using the schedule when there is one), and a
+# request gives up after SEPTA_REQUEST_BUDGET_SECONDS, so a slow SEPTA degrades
+# next_septa instead of exhausting the instance
+septa_request_budget = float(getenv("SEPTA_REQUEST_BUDGET_SECONDS", "5"))
+septa_async_arrivals: tc.septa.schedule.AsyncSeptaArrivals = tc.septa.septa_api.AsyncSeptaClient(
+    septa_client,
+    max_concurrency=int(getenv("SEPTA_MAX_CONCURRENCY", "10")),
+    timeout=float(getenv("SEPTA_CALL_TIMEOUT_SECONDS", "3")),
+)
+if septa_schedule is not None:
+    septa_async_arrivals = tc.septa.AsyncFallbackSeptaArrivals(septa_async_arrivals, septa_schedule)
 
 # Require authentication for all functions
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
+# Maximum number of locations accepted by the batch endpoints in a single request
+max_batch_size = 10000
+
+# Defaults and limits for the nearby station endpoints
+default_nearby_k = 5
+max_nearby_k = 50
+max_nearby_radius_miles = 50.0
+
 # logger = logging.getLogger(
 #     "trainchallenge"
 # )  # Logging telemetry will be collected from logging calls made with this logger and all of it's children loggers.
 
 
+def request_stage(name: str, context: Context | None) -> tc.telemetry.Stage:
+    """
+    Time a request, as the parent of the stages of its handler.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage, usually the name of the function.
+    context : Context or None
+        The invocation context object of the function, whose trace context is
+        the parent of the stage so it is correlated with the host's telemetry.
+
+    Returns
+    -------
+    tc.telemetry.Stage
+        The context manager timing the request.
+    """
+
+    carrier = None
+    trace_context = getattr(context, "trace_context", None)
+    if trace_context is not None:
+        carrier = {"traceparent": trace_context.trace_parent, "tracestate": trace_context.trace_state}
+    return tc.telemetry.stage(name, carrier=carrier)
+
+
 def get_lat_long(req: func.HttpRequest) -> tuple[float, float]:
     """
     Extract latitude and longitude from the request parameters or body.
@@ -75,17 +182,244 @@ def get_lat_long(req: func.HttpRequest) -> tuple[float, float]:
     return lat_float, long_float
 
 
-@app.route(route="nearest_septa")
-def nearest_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+def get_optional_param(req: func.HttpRequest, name: str) -> str | None:
     """
-    Get the nearest SEPTA Regional Rail station to the given latitude and longitude.
+    Get an optional parameter from the request parameters or body.
 
     Parameters
-    --------
+    ----------
+    req : func.HttpRequest
+        The HTTP request object.
+    name : str
+        The name of the parameter.
+
+    Returns
+    -------
+    str or None
+        The parameter value, or None if it is not given.
+    """
+
+    value = req.params.get(name)
+    if value:
+        return value
+    try:
+        req_body = req.get_json()
+    except ValueError:
+        return None
+    if isinstance(req_body, dict) and req_body.get(name) is not None:
+        return str(req_body.get(name))
+    return None
+
+
+def get_nearby_params(req: func.HttpRequest) -> tuple[int, float]:
+    """
+    Extract the number of stations and the search radius for the nearby endpoints.
+
+    Parameters
+    ----------
+    req : func.HttpRequest
+        The HTTP request object.
+
+    Returns
+    -------
+    tuple of (int, float)
+        The maximum number of stations `k` and the search radius in miles.
+
+    Raises
+    ------
+    ValueError
+        If k is not an integer between 1 and `max_nearby_k`, or the radius is not
+        a float greater than 0 and at most `max_nearby_radius_miles`.
+    """
+
+    k_input = get_optional_param(req, "k")
+    k = default_nearby_k if k_input is None else int(k_input)
+    if not 1 <= k <= max_nearby_k:
+        raise ValueError("Invalid k")
+
+    radius_input = get_optional_param(req, "radius_miles")
+    radius_miles = tc.common.MAX_DISTANCE_MILES if radius_input is None else float(radius_input)
+    if not 0 < radius_miles <= max_nearby_radius_miles:
+        raise ValueError("Invalid radius_miles")
+
+    return k, radius_miles
+
+
+def get_nearest_station(lat: float, long: float, network: tc.networks.LoadedNetwork) -> int | None:
+    """
+    Get the position of the nearest station using the configured lookup engine.
+
+    Parameters
+    ----------
+    lat : float
+        Latitude of the location.
+    long : float
+        Longitude of the location.
+    network : tc.networks.LoadedNetwork
+        The network to search.
+
+    Returns
+    -------
+    int or None
+        The position of the nearest station, or None if there is no station
+        within 10 miles.
+    """
+
+    if nearest_station_engine == "grid":
+        nearest = network.grid.nearest(lat, long)
+        return None if nearest is None else nearest[0]
+    if nearest_station_engine == "numpy":
+        nearest = network.index.nearest(lat, long)
+        return None if nearest is None else nearest[0]
+
+    p = Point(long, lat, 0)
+    return tc.common.get_nearest_point(p, network.geometry)
+
+
+def get_lat_long_batch(req: func.HttpRequest) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Extract arrays of latitudes and longitudes from the request body.
+
+    The body can either be a JSON array of objects with `latitude` and `longitude`
+    keys, or a GeoJSON FeatureCollection of Point features.
+
+    Parameters
+    ----------
     req : func.HttpRequest
         The HTTP request object.
-    context : Context
-        The invocation context object for the function.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        A tuple containing the latitudes and longitudes as float arrays.
+
+    Raises
+    ------
+    ValueError
+        If the body is not in one of the supported formats, or any latitude or
+        longitude cannot be converted to float.
+    """
+
+    req_body = req.get_json()
+    try:
+        if isinstance(req_body, dict) and req_body.get("type") == "FeatureCollection":
+            coords = [feature["geometry"]["coordinates"] for feature in req_body["features"]]
+            lats = np.array([c[1] for c in coords], dtype=np.float64)
+            longs = np.array([c[0] for c in coords], dtype=np.float64)
+        elif isinstance(req_body, list):
+            lats = np.array([loc["latitude"] for loc in req_body], dtype=np.float64)
+            longs = np.array([loc["longitude"] for loc in req_body], dtype=np.float64)
+        else:
+            raise ValueError("Request body must be a JSON array or a GeoJSON FeatureCollection")
+    except (KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"Invalid location in request body: {e}") from e
+
+    if not (np.isfinite(lats).all() and np.isfinite(longs).all()):
+        raise ValueError("Latitude and longitude values must be finite")
+
+    return lats, longs
+
+
+def get_gmaps_directions(lat: float | str, long: float | str, dest_lat: float, dest_long: float) -> str:
+    """
+    Build a Google Maps walking directions link between two locations.
+
+    Parameters
+    ----------
+    lat : float or str
+        Latitude of the origin, or a placeholder for it.
+    long : float or str
+        Longitude of the origin, or a placeholder for it.
+    dest_lat : float
+        Latitude of the destination.
+    dest_long : float
+        Longitude of the destination.
+
+    Returns
+    -------
+    str
+        The Google Maps directions URL.
+    """
+    return f"https://www.google.com/maps/dir/?api=1&origin={lat},{long}&destination={dest_lat},{dest_long}&travelmode=walking&dir_action=navigate"
+
+
+def get_nearest_cache(
+    network: tc.networks.LoadedNetwork,
+) -> tc.common.NearestCellCache[tuple[str, str] | None] | None:
+    """
+    Get the response cache of a network, creating it on first use.
+
+    Parameters
+    ----------
+    network : tc.networks.LoadedNetwork
+        The network to get the cache of.
+
+    Returns
+    -------
+    tc.common.NearestCellCache or None
+        The cache, or None if caching is disabled.
+    """
+
+    if nearest_cache_size < 1:
+        return None
+    cache = nearest_caches.get(network.network.key)
+    # a network that was reloaded gets a new cache
+    if cache is None or cache.index is not network.index:
+        cache = tc.common.NearestCellCache(
+            network.index,
+            precision=nearest_cache_precision,
+            max_size=nearest_cache_size,
+            ttl=nearest_cache_ttl,
+            nearest=lambda lat, long: get_nearest_station(lat, long, network),
+        )
+        nearest_caches[network.network.key] = cache
+    return cache
+
+
+def render_nearest_feature(station: int | None, network: tc.networks.LoadedNetwork) -> tuple[str, str] | None:
+    """
+    Serialize a station as a GeoJSON feature, split around the origin of its directions link.
+
+    Parameters
+    ----------
+    station : int or None
+        The position of the station, or None if there is no station.
+    network : tc.networks.LoadedNetwork
+        The network of the station.
+
+    Returns
+    -------
+    tuple of str or None
+        The serialized feature before and after the origin, or None if there is no
+        station.
+    """
+
+    if station is None:
+        return None
+
+    features = network.features
+    feature = features.feature(
+        station,
+        {
+            "gmaps_directions": get_gmaps_directions(
+                origin_marker, origin_marker, features.lats[station], features.lons[station]
+            )
+        },
+    )
+    head, _, tail = feature.partition(f"{origin_marker},{origin_marker}")
+    return head, tail
+
+
+def nearest_response(req: func.HttpRequest, network: tc.networks.LoadedNetwork) -> func.HttpResponse:
+    """
+    Find the nearest station to a location.
+
+    Parameters
+    ----------
+    req : func.HttpRequest
+        The HTTP request object.
+    network : tc.networks.LoadedNetwork
+        The network to search.
 
     Returns
     -------
@@ -93,81 +427,236 @@ def nearest_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
         A JSON response containing the nearest station's information.
     """
 
-    # Application Insights trace correlation for logging telemetry
-    # Store current TraceContext in dictionary format
-    # carrier = {
-    #     "traceparent": context.trace_context.trace_parent,
-    #     "tracestate": context.trace_context.trace_state,
-    # }
-    # tracer = trace.get_tracer(__name__)
-    # # Start a span using the current context
-    # with tracer.start_as_current_span(
-    #     "http_trigger_span",
-    #     context=extract(carrier),
-    #     attributes={
-    #         "user.id": str(req.headers.get("x-ms-client-principal-id")),
-    #         "user.name": str(req.headers.get("x-ms-client-principal-name")),
-    #     },
-    # ):
-
     # parse and validate latitude/longitude input
     try:
-        lat_float, long_float = get_lat_long(req)
+        with tc.telemetry.stage("parse_input"):
+            lat_float, long_float = get_lat_long(req)
     except ValueError:
         return func.HttpResponse(
             "Invalid latitude or longitude value. Must be a float.",
             status_code=400,
         )
 
-    # get the nearest station
-    p = Point(long_float, lat_float, 0)
-    nearest_row_idx = tc.common.get_nearest_point(p, septa_gdf["geometry"])  # type: ignore[reportArgumentType]
-    if nearest_row_idx is None:
+    # get the serialized nearest station, from the cache when possible
+    with tc.telemetry.stage("nearest_lookup", {"network": network.network.key}):
+        cache = get_nearest_cache(network)
+        if cache is None:
+            feature = render_nearest_feature(get_nearest_station(lat_float, long_float, network), network)
+        else:
+            _, feature = cache.get(lat_float, long_float, lambda station: render_nearest_feature(station, network))
+    if feature is None:
         return func.HttpResponse(  # TODO: possibly a better status code for communicating this to the client
-            "There is no SEPTA station within 10 miles of this location",
+            f"There is no {network.network.display_name} station within 10 miles of this location",
             status_code=400,
         )
-    nearest_station = septa_gdf.loc[nearest_row_idx]
 
     # return the nearest station as a GeoJSON feature
-    ret = geojson.Feature(
-        geometry=nearest_station.geometry,
-        properties={
-            "stop_id": nearest_station.stop_id,
-            "station_name": nearest_station.station_name,
-            "gmaps_directions": f"https://www.google.com/maps/dir/?api=1&origin={lat_float},{long_float}&destination={nearest_station.geometry.y},{nearest_station.geometry.x}&travelmode=walking&dir_action=navigate",
-        },
+    with tc.telemetry.stage("serialize"):
+        head, tail = feature
+        body = f"{head}{lat_float},{long_float}{tail}"
+    return func.HttpResponse(
+        body,
+        mimetype="application/json",
+        status_code=200,
     )
 
+
+def nearby_response(req: func.HttpRequest, network: tc.networks.LoadedNetwork) -> func.HttpResponse:
+    """
+    Find the k nearest stations within a radius of a location.
+
+    Parameters
+    ----------
+    req : func.HttpRequest
+        The HTTP request object.
+    network : tc.networks.LoadedNetwork
+        The network to search.
+
+    Returns
+    -------
+    func.HttpResponse
+        A GeoJSON FeatureCollection of the stations, nearest first.
+    """
+
+    # parse and validate latitude/longitude input
+    try:
+        with tc.telemetry.stage("parse_input"):
+            lat_float, long_float = get_lat_long(req)
+    except ValueError:
+        return func.HttpResponse(
+            "Invalid latitude or longitude value. Must be a float.",
+            status_code=400,
+        )
+
+    # parse and validate k/radius input
+    try:
+        with tc.telemetry.stage("parse_input"):
+            k, radius_miles = get_nearby_params(req)
+    except ValueError:
+        return func.HttpResponse(
+            f"Invalid k or radius_miles value. k must be an integer from 1 to {max_nearby_k} and "
+            f"radius_miles must be a float greater than 0 and at most {max_nearby_radius_miles}.",
+            status_code=400,
+        )
+
+    # get the nearest stations, nearest first
+    with tc.telemetry.stage("nearest_lookup", {"network": network.network.key}):
+        if nearest_station_engine == "numpy":
+            station_idx, station_miles = network.index.k_nearest(lat_float, long_float, k, max_miles=radius_miles)
+        else:
+            p = Point(long_float, lat_float, 0)
+            station_idx, station_miles = tc.common.get_k_nearest_points(
+                p,
+                network.geometry,
+                k,
+                max_miles=radius_miles,
+            )
+
+    with tc.telemetry.stage("serialize"):
+        features = network.features
+        encoded = [
+            features.feature(
+                idx,
+                {
+                    "rank": rank,
+                    "distance_miles": miles,
+                    "gmaps_directions": get_gmaps_directions(
+                        lat_float, long_float, features.lats[idx], features.lons[idx]
+                    ),
+                },
+            )
+            for rank, (idx, miles) in enumerate(zip(station_idx.tolist(), station_miles.tolist(), strict=True), start=1)
+        ]
+        body = tc.common.features.feature_collection(encoded)
+
     return func.HttpResponse(
-        geojson.dumps(ret),
+        body,
         mimetype="application/json",
         status_code=200,
     )
 
 
-@app.route(route="next_septa")
-def next_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+def nearest_batch_response(req: func.HttpRequest, network: tc.networks.LoadedNetwork) -> func.HttpResponse:
     """
-    Get the next SEPTA Regional Rail train nearest to the given latitude and longitude
-    on a particular line going in a particular direction.
+    Find the nearest station for every location in a batch request.
 
     Parameters
-    --------
+    ----------
     req : func.HttpRequest
         The HTTP request object.
-    context : Context
-        The invocation context object for the function.
+    network : tc.networks.LoadedNetwork
+        The network to search.
 
     Returns
     -------
     func.HttpResponse
-        A JSON response containing the nearest station's information.
+        A GeoJSON FeatureCollection with one feature per input location, in order.
+    """
+
+    # parse and validate latitude/longitude input
+    try:
+        with tc.telemetry.stage("parse_input"):
+            lats, longs = get_lat_long_batch(req)
+    except ValueError:
+        return func.HttpResponse(
+            "Invalid request body. Must be a JSON array of latitude/longitude objects or a GeoJSON FeatureCollection.",
+            status_code=400,
+        )
+    if len(lats) > max_batch_size:
+        return func.HttpResponse(
+            f"Too many locations in a single request. The maximum is {max_batch_size}.",
+            status_code=413,
+        )
+
+    # get the nearest station for every location in one query
+    with tc.telemetry.stage("nearest_lookup", {"network": network.network.key}):
+        if nearest_station_engine == "grid":
+            nearest_idx, _ = network.grid.nearest_many(lats, longs)
+        elif nearest_station_engine == "numpy":
+            nearest_idx, _ = network.index.nearest_many(lats, longs)
+        else:
+            nearest_idx = tc.common.get_nearest_points(
+                lats,
+                longs,
+                network.geometry,
+            )
+
+    with tc.telemetry.stage("serialize"):
+        features = network.features
+        no_station = tc.common.features.empty_feature(
+            {"error": f"There is no {network.network.display_name} station within 10 miles of this location"}
+        )
+        encoded = [
+            features.feature(
+                idx, {"gmaps_directions": get_gmaps_directions(lat, long, features.lats[idx], features.lons[idx])}
+            )
+            if idx >= 0
+            else no_station
+            for lat, long, idx in zip(lats.tolist(), longs.tolist(), nearest_idx.tolist(), strict=True)
+        ]
+        body = tc.common.features.feature_collection(encoded)
+
+    return func.HttpResponse(
+        body,
+        mimetype="application/json",
+        status_code=200,
+    )
+
+
+async def get_upcoming_septa_trains(stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+    """
+    Get the upcoming SEPTA trains at a station, without blocking the event loop.
+
+    The arrivals board is used when it is enabled and fresh enough, otherwise the
+    trains are awaited from `septa_async_arrivals`.
+
+    Parameters
+    ----------
+    stop_id: str
+        The SEPTA stop id of the station
+    line_name : str
+        The SEPTA train line name
+    direction : str
+        Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+    Returns
+    -------
+    list
+        The JSON objects with the train data, earliest scheduled first.
+
+    Raises
+    ------
+    RuntimeError
+        If SEPTA cannot be reached and there is no schedule to fall back to.
+    """
+
+    if septa_arrivals_board is not None:
+        septa_arrivals_board.record_query(stop_id, direction)
+        by_line = septa_arrivals_board.get_board_arrivals(stop_id, direction)
+        if by_line is not None:
+            return by_line.get(line_name, [])
+    return await septa_async_arrivals.get_upcoming_trains(stop_id, line_name, direction)
+
+
+async def next_septa_response(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Find the station to leave for to catch the next SEPTA Regional Rail train.
+
+    Parameters
+    ----------
+    req : func.HttpRequest
+        The HTTP request object.
+
+    Returns
+    -------
+    func.HttpResponse
+        A JSON response containing the information of the station to leave for.
     """
 
     # parse and validate latitude/longitude input
     try:
-        lat_float, long_float = get_lat_long(req)
+        with tc.telemetry.stage("parse_input"):
+            lat_float, long_float = get_lat_long(req)
     except ValueError:
         return func.HttpResponse(
             "Invalid latitude or longitude value. Must be a float.",
@@ -176,12 +665,13 @@ def next_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
 
     # parse line name input
     try:
-        line_name = req.params.get("line_name")
-        if not line_name:
-            req_body = req.get_json()
-            line_name = req_body.get("line_name")
-        if not line_name or len(line_name) < 1:
-            raise ValueError("Invalid line_name")
+        with tc.telemetry.stage("parse_input"):
+            line_name = req.params.get("line_name")
+            if not line_name:
+                req_body = req.get_json()
+                line_name = req_body.get("line_name")
+            if not line_name or len(line_name) < 1:
+                raise ValueError("Invalid line_name")
     except ValueError:
         return func.HttpResponse(
             "Invalid line_name value.",
@@ -190,116 +680,356 @@ def next_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
 
     # parse train direction input
     try:
-        train_dir = req.params.get("train_dir")
-        if not train_dir:
-            req_body = req.get_json()
-            train_dir = req_body.get("train_dir")
-        if not (train_dir == "N" or train_dir == "S"):  # can't do in because of type checking
-            raise ValueError("Invalid train direction")
+        with tc.telemetry.stage("parse_input"):
+            train_dir = req.params.get("train_dir")
+            if not train_dir:
+                req_body = req.get_json()
+                train_dir = req_body.get("train_dir")
+            if not (train_dir == "N" or train_dir == "S"):  # can't do in because of type checking
+                raise ValueError("Invalid train direction")
     except ValueError:
         return func.HttpResponse(
             "Invalid train_dir value. Must be N or S",
             status_code=400,
         )
 
-    # get the nearest station
-    p = Point(long_float, lat_float, 0)
-    nearest_row_idx = tc.common.get_nearest_point(p, septa_gdf["geometry"])  # type: ignore[reportArgumentType]
+    # get the nearest station, loading the stations off the event loop on first use
+    septa = networks.load("septa") if networks.is_loaded("septa") else await asyncio.to_thread(networks.load, "septa")
+    with tc.telemetry.stage("nearest_lookup", {"network": "septa"}):
+        nearest_row_idx = get_nearest_station(lat_float, long_float, septa)
     if nearest_row_idx is None:
         return func.HttpResponse(  # TODO: possibly a better status code for communicating this to the client
             "There is no SEPTA station within 10 miles of this location",
             status_code=400,
         )
-    nearest_station = septa_gdf.loc[nearest_row_idx]
-
-    # get the next train
-    next_train = tc.septa.septa_api.get_next_arrival(nearest_station.stop_id, line_name, train_dir)
-    time_to_leave = "There are no trains found"
-    if next_train is not None:
-        # calculate time to reach train station
-        # approximate walking speed conservatively at 2 mph
-        # also accounting for the fact that we are only computing distance as the crow flies
-        train_dist = tc.common.gps_to_miles(
-            lat_float, long_float, nearest_station.geometry.y, nearest_station.geometry.x
-        )
-        travel_time = train_dist / 2.0
 
-        # parse the time the train leaves and compute the time you must leave by
-        train_sched = datetime.strptime(next_train["sched_time"], septa_date_format)
-        leave_time = train_sched - timedelta(hours=travel_time)
-
-        if datetime.now() < leave_time:  # the current time is before the time to leave
-            time_to_leave = leave_time.strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            time_to_leave = "You can't make the next train in time"
-
-    # return the nearest station as a GeoJSON feature
-    ret = geojson.Feature(
-        geometry=nearest_station.geometry,
-        properties={
-            "stop_id": nearest_station.stop_id,
-            "station_name": nearest_station.station_name,
-            "gmaps_directions": f"https://www.google.com/maps/dir/?api=1&origin={lat_float},{long_float}&destination={nearest_station.geometry.y},{nearest_station.geometry.x}&travelmode=walking&dir_action=navigate",
-            "time_to_leave": time_to_leave,
-        },
-    )
+    # find the earliest train that can be caught from any of the nearest stations,
+    # as a later train or a slightly farther station can often still be made
+    try:
+        with tc.telemetry.stage("septa_trains"):
+            plan = await asyncio.wait_for(
+                tc.planner.plan_trip_async(
+                    lat_float,
+                    long_float,
+                    septa,
+                    lambda stop_id: get_upcoming_septa_trains(stop_id, line_name, train_dir),  # pyright: ignore[reportArgumentType]
+                    tc.septa.septa_api.parse_sched_time,
+                    k=septa_plan_stations,
+                ),
+                septa_request_budget,
+            )
+    except (RuntimeError, asyncio.TimeoutError):
+        return func.HttpResponse(
+            "SEPTA train times are unavailable right now, please try again later",
+            status_code=503,
+        )
+    properties: dict[str, Any] = {}
+    if plan is None:
+        station = nearest_row_idx
+        properties["time_to_leave"] = "There are no trains found that you can make in time"
+    else:
+        station = plan.station
+        properties["time_to_leave"] = plan.leave_time.strftime("%Y-%m-%d %H:%M:%S")
+        properties["train_id"] = plan.train.get("train_id")
+        properties["sched_time"] = plan.departure.strftime("%Y-%m-%d %H:%M:%S")
+        properties["distance_miles"] = round(plan.distance_miles, 3)
+        if plan.train.get("stale"):
+            # SEPTA is unavailable, the train is from its last known arrivals
+            properties["stale"] = True
+            properties["fetched_at"] = plan.train.get("fetched_at")
 
+    # return the station to leave for as a GeoJSON feature
+    with tc.telemetry.stage("serialize"):
+        features = septa.features
+        directions = get_gmaps_directions(lat_float, long_float, features.lats[station], features.lons[station])
+        body = features.feature(station, {"gmaps_directions": directions, **properties})
     return func.HttpResponse(
-        geojson.dumps(ret),
+        body,
         mimetype="application/json",
         status_code=200,
     )
 
 
-@app.route(route="nearest_dcmetro")
-def nearest_dcmetro(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+def nearest_all_response(req: func.HttpRequest) -> func.HttpResponse:
     """
-    Get the nearest SEPTA Regional Rail station to the given latitude and longitude.
+    Find the nearest station of every network to a location, in a single lookup.
 
     Parameters
-    --------
+    ----------
     req : func.HttpRequest
-        The HTTP request object.
-    context : Context
-        The invocation context object for the function.
+        The HTTP request object. Besides the latitude and longitude, it can contain
+        `networks`, a comma separated list of the networks to search.
 
     Returns
     -------
     func.HttpResponse
-        A JSON response containing the nearest station's information.
+        A GeoJSON FeatureCollection with the nearest station of each network that
+        has one within 10 miles, nearest first.
     """
 
     # parse and validate latitude/longitude input
     try:
-        lat_float, long_float = get_lat_long(req)
+        with tc.telemetry.stage("parse_input"):
+            lat_float, long_float = get_lat_long(req)
     except ValueError:
         return func.HttpResponse(
             "Invalid latitude or longitude value. Must be a float.",
             status_code=400,
         )
 
-    # get the nearest station
-    p = Point(long_float, lat_float, 0)
-    nearest_row_idx = tc.common.get_nearest_point(p, dcmetro_gdf["geometry"])  # type: ignore[reportArgumentType]
-    if nearest_row_idx is None:
-        return func.HttpResponse(  # TODO: possibly a better status code for communicating this to the client
-            "There is no DC Metro station within 10 miles of this location",
+    networks_input = get_optional_param(req, "networks")
+    network_keys = list(networks) if networks_input is None else [key.strip() for key in networks_input.split(",")]
+    if not network_keys or any(key not in networks for key in network_keys):
+        return func.HttpResponse(
+            f"Invalid networks value. Must be a comma separated list of: {', '.join(networks)}",
             status_code=400,
         )
-    nearest_station = dcmetro_gdf.loc[nearest_row_idx]
 
-    # return the nearest station as a GeoJSON feature
-    ret = geojson.Feature(
-        geometry=nearest_station.geometry,
-        properties={
-            "stop_id": nearest_station.GIS_ID,
-            "station_name": nearest_station.NAME,
-            "gmaps_directions": f"https://www.google.com/maps/dir/?api=1&origin={lat_float},{long_float}&destination={nearest_station.geometry.y},{nearest_station.geometry.x}&travelmode=walking&dir_action=navigate",
-        },
-    )
+    # get the nearest station of each network from the merged index of all networks
+    with tc.telemetry.stage("nearest_lookup", {"network": "all"}):
+        nearest = networks.multi_index().nearest_per_network(lat_float, long_float, network_keys)
+    found = sorted(((key, *match) for key, match in nearest.items() if match is not None), key=lambda match: match[2])
+    if not found:
+        return func.HttpResponse(
+            "There is no station within 10 miles of this location",
+            status_code=400,
+        )
+
+    with tc.telemetry.stage("serialize"):
+        encoded = []
+        for key, station, miles in found:
+            features = networks.load(key).features
+            encoded.append(
+                features.feature(
+                    station,
+                    {
+                        "network": key,
+                        "distance_miles": miles,
+                        "gmaps_directions": get_gmaps_directions(
+                            lat_float, long_float, features.lats[station], features.lons[station]
+                        ),
+                    },
+                )
+            )
+        body = tc.common.features.feature_collection(encoded)
 
     return func.HttpResponse(
-        geojson.dumps(ret),
+        body,
         mimetype="application/json",
         status_code=200,
     )
+
+
+@app.route(route="nearest/{network}")
+def nearest(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the nearest station of a train network to the given latitude and longitude.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object. The `network` route parameter is the key of the
+        network in `tc.networks.registry`, e.g. `septa` or `dcmetro`.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A JSON response containing the nearest station's information.
+    """
+
+    network_key = req.route_params.get("network", "")
+    if network_key not in networks:
+        return func.HttpResponse(
+            f"Unknown network. Must be one of: {', '.join(networks)}",
+            status_code=404,
+        )
+    with request_stage("nearest", context):
+        return nearest_response(req, networks.load(network_key))
+
+
+@app.route(route="nearest_septa")
+def nearest_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the nearest SEPTA Regional Rail station to the given latitude and longitude.
+
+    Same as `nearest/septa`, kept for existing clients.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A JSON response containing the nearest station's information.
+    """
+    with request_stage("nearest_septa", context):
+        return nearest_response(req, networks.load("septa"))
+
+
+@app.route(route="next_septa")
+async def next_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the next SEPTA Regional Rail train that can be caught from the given latitude
+    and longitude on a particular line going in a particular direction.
+
+    The upcoming trains of the nearest stations are all considered, so when the next
+    train at the nearest station can't be made in time, a later train or a train at
+    a slightly farther station is returned instead.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A JSON response containing the information of the station to leave for.
+    """
+    with request_stage("next_septa", context):
+        return await next_septa_response(req)
+
+
+@app.route(route="nearest_dcmetro")
+def nearest_dcmetro(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the nearest DC Metro station to the given latitude and longitude.
+
+    Same as `nearest/dcmetro`, kept for existing clients.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A JSON response containing the nearest station's information.
+    """
+    with request_stage("nearest_dcmetro", context):
+        return nearest_response(req, networks.load("dcmetro"))
+
+
+@app.route(route="nearest_septa_batch", methods=[func.HttpMethod.POST])
+def nearest_septa_batch(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the nearest SEPTA Regional Rail station to each of a batch of locations.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object. The body is a JSON array of latitude/longitude
+        objects or a GeoJSON FeatureCollection of points.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A GeoJSON FeatureCollection with the nearest station to each location.
+    """
+    with request_stage("nearest_septa_batch", context):
+        return nearest_batch_response(req, networks.load("septa"))
+
+
+@app.route(route="nearest_dcmetro_batch", methods=[func.HttpMethod.POST])
+def nearest_dcmetro_batch(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the nearest DC Metro station to each of a batch of locations.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object. The body is a JSON array of latitude/longitude
+        objects or a GeoJSON FeatureCollection of points.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A GeoJSON FeatureCollection with the nearest station to each location.
+    """
+    with request_stage("nearest_dcmetro_batch", context):
+        return nearest_batch_response(req, networks.load("dcmetro"))
+
+
+@app.route(route="nearby_septa")
+def nearby_septa(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the k nearest SEPTA Regional Rail stations within a radius of the given
+    latitude and longitude.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object. Besides the latitude and longitude, it can contain
+        `k`, the maximum number of stations, and `radius_miles`, the search radius.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A GeoJSON FeatureCollection of the stations, nearest first.
+    """
+    with request_stage("nearby_septa", context):
+        return nearby_response(req, networks.load("septa"))
+
+
+@app.route(route="nearby_dcmetro")
+def nearby_dcmetro(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the k nearest DC Metro stations within a radius of the given latitude and
+    longitude.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object. Besides the latitude and longitude, it can contain
+        `k`, the maximum number of stations, and `radius_miles`, the search radius.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A GeoJSON FeatureCollection of the stations, nearest first.
+    """
+    with request_stage("nearby_dcmetro", context):
+        return nearby_response(req, networks.load("dcmetro"))
+
+
+@app.route(route="nearest_all")
+def nearest_all(req: func.HttpRequest, context: Context) -> func.HttpResponse:
+    """
+    Get the nearest station of each train network to the given latitude and longitude.
+
+    Parameters
+    --------
+    req : func.HttpRequest
+        The HTTP request object. Besides the latitude and longitude, it can contain
+        `networks`, a comma separated list of the networks to search, e.g.
+        `septa,dcmetro`, by default every network.
+    context : Context
+        The invocation context object for the function.
+
+    Returns
+    -------
+    func.HttpResponse
+        A GeoJSON FeatureCollection with the nearest station of each network, nearest
+        first.
+    """
+    with request_stage("nearest_all", context):
+        return nearest_all_response(req)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from geopandas import GeoSeries
+from shapely.geometry import Point
+
+from trainchallenge.common import NearestStationIndex
+from trainchallenge.common import get_k_nearest_points
+from trainchallenge.common import get_points_within
+from trainchallenge.common import gps_to_miles
+
+
+def test_get_k_nearest_points_basic():
+    pts = GeoSeries([Point(0, 0), Point(0.1, 0.1), Point(0.05, 0.05), Point(1, 1)])
+    idx, miles = get_k_nearest_points(Point(0.09, 0.09), pts, k=2)
+    assert idx.tolist() == [1, 2], "Should return the k nearest points, nearest first"
+    assert miles[0] == pytest.approx(gps_to_miles(0.09, 0.09, 0.1, 0.1))
+    assert miles[1] == pytest.approx(gps_to_miles(0.09, 0.09, 0.05, 0.05))
+
+
+def test_get_k_nearest_points_fewer_in_range():
+    pts = GeoSeries([Point(0, 0), Point(0.1, 0.1), Point(1, 1)])
+    idx, _ = get_k_nearest_points(Point(0.09, 0.09), pts, k=5)
+    assert idx.tolist() == [1, 0], "Should only return points within max_miles"
+
+
+def test_get_k_nearest_points_same_distance():
+    pts = GeoSeries([Point(0, 0), Point(0.1, 0.1), Point(0, 0)])
+    idx, _ = get_k_nearest_points(Point(0.01, 0.01), pts, k=3)
+    assert idx.tolist() == [0, 2, 1], "Should order points with equal distances by index"
+
+
+def test_get_k_nearest_points_invalid_k():
+    pts = GeoSeries([Point(0, 0)])
+    with pytest.raises(ValueError, match="Invalid k"):
+        get_k_nearest_points(Point(0, 0), pts, k=0)
+
+
+def test_get_points_within_radius():
+    # 0.1 degrees of latitude is about 6.9 miles
+    pts = GeoSeries([Point(0, 40.1), Point(0, 40.2), Point(0, 39.95)])
+    idx, miles = get_points_within(Point(0, 40), pts, radius_miles=7.5)
+    assert idx.tolist() == [2, 0], "Should return all points within the radius, nearest first"
+    assert (np.diff(miles) >= 0).all()
+    idx, _ = get_points_within(Point(0, 40), pts, radius_miles=1)
+    assert len(idx) == 0, "Should return nothing when no point is within the radius"
+
+
+def test_get_points_within_empty_geoseries():
+    with pytest.raises(IndexError, match="GeoSeries is empty"):
+        get_points_within(Point(0, 0), GeoSeries([]), radius_miles=1)
+
+
+def test_nearest_station_index_matches_get_k_nearest_points():
+    rng = np.random.default_rng(3)
+    station_lats = rng.uniform(38.7, 39.1, 100)
+    station_lons = rng.uniform(-77.3, -76.8, 100)
+    pts = GeoSeries([Point(lon, lat) for lat, lon in zip(station_lats, station_lons, strict=True)])
+    index = NearestStationIndex.from_geoseries(pts)
+
+    for lat, lon in zip(rng.uniform(38.6, 39.2, 100), rng.uniform(-77.4, -76.7, 100), strict=True):
+        expected_idx, expected_miles = get_k_nearest_points(Point(lon, lat), pts, k=5, max_miles=3)
+        idx, miles = index.k_nearest(lat, lon, k=5, max_miles=3)
+        assert idx.tolist() == expected_idx.tolist(), "Should agree with get_k_nearest_points"
+        np.testing.assert_allclose(miles, expected_miles)
+
+        expected_idx, _ = get_points_within(Point(lon, lat), pts, radius_miles=2)
+        idx, _ = index.within(lat, lon, radius_miles=2)
+        assert idx.tolist() == expected_idx.tolist(), "Should agree with get_points_within"
@@ -39,3 +39,30 @@ def test_get_nearest_point_far_point():
     p = Point(100, 100)
     result = get_nearest_point(p, pts)
     assert result is None, "Should return the index of the farthest point when it's the closest"
+
+
+def test_get_nearest_point_great_circle():
+    # at 40N a degree of longitude is much shorter than a degree of latitude
+    pts = GeoSeries([Point(-75.0, 40.07), Point(-75.08, 40.0)])
+    p = Point(-75.0, 40.0)
+    result = get_nearest_point(p, pts)
+    assert result == 1, "Should return the nearest point by great-circle distance, not by degrees"
+
+
+def test_get_nearest_point_return_distance():
+    pts = GeoSeries([Point(0, 0), Point(0.1, 0.1)])
+    p = Point(0.11, 0.11)
+    result = get_nearest_point(p, pts, return_distance=True)
+    assert result is not None
+    assert result[0] == 1
+    assert round(result[1], 3) == 0.977, "Should return the haversine distance in miles"
+
+
+def test_get_nearest_point_max_miles():
+    # at 60N 0.2 degrees of longitude is about 6.9 miles
+    pts = GeoSeries([Point(0.2, 60.0)])
+    assert get_nearest_point(Point(0, 60), pts) == 0, "Should find points within 10 miles"
+    # 0.16 degrees of latitude is about 11.1 miles
+    pts = GeoSeries([Point(0, 60.16)])
+    assert get_nearest_point(Point(0, 60), pts) is None, "Should not find points further than 10 miles"
+    assert get_nearest_point(Point(0, 60), pts, max_miles=12) == 0, "Should respect max_miles"
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from geopandas import GeoSeries
+from shapely.geometry import Point
+
+from trainchallenge.common import get_nearest_point
+from trainchallenge.common import get_nearest_points
+
+
+def test_get_nearest_points_basic():
+    pts = GeoSeries([Point(0, 0), Point(1, 1), Point(2, 2)])
+    result = get_nearest_points([1.1, 0.1, 1.9], [1.1, 0.1, 1.9], pts)
+    assert result.tolist() == [1, 0, 2], "Should return the index of the nearest point for every coordinate"
+
+
+def test_get_nearest_points_matches_single_lookup():
+    pts = GeoSeries([Point(0, 0), Point(1, 1), Point(2, 2), Point(0.5, 1.5)])
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-0.1, 2.1, 200)
+    lons = rng.uniform(-0.1, 2.1, 200)
+    result = get_nearest_points(lats, lons, pts)
+    expected = [get_nearest_point(Point(lon, lat), pts) for lat, lon in zip(lats, lons, strict=True)]
+    expected = [-1 if e is None else e for e in expected]
+    assert result.tolist() == expected, "Should agree with the single point lookup"
+
+
+def test_get_nearest_points_far_point():
+    pts = GeoSeries([Point(0, 0), Point(1, 1), Point(2, 2)])
+    result = get_nearest_points([100, 1], [100, 1], pts)
+    assert result.tolist() == [-1, 1], "Should return -1 for coordinates without a nearby point"
+
+
+def test_get_nearest_points_multiple_points_same_distance():
+    pts = GeoSeries([Point(0, 0), Point(1, 1), Point(2, 2), Point(1, 1)])
+    result = get_nearest_points([1.1], [1.1], pts)
+    assert result.tolist() == [1], "Should return the first index of the nearest point when distances are equal"
+
+
+def test_get_nearest_points_empty_input():
+    pts = GeoSeries([Point(0, 0)])
+    result = get_nearest_points([], [], pts)
+    assert result.shape == (0,), "Should return an empty array for empty input"
+
+
+def test_get_nearest_points_empty_geoseries():
+    pts = GeoSeries([])
+    with pytest.raises(IndexError, match=r"GeoSeries is empty\. Cannot find nearest point\."):
+        get_nearest_points([1], [1], pts)
+
+
+def test_get_nearest_points_mismatched_lengths():
+    pts = GeoSeries([Point(0, 0)])
+    with pytest.raises(ValueError, match="same length"):
+        get_nearest_points([1, 2], [1], pts)
+
+
+def test_get_nearest_points_not_finite():
+    pts = GeoSeries([Point(0, 0)])
+    with pytest.raises(ValueError, match="must be finite"):
+        get_nearest_points([np.nan], [1], pts)
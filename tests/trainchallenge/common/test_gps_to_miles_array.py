@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from trainchallenge.common import gps_distance_matrix
+from trainchallenge.common import gps_to_miles
+from trainchallenge.common import gps_to_miles_array
+from trainchallenge.common.geodesy import chord_sq_to_miles
+
+
+# Los Angeles, Las Vegas, New York, Buenos Aires, Sydney, London, San Francisco, Oakland
+lats = np.array([34.0522, 36.1699, 40.7128, -34.6037, -33.8688, 51.5074, 37.7749, 37.8044])
+lons = np.array([-118.2437, -115.1398, -74.0060, -58.3816, 151.2093, -0.1278, -122.4194, -122.2711])
+
+
+def test_gps_to_miles_array_matches_scalar():
+    result = gps_to_miles_array(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    expected = [gps_to_miles(lats[i], lons[i], lats[i + 1], lons[i + 1]) for i in range(len(lats) - 1)]
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+
+def test_gps_to_miles_array_broadcast():
+    result = gps_to_miles_array(lats[0], lons[0], lats, lons)
+    assert result.shape == lats.shape, "Should broadcast a single point against many"
+    assert result[0] == 0.0, "Distance between the same location should be 0"
+    assert round(result[1], 1) == 228.4, "Should calculate the correct distance between LA and Las Vegas"
+
+
+def test_gps_to_miles_array_scalar_inputs():
+    result = gps_to_miles_array(0, 0, 0, 180)
+    assert result.shape == (), "Should return a 0-d array for scalar inputs"
+    assert round(float(result), 1) == 12436.8
+
+
+def test_gps_to_miles_array_scalar_precision():
+    result = gps_to_miles_array(39.95, -75.16, 39.96, -75.17)
+    assert result.dtype == np.float64, "Should compute in float64 for python floats"
+    assert float(result) == pytest.approx(gps_to_miles(39.95, -75.16, 39.96, -75.17), rel=1e-12)
+
+
+def test_gps_to_miles_array_list_inputs():
+    result = gps_to_miles_array([39.95, 40.0], [-75.16, -75.0], [39.96], [-75.17])
+    expected = [gps_to_miles(39.95, -75.16, 39.96, -75.17), gps_to_miles(40.0, -75.0, 39.96, -75.17)]
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+
+def test_gps_to_miles_array_float32():
+    result = gps_to_miles_array(lats.astype(np.float32), lons.astype(np.float32), np.float32(40.0), np.float32(-75.0))
+    assert result.dtype == np.float32, "Should compute in float32 for float32 inputs"
+    expected = gps_to_miles_array(lats, lons, 40.0, -75.0)
+    assert expected.dtype == np.float64
+    np.testing.assert_allclose(result, expected, rtol=1e-5, atol=1e-3)
+
+
+def test_gps_to_miles_array_invalid_input():
+    with pytest.raises(ValueError, match="Must be numeric"):
+        gps_to_miles_array(["a"], [0], [0], [0])
+    with pytest.raises(ValueError, match="Must be numeric"):
+        gps_to_miles_array([0.0], [0.0], [0.0], [None])
+
+
+def test_gps_distance_matrix():
+    result = gps_distance_matrix(lats[:3], lons[:3], lats, lons)
+    assert result.shape == (3, len(lats)), "Should return one row per point of the first set"
+    for i in range(3):
+        for j in range(len(lats)):
+            assert result[i, j] == pytest.approx(gps_to_miles(lats[i], lons[i], lats[j], lons[j]), rel=1e-12)
+
+
+def test_gps_distance_matrix_mismatched_lengths():
+    with pytest.raises(ValueError, match="same length"):
+        gps_distance_matrix(lats, lons[:-1], lats, lons)
+
+
+def test_chord_sq_to_miles_types():
+    assert type(chord_sq_to_miles(2.0)) is float, "Should return a float for a scalar"
+    assert chord_sq_to_miles(4.0) == pytest.approx(gps_to_miles(0, 0, 0, 180), rel=1e-12)
+    result = chord_sq_to_miles(np.array([0.0, 4.0]))
+    assert isinstance(result, np.ndarray) and result.shape == (2,), "Should return an array for an array"
+    assert isinstance(chord_sq_to_miles(np.array(4.0)), np.ndarray), "Should keep 0-d arrays as arrays"
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from trainchallenge.common import MultiNetworkIndex
+from trainchallenge.common import NearestStationIndex
+
+
+def make_index() -> MultiNetworkIndex:
+    return MultiNetworkIndex(
+        {
+            "a": NearestStationIndex([0.0, 0.1, 0.2], [0.0, 0.1, 0.2]),
+            "b": NearestStationIndex([0.12, 5.0], [0.12, 5.0]),
+        }
+    )
+
+
+def test_multi_network_index_columns():
+    index = make_index()
+    assert len(index) == 5
+    assert index.networks == ("a", "b")
+    np.testing.assert_array_equal(index.network_ids, [0, 0, 0, 1, 1])
+    np.testing.assert_array_equal(index.positions, [0, 1, 2, 0, 1])
+
+
+def test_multi_network_index_nearest_per_network():
+    index = make_index()
+    result = index.nearest_per_network(0.11, 0.11)
+    assert list(result) == ["a", "b"], "Should return every network, in order"
+    assert result["a"] == NearestStationIndex([0.0, 0.1, 0.2], [0.0, 0.1, 0.2]).nearest(0.11, 0.11), (
+        "Should match the index of the network alone"
+    )
+    assert result["b"] == NearestStationIndex([0.12, 5.0], [0.12, 5.0]).nearest(0.11, 0.11), (
+        "Should return the position within the network"
+    )
+    assert list(index.nearest_per_network(0.11, 0.11, networks=["b"])) == ["b"]
+
+
+def test_multi_network_index_nearest():
+    index = make_index()
+    network, position, miles = index.nearest(0.119, 0.119)
+    assert (network, position) == ("b", 0), "Should return the nearest station of any network"
+    assert miles == pytest.approx(NearestStationIndex([0.12], [0.12]).nearest(0.119, 0.119)[1])
+    assert index.nearest(0.119, 0.119, networks=["a"])[:2] == ("a", 1), "Should only search the given networks"
+
+
+def test_multi_network_index_out_of_range():
+    index = make_index()
+    assert index.nearest_per_network(5.0, 5.0) == {"a": None, "b": (1, 0.0)}
+    assert index.nearest(40.0, 40.0) is None, "Should return None when no network has a station in range"
+
+
+def test_multi_network_index_invalid():
+    with pytest.raises(KeyError, match=r"Unknown network: c\."):
+        make_index().nearest(0.0, 0.0, networks=["c"])
+    with pytest.raises(ValueError, match="At least one network"):
+        MultiNetworkIndex({})
+    with pytest.raises(ValueError, match="same max_miles"):
+        MultiNetworkIndex({"a": NearestStationIndex([0.0], [0.0]), "b": NearestStationIndex([0.0], [0.0], max_miles=5)})
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from trainchallenge.common import NearestCellCache
+from trainchallenge.common import NearestStationIndex
+
+
+def make_index():
+    rng = np.random.default_rng(0)
+    return NearestStationIndex(40.0 + rng.uniform(-0.3, 0.3, 200), -75.0 + rng.uniform(-0.3, 0.3, 200))
+
+
+def test_nearest_cell_cache_exact():
+    index = make_index()
+    cache = NearestCellCache(index, precision=2)
+    rng = np.random.default_rng(1)
+    lats = 40.0 + rng.uniform(-0.6, 0.6, 2000)
+    lons = -75.0 + rng.uniform(-0.6, 0.6, 2000)
+    for lat, lon in zip(np.r_[lats, lats], np.r_[lons, lons], strict=True):
+        expected = index.nearest(lat, lon)
+        station, value = cache.get(lat, lon, lambda s: ("rendered", s))
+        assert station == (None if expected is None else expected[0]), "Should match the exact lookup"
+        assert value == ("rendered", station)
+
+    stats = cache.stats()
+    assert stats["hits"] > 0 and stats["misses"] > 0 and stats["uncacheable"] > 0
+    assert stats["hits"] + stats["misses"] + stats["uncacheable"] == 4000
+
+
+def test_nearest_cell_cache_exact_lookup_engine():
+    index = make_index()
+    calls = []
+
+    def nearest(lat, lon):
+        calls.append((lat, lon))
+        result = index.nearest(lat, lon)
+        return None if result is None else result[0]
+
+    cache = NearestCellCache(index, precision=2, nearest=nearest)
+    rng = np.random.default_rng(1)
+    for lat, lon in zip(40.0 + rng.uniform(-0.3, 0.3, 500), -75.0 + rng.uniform(-0.3, 0.3, 500), strict=True):
+        assert cache.get(lat, lon, lambda s: s)[0] == nearest(lat, lon)
+    assert len(calls) == 500 + cache.stats()["uncacheable"], "Should look up uncacheable cells with the engine"
+
+
+def test_nearest_cell_cache_renders_once_per_cell():
+    calls = []
+    cache = NearestCellCache(NearestStationIndex([40.0], [-75.0]), precision=3)
+    for _ in range(3):
+        assert cache.get(40.0101, -75.0101, lambda s: calls.append(s) or s) == (0, 0)
+    assert calls == [0], "Should render the cell once"
+    assert cache.stats() == {"hits": 2, "misses": 1, "uncacheable": 0, "size": 1}
+
+
+def test_nearest_cell_cache_out_of_range():
+    cache = NearestCellCache(NearestStationIndex([40.0], [-75.0], max_miles=1.0), precision=3)
+    assert cache.get(41.0, -75.0, lambda s: s) == (None, None), "Should cache cells without a station in range"
+    assert cache.get(41.0, -75.0, lambda s: s) == (None, None)
+    assert cache.hits == 1
+
+
+def test_nearest_cell_cache_lru_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("trainchallenge.common.cell_cache.time.monotonic", lambda: now[0])
+    cache = NearestCellCache(NearestStationIndex([40.0], [-75.0]), precision=3, max_size=2, ttl=10)
+    cache.get(40.0001, -75.0001, lambda s: s)
+    cache.get(40.0101, -75.0001, lambda s: s)
+    cache.get(40.0001, -75.0001, lambda s: s)
+    cache.get(40.0201, -75.0001, lambda s: s)
+    assert len(cache) == 2
+    assert cache.cell(40.0101, -75.0001) not in cache._cells, "Should drop the least recently used cell"
+
+    now[0] += 11
+    cache.get(40.0001, -75.0001, lambda s: s)
+    assert cache.stats()["misses"] == 4, "Should recompute expired cells"
+
+
+def test_nearest_cell_cache_invalid():
+    index = NearestStationIndex([40.0], [-75.0])
+    with pytest.raises(ValueError, match="Invalid max_size"):
+        NearestCellCache(index, max_size=0)
+    with pytest.raises(ValueError, match="Invalid ttl"):
+        NearestCellCache(index, ttl=0)
+    with pytest.raises(ValueError, match="must be finite"):
+        NearestCellCache(index).get(float("nan"), 0.0, lambda s: s)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from geopandas import GeoSeries
+from shapely.geometry import Point
+
+from trainchallenge.common import NearestStationIndex
+from trainchallenge.common import get_nearest_point
+from trainchallenge.common import gps_to_miles
+
+
+def test_nearest_station_index_basic():
+    index = NearestStationIndex.from_geoseries(GeoSeries([Point(0, 0), Point(0.1, 0.1), Point(0.2, 0.2)]))
+    result = index.nearest(0.11, 0.11)
+    assert result is not None
+    assert result[0] == 1, "Should return the index of the nearest point"
+    assert result[1] == pytest.approx(gps_to_miles(0.11, 0.11, 0.1, 0.1)), "Should return the haversine distance"
+
+
+def test_nearest_station_index_exact_match():
+    index = NearestStationIndex.from_geoseries(GeoSeries([Point(0, 0), Point(0.1, 0.1), Point(0.2, 0.2)]))
+    assert index.nearest(0.1, 0.1) == (1, 0.0), "Should return the exact match with zero distance"
+
+
+def test_nearest_station_index_multiple_points_same_distance():
+    index = NearestStationIndex.from_geoseries(GeoSeries([Point(0, 0), Point(0.1, 0.1), Point(0.1, 0.1)]))
+    result = index.nearest(0.11, 0.11)
+    assert result is not None
+    assert result[0] == 1, "Should return the first index of the nearest point when distances are equal"
+
+
+def test_nearest_station_index_far_point():
+    index = NearestStationIndex.from_geoseries(GeoSeries([Point(0, 0), Point(1, 1)]))
+    assert index.nearest(10, 10) is None, "Should return None when no point is within max_miles"
+
+
+def test_nearest_station_index_max_miles():
+    # one degree of latitude is about 69 miles
+    index = NearestStationIndex([1.0], [0.0], max_miles=70)
+    assert index.nearest(0.0, 0.0) is not None, "Should find points within max_miles"
+    index = NearestStationIndex([1.0], [0.0], max_miles=68)
+    assert index.nearest(0.0, 0.0) is None, "Should not find points further than max_miles"
+
+
+def test_nearest_station_index_empty():
+    index = NearestStationIndex([], [])
+    with pytest.raises(IndexError, match="Index is empty"):
+        index.nearest(0, 0)
+
+
+def test_nearest_station_index_invalid_point():
+    index = NearestStationIndex([0.0], [0.0])
+    with pytest.raises(ValueError, match="must be finite"):
+        index.nearest(float("nan"), 0)
+
+
+def test_nearest_station_index_matches_get_nearest_point():
+    rng = np.random.default_rng(1)
+    station_lats = rng.uniform(39.5, 40.5, 150)
+    station_lons = rng.uniform(-75.7, -74.6, 150)
+    pts = GeoSeries([Point(lon, lat) for lat, lon in zip(station_lats, station_lons, strict=True)])
+    index = NearestStationIndex.from_geoseries(pts)
+
+    for lat, lon in zip(rng.uniform(39.3, 40.7, 500), rng.uniform(-76.0, -74.3, 500), strict=True):
+        expected = get_nearest_point(Point(lon, lat), pts, return_distance=True)
+        result = index.nearest(lat, lon)
+        if expected is None:
+            assert result is None, "Should agree with get_nearest_point when there is no point in range"
+        else:
+            assert result is not None
+            assert result[0] == expected[0], "Should agree with get_nearest_point"
+            assert result[1] == pytest.approx(expected[1])
+
+
+def test_nearest_station_index_nearest_many():
+    rng = np.random.default_rng(2)
+    index = NearestStationIndex(rng.uniform(39.8, 40.2, 150), rng.uniform(-75.4, -74.9, 150))
+    lats = rng.uniform(39.5, 40.5, 1000)
+    lons = rng.uniform(-75.7, -74.6, 1000)
+    nearest, miles = index.nearest_many(lats, lons)
+    for i in range(len(lats)):
+        result = index.nearest(lats[i], lons[i])
+        if result is None:
+            assert nearest[i] == -1 and np.isnan(miles[i]), "Should mark points without a station"
+        else:
+            assert nearest[i] == result[0], "Should agree with the single point lookup"
+            assert miles[i] == pytest.approx(result[1])
@@ -0,0 +1,145 @@
+from pathlib import Path
+
+import numpy as np
+
+from geopandas import GeoDataFrame
+from shapely.geometry import Point
+
+from trainchallenge.common import NearestStationIndex
+from trainchallenge.common.snapshot import SNAPSHOT_VERSION
+from trainchallenge.common.snapshot import Snapshot
+from trainchallenge.common.snapshot import file_sha256
+from trainchallenge.common.snapshot import get_snapshot_pth
+from trainchallenge.common.snapshot import read_snapshot
+from trainchallenge.common.snapshot import read_station_grid
+from trainchallenge.common.snapshot import read_station_snapshot
+from trainchallenge.common.snapshot import read_station_table
+from trainchallenge.common.snapshot import write_snapshot
+from trainchallenge.common.snapshot import write_station_snapshot
+
+
+def test_snapshot_round_trip(tmp_path):
+    pth = tmp_path / "test.tcsnap"
+    arrays = {"x": np.array([1.5, 2.5, 3.5]), "idx": np.array([[1, 2], [3, 4]], dtype=np.int32)}
+    strings = {"name": ["a", "Airport Terminals E&F", "", "Café"]}
+    write_snapshot(pth, Snapshot(source_sha256="abc", arrays=arrays, strings=strings))
+
+    result = read_snapshot(pth, "abc")
+    assert result is not None, "Should read back a snapshot with a matching hash"
+    np.testing.assert_array_equal(result.arrays["x"], arrays["x"])
+    np.testing.assert_array_equal(result.arrays["idx"], arrays["idx"])
+    assert result.arrays["idx"].dtype == np.int32, "Should preserve array dtypes"
+    assert result.strings == strings, "Should preserve string tables"
+
+
+def test_snapshot_arrays_are_memory_mapped(tmp_path):
+    pth = tmp_path / "test.tcsnap"
+    write_snapshot(pth, Snapshot(source_sha256="abc", arrays={"x": np.arange(10, dtype=np.float64)}))
+    result = read_snapshot(pth)
+    assert result is not None
+    assert isinstance(result.arrays["x"].base, np.memmap), "Should memory-map the arrays"
+    assert not result.arrays["x"].flags.writeable, "Should be read-only"
+    assert result.arrays["x"].ctypes.data % 8 == 0, "Should be aligned for the dtype"
+
+
+def test_snapshot_stale_hash(tmp_path):
+    pth = tmp_path / "test.tcsnap"
+    write_snapshot(pth, Snapshot(source_sha256="abc", arrays={"x": np.zeros(3)}))
+    assert read_snapshot(pth, "def") is None, "Should treat a snapshot of a different source as stale"
+
+
+def test_snapshot_missing(tmp_path):
+    assert read_snapshot(tmp_path / "missing.tcsnap") is None, "Should return None for a missing snapshot"
+
+
+def test_snapshot_version_mismatch(tmp_path):
+    pth = tmp_path / "test.tcsnap"
+    write_snapshot(pth, Snapshot(source_sha256="abc", arrays={"x": np.zeros(3)}))
+    raw = bytearray(pth.read_bytes())
+    raw[8:12] = (SNAPSHOT_VERSION + 1).to_bytes(4, "little")
+    pth.write_bytes(bytes(raw))
+    assert read_snapshot(pth, "abc") is None, "Should ignore snapshots written with another format version"
+
+
+def test_snapshot_corrupt(tmp_path):
+    pth = tmp_path / "test.tcsnap"
+    pth.write_bytes(b"not a snapshot")
+    assert read_snapshot(pth) is None, "Should return None for a corrupt snapshot"
+
+
+def test_snapshot_corrupt_strings(tmp_path):
+    pth = tmp_path / "test.tcsnap"
+    write_snapshot(pth, Snapshot(source_sha256="abc", strings={"ids": ["a", "b"]}))
+    pth.write_bytes(pth.read_bytes().replace(b'"ids.data"', b'"idz.data"'))
+    assert read_snapshot(pth, "abc") is None, "Should return None for a snapshot with a missing string table"
+
+
+def test_station_snapshot_round_trip(tmp_path):
+    source_pth = tmp_path / "stations.geojson"
+    source_pth.write_text("raw data")
+    stations = GeoDataFrame(
+        {"stop_id": ["1", "2"], "station_name": ["A", "B"], "other": [1, 2]},
+        geometry=[Point(-75.1, 39.9, 0), Point(-75.2, 40.0, 0)],
+        crs="EPSG:4326",
+    )
+    pth = get_snapshot_pth(source_pth)
+    write_station_snapshot(pth, stations, source_pth, "stop_id", "station_name")
+
+    result = read_station_snapshot(pth, source_pth)
+    assert result is not None
+    assert list(result.columns) == ["stop_id", "station_name", "geometry"], "Should only keep id, name and geometry"
+    assert result.geometry.geom_equals(stations.geometry).all(), "Should preserve the geometry"
+    assert result.geometry.has_z.all(), "Should preserve the z coordinate"
+    assert result["stop_id"].tolist() == ["1", "2"]
+
+    index = NearestStationIndex.from_geoseries(result.geometry)
+    grid = read_station_grid(pth, source_pth, index)
+    assert grid is not None, "Should store the nearest station grid"
+    assert grid.nearest(39.91, -75.1) == index.nearest(39.91, -75.1)
+
+    source_pth.write_text("changed data")
+    assert read_station_snapshot(pth, source_pth) is None, "Should be stale after the source changes"
+    assert read_station_grid(pth, source_pth, index) is None, "Should not use the grid of a stale snapshot"
+
+
+def test_station_table_snapshot(tmp_path):
+    source_pth = tmp_path / "stations.geojson"
+    source_pth.write_text("raw data")
+    stations = GeoDataFrame(
+        {"stop_id": ["1", "2"], "station_name": ["A", "B"]},
+        geometry=[Point(-75.1, 39.9), Point(-75.2, 40.0)],
+        crs="EPSG:4326",
+    )
+    pth = get_snapshot_pth(source_pth)
+    write_station_snapshot(pth, stations, source_pth, "stop_id", "station_name")
+
+    table = read_station_table(pth, source_pth, "stop_id", "station_name")
+    assert table is not None
+    assert table.ids == ("1", "2") and table.names == ("A", "B")
+    np.testing.assert_array_equal(table.lats, [39.9, 40.0])
+    assert table.zs is None, "Should keep 2D points without z coordinates"
+    assert isinstance(table.lats.base, np.memmap), "Should keep the coordinates memory-mapped"
+    assert read_station_table(pth, source_pth, "GIS_ID", "NAME") is None, "Should need the id and name tables"
+
+    source_pth.write_text("changed data")
+    assert read_station_table(pth, source_pth, "stop_id", "station_name") is None, "Should be stale"
+
+
+def test_file_sha256(tmp_path):
+    pth = tmp_path / "file.txt"
+    pth.write_bytes(b"abc")
+    assert file_sha256(pth) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+
+
+def test_file_sha256_cached(tmp_path, monkeypatch):
+    pth = tmp_path / "file.txt"
+    pth.write_bytes(b"abc")
+    reads = []
+    read_bytes = Path.read_bytes
+    monkeypatch.setattr(Path, "read_bytes", lambda self: reads.append(self) or read_bytes(self))
+
+    assert file_sha256(pth) == file_sha256(pth)
+    assert len(reads) == 1, "Should only hash the file once"
+    pth.write_bytes(b"abcd")
+    assert file_sha256(pth) == "88d4266fd4e6338d13b845fcf289579d209c897823b9217da3e161936f031589"
+    assert len(reads) == 2, "Should hash the file again after it changes"
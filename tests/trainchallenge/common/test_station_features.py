@@ -0,0 +1,46 @@
+import geojson
+import pytest
+
+from shapely.geometry import Point
+
+from trainchallenge.common import StationFeatures
+from trainchallenge.common.features import empty_feature
+from trainchallenge.common.features import feature_collection
+
+
+geometries = [Point(-75.1234567, 39.9, 0.0), Point(-75.2, 40.0, 0.0)]
+stop_ids = ["90001", "90002"]
+station_names = ["Café", 'Airport "E&F"']
+
+
+def expected_feature(i, properties=None):
+    return geojson.Feature(
+        geometry=geometries[i],
+        properties={"stop_id": stop_ids[i], "station_name": station_names[i], **(properties or {})},
+    )
+
+
+def test_station_features_match_geojson():
+    features = StationFeatures(geometries, stop_ids, station_names)
+    properties = {"rank": 2, "distance_miles": 0.123456789, "gmaps_directions": "https://example.com/?a=1&b=é"}
+    for i in range(len(geometries)):
+        assert features.feature(i) == geojson.dumps(expected_feature(i))
+        assert features.feature(i, properties) == geojson.dumps(expected_feature(i, properties))
+    assert features.lats == [39.9, 40.0] and features.lons == [-75.1234567, -75.2]
+
+
+def test_feature_collection_matches_geojson():
+    features = StationFeatures(geometries, stop_ids, station_names)
+    encoded = feature_collection([features.feature(1), empty_feature({"error": "No station"})])
+    expected = geojson.FeatureCollection(
+        [expected_feature(1), geojson.Feature(geometry=None, properties={"error": "No station"})]
+    )
+    assert encoded == geojson.dumps(expected)
+    assert feature_collection([]) == geojson.dumps(geojson.FeatureCollection([]))
+
+
+def test_station_features_invalid():
+    with pytest.raises(ValueError, match="must be the same length"):
+        StationFeatures(geometries, stop_ids[:1], station_names)
+    with pytest.raises(ValueError, match="Out of range float values"):
+        StationFeatures(geometries, stop_ids, station_names).feature(0, {"distance_miles": float("nan")})
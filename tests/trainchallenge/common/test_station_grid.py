@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from trainchallenge.common import NearestStationIndex
+from trainchallenge.common import StationGrid
+from trainchallenge.common import gps_to_miles
+
+
+def make_index(max_miles=10.0):
+    rng = np.random.default_rng(0)
+    return NearestStationIndex(40.0 + rng.uniform(-0.3, 0.3, 150), -75.0 + rng.uniform(-0.3, 0.3, 150), max_miles)
+
+
+def random_points(n=5000):
+    rng = np.random.default_rng(1)
+    return 40.0 + rng.uniform(-0.6, 0.6, n), -75.0 + rng.uniform(-0.6, 0.6, n)
+
+
+@pytest.mark.parametrize("max_miles", [1.0, 10.0])
+def test_station_grid_matches_index(max_miles):
+    index = make_index(max_miles)
+    grid = StationGrid.build(index, cell_miles=0.5)
+    lats, lons = random_points()
+    for lat, lon in zip(lats, lons, strict=True):
+        assert grid.nearest(lat, lon) == index.nearest(lat, lon), "Should return exactly what the index returns"
+
+    nearest, miles = grid.nearest_many(lats, lons)
+    expected_nearest, expected_miles = index.nearest_many(lats, lons)
+    np.testing.assert_array_equal(nearest, expected_nearest)
+    np.testing.assert_allclose(miles, expected_miles, rtol=0, atol=1e-9)
+
+
+def test_station_grid_few_candidates():
+    grid = StationGrid.build(make_index(), cell_miles=0.5)
+    counts = np.diff(grid.offsets)
+    assert len(counts) == grid.n_cells
+    assert counts.max() < 20, "Should only check a handful of stations per cell"
+
+
+@pytest.mark.parametrize("lat", [-40.0, 0.0, 40.0])
+def test_station_grid_cell_size(lat):
+    grid = StationGrid.build(NearestStationIndex([lat], [-75.0], max_miles=10.0), cell_miles=0.5)
+    south, west = grid.origin
+    dlat, dlon = grid.cell_size
+    north = south + dlat * grid.shape[0]
+    widest_miles = max(
+        gps_to_miles(edge_lat, west, edge_lat, west + dlon) for edge_lat in np.linspace(south, north, 101)
+    )
+    assert widest_miles <= 0.5 + 1e-9, "Should not have cells wider than cell_miles"
+    assert gps_to_miles(south, west, south + dlat, west) <= 0.5 + 1e-9, "Should not have cells taller than cell_miles"
+
+
+def test_station_grid_ties():
+    grid = StationGrid.build(NearestStationIndex([0.0, 0.1, 0.1], [0.0, 0.1, 0.1]))
+    assert grid.nearest(0.11, 0.11)[0] == 1, "Should return the first station when distances are equal"
+    nearest, _ = grid.nearest_many([0.11], [0.11])
+    assert nearest.tolist() == [1]
+
+
+def test_station_grid_outside():
+    grid = StationGrid.build(NearestStationIndex([40.0], [-75.0]))
+    assert grid.nearest(45.0, -75.0) is None, "Should return None outside of the grid"
+    nearest, miles = grid.nearest_many([45.0, 40.0], [-75.0, -75.0])
+    assert nearest.tolist() == [-1, 0]
+    assert np.isnan(miles[0]) and miles[1] == 0.0
+
+
+def test_station_grid_round_trip():
+    index = make_index()
+    grid = StationGrid.build(index)
+    restored = StationGrid.from_arrays(index, grid.to_arrays())
+    assert restored is not None
+    lats, lons = random_points(500)
+    np.testing.assert_array_equal(restored.nearest_many(lats, lons)[0], grid.nearest_many(lats, lons)[0])
+
+    assert StationGrid.from_arrays(make_index(max_miles=5.0), grid.to_arrays()) is None, (
+        "Should not use a grid built for another max_miles"
+    )
+    assert StationGrid.from_arrays(NearestStationIndex([40.0], [-75.0]), grid.to_arrays()) is None, (
+        "Should not use a grid of other stations"
+    )
+    more_stations = NearestStationIndex(np.append(index.lats, 40.0), np.append(index.lons, -75.0), index.max_miles)
+    assert StationGrid.from_arrays(more_stations, grid.to_arrays()) is None, (
+        "Should not use a grid built for a different number of stations"
+    )
+
+
+def test_station_grid_invalid():
+    with pytest.raises(ValueError, match="Invalid cell_miles"):
+        StationGrid.build(make_index(), cell_miles=0)
+    with pytest.raises(ValueError, match="too big"):
+        StationGrid.build(make_index(), cell_miles=0.001)
+    with pytest.raises(IndexError, match="Index is empty"):
+        StationGrid.build(NearestStationIndex([], []))
+    with pytest.raises(ValueError, match="must be finite"):
+        StationGrid.build(make_index()).nearest(float("nan"), 0.0)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from geopandas import GeoDataFrame
+from shapely.geometry import Point
+
+from trainchallenge.common import StationTable
+
+
+def test_station_table_from_geodataframe():
+    stations = GeoDataFrame(
+        {"stop_id": ["1", "2"], "station_name": ["A", "B"], "other": [1, 2]},
+        geometry=[Point(-75.1, 39.9, 0), Point(-75.2, 40.0, 0)],
+        crs="EPSG:4326",
+    )
+    table = StationTable.from_geodataframe(stations, "stop_id", "station_name")
+    assert len(table) == 2
+    assert table.ids == ("1", "2") and table.names == ("A", "B")
+    np.testing.assert_array_equal(table.lats, [39.9, 40.0])
+    np.testing.assert_array_equal(table.lons, [-75.1, -75.2])
+    assert table.zs is not None, "Should preserve the z coordinate"
+    assert all(table.points() == stations.geometry.values), "Should rebuild the same points"
+
+    result = table.to_geodataframe()
+    assert list(result.columns) == ["stop_id", "station_name", "geometry"], "Should only keep id, name and geometry"
+    assert result.geometry.geom_equals(stations.geometry).all()
+    assert result.crs == "EPSG:4326"
+
+
+def test_station_table_2d_points():
+    table = StationTable(["a"], ["A"], [40.0], [-75.0])
+    assert table.zs is None
+    assert not table.points()[0].has_z, "Should build 2D points without z coordinates"
+
+
+def test_station_table_interns_strings():
+    # built at runtime, so the two names are distinct objects
+    names = [f"Station {chr(65)}" for _ in range(2)]
+    assert names[0] is not names[1]
+    table = StationTable([1, 2], names, [40.0, 40.1], [-75.0, -75.1])
+    assert table.ids == ("1", "2"), "Should store the ids as strings"
+    assert table.names[0] is table.names[1], "Should intern the names"
+
+
+def test_station_table_length_mismatch():
+    with pytest.raises(ValueError, match="Ids, names and coordinates must be the same length"):
+        StationTable(["a", "b"], ["A"], [40.0, 40.1], [-75.0, -75.1])
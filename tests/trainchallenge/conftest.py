@@ -0,0 +1,67 @@
+import zipfile
+
+import pytest
+
+
+# A small GTFS feed: the Airport line runs two weekday trips inbound from the Airport
+# to Suburban Station through Eastwick, the second one after midnight, and one
+# Saturday trip outbound. The Media line runs one weekday trip from Media to
+# Suburban Station. Suburban Station is a station with a child platform. There is no
+# weekday service on 2025-07-04, and Saturday service instead.
+gtfs_tables = {
+    "stops.txt": [
+        "stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station",
+        "AIR,Airport Terminal A,39.8768,-75.2450,0,",
+        "EWK,Eastwick,39.8942,-75.2340,0,",
+        "SUB,Suburban Station,39.9540,-75.1681,1,",
+        "SUB1,Suburban Station Track 1,39.9540,-75.1681,0,SUB",
+        "MED,Media,39.9168,-75.3880,0,",
+    ],
+    "routes.txt": [
+        "route_id,route_short_name,route_long_name,route_type",
+        "AIR,AIR,Airport Line,2",
+        "MED,MED,Media/Wawa Line,2",
+    ],
+    "trips.txt": [
+        "route_id,service_id,trip_id,trip_headsign,direction_id",
+        "AIR,WK,AIR_1,Center City,1",
+        "AIR,WK,AIR_2,Center City,1",
+        "AIR,SA,AIR_3,Airport,0",
+        "MED,WK,MED_1,Center City,1",
+    ],
+    "stop_times.txt": [
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence",
+        "AIR_1,08:00:00,08:00:00,AIR,1",
+        "AIR_1,08:05:00,08:05:30,EWK,2",
+        "AIR_1,08:20:00,08:20:00,SUB1,3",
+        "AIR_2,24:10:00,24:10:00,AIR,1",
+        "AIR_2,24:30:00,24:30:00,SUB1,3",
+        "AIR_3,9:00:00,9:00:00,SUB1,1",
+        "AIR_3,,,EWK,2",
+        "AIR_3,09:20:00,09:20:00,AIR,3",
+        "MED_1,07:30:00,07:30:00,MED,1",
+        "MED_1,08:10:00,08:10:00,SUB1,2",
+    ],
+    "calendar.txt": [
+        "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date",
+        "WK,1,1,1,1,1,0,0,20250101,20251231",
+        "SA,0,0,0,0,0,1,0,20250101,20251231",
+    ],
+    "calendar_dates.txt": [
+        "service_id,date,exception_type",
+        "WK,20250704,2",
+        "SA,20250704,1",
+    ],
+}
+
+
+def write_gtfs(pth, tables):
+    with zipfile.ZipFile(pth, "w") as feed:
+        for name, lines in tables.items():
+            feed.writestr(name, "\n".join(lines) + "\n")
+    return pth
+
+
+@pytest.fixture
+def gtfs_pth(tmp_path):
+    return write_gtfs(tmp_path / "gtfs.zip", gtfs_tables)
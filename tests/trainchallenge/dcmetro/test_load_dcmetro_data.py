@@ -0,0 +1,51 @@
+import shutil
+
+from trainchallenge.dcmetro.load_data import build_dcmetro_snapshot
+from trainchallenge.dcmetro.load_data import default_geojson_pth
+from trainchallenge.dcmetro.load_data import load_dcmetro_data
+from trainchallenge.dcmetro.load_data import load_dcmetro_stations
+
+
+def test_load_dcmetro_data_snapshot(tmp_path):
+    geojson_pth = tmp_path / default_geojson_pth.name
+    shutil.copy(default_geojson_pth, geojson_pth)
+    raw = load_dcmetro_data(geojson_pth)
+
+    build_dcmetro_snapshot(geojson_pth)
+    result = load_dcmetro_data(geojson_pth, use_snapshot=True)
+    assert list(result.columns) == ["GIS_ID", "NAME", "geometry"], "Should load from the snapshot"
+    assert result["GIS_ID"].tolist() == raw["GIS_ID"].tolist()
+    assert result["NAME"].tolist() == raw["NAME"].tolist()
+    assert result.geometry.geom_equals(raw.geometry).all()
+
+
+def test_load_dcmetro_data_snapshot_missing(tmp_path):
+    geojson_pth = tmp_path / default_geojson_pth.name
+    shutil.copy(default_geojson_pth, geojson_pth)
+    result = load_dcmetro_data(geojson_pth, use_snapshot=True)
+    assert "GIS_ID" in result.columns and len(result.columns) > 3, "Should fall back to the raw GeoJSON file"
+
+
+def test_load_dcmetro_data_snapshot_stale(tmp_path):
+    geojson_pth = tmp_path / default_geojson_pth.name
+    shutil.copy(default_geojson_pth, geojson_pth)
+    build_dcmetro_snapshot(geojson_pth)
+    geojson_pth.write_text(geojson_pth.read_text() + "\n")
+    result = load_dcmetro_data(geojson_pth, use_snapshot=True)
+    assert len(result.columns) > 3, "Should fall back to the raw GeoJSON file when the snapshot is stale"
+
+
+def test_load_dcmetro_stations(tmp_path):
+    geojson_pth = tmp_path / default_geojson_pth.name
+    shutil.copy(default_geojson_pth, geojson_pth)
+    raw = load_dcmetro_data(geojson_pth)
+
+    table = load_dcmetro_stations(geojson_pth)
+    assert list(table.ids) == raw["GIS_ID"].tolist()
+    assert list(table.names) == raw["NAME"].tolist()
+    assert all(table.points() == raw.geometry.values)
+
+    build_dcmetro_snapshot(geojson_pth)
+    result = load_dcmetro_stations(geojson_pth, use_snapshot=True)
+    assert result.ids == table.ids and result.names == table.names, "Should load from the snapshot"
+    assert all(result.points() == raw.geometry.values)
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from trainchallenge.gtfs.departures import DepartureEngine
+from trainchallenge.gtfs.feed import load_gtfs
+
+
+@pytest.fixture
+def engine(gtfs_pth):
+    return DepartureEngine(load_gtfs(gtfs_pth))
+
+
+def test_next_departures(engine):
+    result = engine.next_departures("AIR", datetime(2025, 7, 3, 7, 0), k=5)
+    assert [d.trip_id for d in result] == ["AIR_1", "AIR_2"]
+    assert result[0].departure == datetime(2025, 7, 3, 8, 0)
+    assert result[0].route_id == "AIR" and result[0].direction_id == 1 and result[0].headsign == "Center City"
+    assert result[1].departure == datetime(2025, 7, 4, 0, 10), "Should handle times past midnight"
+
+
+def test_next_departures_after(engine):
+    result = engine.next_departures("AIR", datetime(2025, 7, 3, 8, 0, 1))
+    assert [d.trip_id for d in result] == ["AIR_2"]
+    result = engine.next_departures("AIR", datetime(2025, 7, 4, 0, 5))
+    assert [d.departure for d in result] == [datetime(2025, 7, 4, 0, 10)], "Should include the previous service day"
+
+
+def test_next_departures_service_days(engine):
+    result = engine.next_departures("SUB1", datetime(2025, 7, 5, 6, 0), k=5)
+    assert [d.trip_id for d in result] == ["AIR_3"], "Only Saturday trips run on Saturdays"
+    result = engine.next_departures("SUB1", datetime(2025, 7, 4, 6, 0), k=5)
+    assert [d.departure for d in result] == [datetime(2025, 7, 4, 9, 0), datetime(2025, 7, 5, 9, 0)], (
+        "Saturday service on the holiday"
+    )
+
+
+def test_next_departures_filters(engine):
+    assert engine.next_departures("SUB1", datetime(2025, 7, 2, 6, 0), k=5) == [], "Trips end at SUB1 on weekdays"
+    result = engine.next_departures("MED", datetime(2025, 7, 3, 6, 0), route_ids=["MED"], direction_id=1)
+    assert [d.trip_id for d in result] == ["MED_1"]
+    assert engine.next_departures("MED", datetime(2025, 7, 3, 6, 0), route_ids=["AIR"]) == []
+    assert engine.next_departures("MED", datetime(2025, 7, 3, 6, 0), direction_id=0) == []
+
+
+def test_next_departures_next_day(engine):
+    result = engine.next_departures("MED", datetime(2025, 7, 2, 9, 0))
+    assert [d.departure for d in result] == [datetime(2025, 7, 3, 7, 30)], "Should look into the next day"
+
+
+def test_next_departures_invalid(engine):
+    with pytest.raises(KeyError):
+        engine.next_departures("XYZ", datetime(2025, 7, 3))
+    with pytest.raises(ValueError, match="Invalid k: 0"):
+        engine.next_departures("AIR", datetime(2025, 7, 3), k=0)
+
+
+def test_route_ids_for_line(engine):
+    assert engine.route_ids_for_line("Airport") == ["AIR"]
+    assert engine.route_ids_for_line("airport line") == ["AIR"]
+    assert engine.route_ids_for_line("Media/Wawa") == ["MED"]
+    assert engine.route_ids_for_line("Trenton") == []
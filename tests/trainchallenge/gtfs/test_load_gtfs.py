@@ -0,0 +1,73 @@
+import zipfile
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from trainchallenge.gtfs.feed import NO_TIME
+from trainchallenge.gtfs.feed import load_gtfs
+from trainchallenge.gtfs.feed import parse_gtfs_times
+
+
+def test_parse_gtfs_times():
+    result = parse_gtfs_times(pd.Series(["08:05:30", "8:05:30", "25:00:00", "", " 00:00:01 "]))
+    assert result.dtype == np.int32
+    assert result.tolist() == [29130, 29130, 90000, NO_TIME, 1]
+
+
+def test_parse_gtfs_times_invalid():
+    with pytest.raises(ValueError, match="Invalid GTFS time: 8h05"):
+        parse_gtfs_times(pd.Series(["08:00:00", "8h05"]))
+
+
+def test_load_gtfs(gtfs_pth):
+    feed = load_gtfs(gtfs_pth)
+    assert feed.stop_ids.tolist() == ["AIR", "EWK", "SUB", "SUB1", "MED"]
+    assert feed.stop_parents.tolist() == [-1, -1, -1, 2, -1]
+    assert feed.trip_routes.tolist() == [0, 0, 0, 1]
+    assert feed.trip_directions.tolist() == [1, 1, 0, 1]
+    assert feed.service_ids[feed.trip_services].tolist() == ["WK", "WK", "SA", "WK"]
+
+    # stop times are sorted by trip and stop sequence, with integer coded columns
+    assert feed.stop_time_trips.dtype == np.int32
+    assert feed.trip_ids[feed.stop_time_trips].tolist() == ["AIR_1"] * 3 + ["AIR_2"] * 2 + ["AIR_3"] * 3 + ["MED_1"] * 2
+    assert feed.stop_time_departures[:3].tolist() == [28800, 29130, 30000]
+    assert feed.stop_time_arrivals[3] == 24 * 3600 + 600, "Should keep times past midnight"
+    assert feed.stop_time_arrivals[6] == NO_TIME
+
+
+def test_load_gtfs_indexes(gtfs_pth):
+    feed = load_gtfs(gtfs_pth)
+    assert feed.routes_at_stop("EWK") == ["AIR"]
+    assert feed.routes_at_stop("SUB1") == ["AIR", "MED"]
+    assert feed.routes_at_stop("SUB") == ["AIR", "MED"], "A station should be served by the routes of its stops"
+    assert feed.stops_on_route("AIR") == ["AIR", "EWK", "SUB1"]
+    assert feed.stops_on_route("MED") == ["MED", "SUB1"]
+    with pytest.raises(KeyError):
+        feed.routes_at_stop("XYZ")
+
+
+def test_load_gtfs_chunked(gtfs_pth):
+    feed = load_gtfs(gtfs_pth)
+    chunked = load_gtfs(gtfs_pth, chunksize=3)
+    for name in ("stop_time_trips", "stop_time_stops", "stop_time_arrivals", "route_stop_codes", "stop_route_codes"):
+        assert np.array_equal(getattr(feed, name), getattr(chunked, name)), name
+
+
+def test_load_gtfs_missing_file(tmp_path):
+    pth = tmp_path / "gtfs.zip"
+    with zipfile.ZipFile(pth, "w") as feed:
+        feed.writestr("stops.txt", "stop_id\nA\n")
+    with pytest.raises(FileNotFoundError, match=r"routes\.txt"):
+        load_gtfs(pth)
+
+
+def test_load_gtfs_active_services(gtfs_pth):
+    feed = load_gtfs(gtfs_pth)
+    assert feed.service_ids.tolist() == ["SA", "WK"]
+    assert feed.active_services(date(2025, 7, 3)).tolist() == [False, True], "Thursday"
+    assert feed.active_services(date(2025, 7, 5)).tolist() == [True, False], "Saturday"
+    assert feed.active_services(date(2025, 7, 4)).tolist() == [True, False], "Holiday exception"
+    assert feed.active_services(date(2026, 7, 3)).tolist() == [False, False], "After the end date"
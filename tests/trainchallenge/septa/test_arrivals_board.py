@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from trainchallenge.septa.arrivals_board import ArrivalsBoard
+from trainchallenge.septa.arrivals_board import index_arrivals
+from trainchallenge.septa.fake_api import FakeSeptaServer
+from trainchallenge.septa.fake_api import make_fake_arrivals
+from trainchallenge.septa.septa_api import SeptaClient
+
+
+@pytest.fixture
+def fake_septa():
+    with FakeSeptaServer() as server:
+        yield server
+
+
+def make_board(server: FakeSeptaServer, stop_ids: list[str], **kwargs) -> ArrivalsBoard:
+    return ArrivalsBoard(SeptaClient(url=server.url, cache_ttl=0), stop_ids, **kwargs)
+
+
+def test_index_arrivals():
+    by_line = index_arrivals(make_fake_arrivals("90006", "S"), "S")
+    assert set(by_line) == {"Airport", "Paoli/Thorndale", "Trenton", "Warminster"}
+    airport = by_line["Airport"]
+    assert len(airport) == 2
+    assert airport[0]["sched_time"] < airport[1]["sched_time"], "Should sort each line by scheduled time"
+
+
+def test_arrivals_board_serves_from_board(fake_septa):
+    board = make_board(fake_septa, ["90006", "90007"])
+    assert board.refresh_once() == 4, "Should refresh every station and direction within the budget"
+    assert sum(fake_septa.requests.values()) == 4
+
+    train = board.get_next_arrival("90006", "Airport", "N")
+    assert train is not None
+    assert train["line"] == "Airport"
+    assert sum(fake_septa.requests.values()) == 4, "Should not call SEPTA when the board is fresh"
+    assert board.get_next_arrival("90006", "Unknown Line", "N") is None
+
+
+def test_arrivals_board_falls_back_to_live_call(fake_septa):
+    board = make_board(fake_septa, ["90006"])
+    train = board.get_next_arrival("90006", "Trenton", "S")
+    assert train is not None
+    assert fake_septa.requests[("90006", "S")] == 1, "Should call SEPTA on a board miss"
+    board.get_next_arrival("90006", "Trenton", "S")
+    assert fake_septa.requests[("90006", "S")] == 1, "Should put the live response on the board"
+
+
+def test_arrivals_board_staleness(fake_septa):
+    board = make_board(fake_septa, ["90006"], max_staleness=0.05)
+    board.refresh_once()
+    time.sleep(0.1)
+    assert board.get_board_arrivals("90006", "N") is None, "Should not serve entries older than max_staleness"
+    board.get_next_arrival("90006", "Airport", "N")
+    assert fake_septa.requests[("90006", "N")] == 2, "Should call SEPTA when the board is stale"
+
+
+def test_arrivals_board_prioritizes_queried_stations(fake_septa):
+    board = make_board(fake_septa, [str(90000 + i) for i in range(10)], max_fetches_per_cycle=2)
+    board.record_query("90009", "S")
+    board.record_query("90009", "S")
+    board.record_query("90005", "N")
+    board.refresh_once()
+    assert set(fake_septa.requests) == {("90009", "S"), ("90005", "N")}, "Should refresh the most queried first"
+
+
+def test_arrivals_board_background_refresh(fake_septa):
+    board = make_board(fake_septa, ["90006"], refresh_interval=0.05)
+    board.start()
+    try:
+        deadline = time.monotonic() + 5
+        while board.get_board_arrivals("90006", "S") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        board.stop()
+    assert board.get_board_arrivals("90006", "S") is not None, "Should fill the board in the background"
+
+
+def test_arrivals_board_refresh_failure():
+    board = ArrivalsBoard(SeptaClient(url="http://127.0.0.1:9/api/Arrivals/index.php", timeout=1), ["90006"])
+    assert board.refresh_once() == 0, "Should skip stations that fail to refresh"
+    with pytest.raises(RuntimeError):
+        board.get_next_arrival("90006", "Airport", "N")
@@ -0,0 +1,74 @@
+import pytest
+
+from trainchallenge.septa.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def now(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("trainchallenge.septa.circuit_breaker.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_circuit_breaker_opens_on_failure_rate(now):
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, reset_timeout=10)
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow(), "Should not open before min_calls"
+
+    breaker.record_failure()
+    assert breaker.failure_rate == 0.75
+    assert breaker.state == "open"
+    assert not breaker.allow(), "Should fail fast while open"
+
+
+def test_circuit_breaker_window(now):
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=2)
+    breaker.record_failure()
+    for _ in range(4):
+        breaker.record_success()
+    assert breaker.failure_rate == 0, "Should only track the last window_size calls"
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_circuit_breaker_half_open_probe(now):
+    breaker = CircuitBreaker(window_size=2, min_calls=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    now[0] = 10.0
+    assert breaker.state == "half_open"
+    assert breaker.allow(), "Should let a probe through after reset_timeout"
+    assert not breaker.allow(), "Should only let a single probe through"
+    breaker.record_failure()
+    assert breaker.state == "open", "Should open again when the probe fails"
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed", "Should close when the probe succeeds"
+    assert breaker.failure_rate == 0
+
+
+def test_circuit_breaker_ignores_late_calls(now):
+    breaker = CircuitBreaker(window_size=2, min_calls=2)
+    breaker.record_failure()
+    breaker.record_failure()
+    # a call let through before the circuit opened finishes
+    breaker.record_success()
+    assert breaker.state == "open", "Only the probe should close the circuit"
+    breaker.reset()
+    assert breaker.state == "closed" and breaker.failure_rate == 0
+
+
+def test_circuit_breaker_invalid():
+    with pytest.raises(ValueError, match="Invalid failure_rate_threshold"):
+        CircuitBreaker(failure_rate_threshold=0)
+    with pytest.raises(ValueError, match="Invalid window_size"):
+        CircuitBreaker(window_size=0)
+    with pytest.raises(ValueError, match="Invalid min_calls"):
+        CircuitBreaker(window_size=2, min_calls=3)
+    with pytest.raises(ValueError, match="Invalid reset_timeout"):
+        CircuitBreaker(reset_timeout=0)
@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+from trainchallenge.septa.fake_api import FakeSeptaServer
+from trainchallenge.septa.septa_api import SeptaClient
+
+
+def test_fake_septa_server_errors():
+    with FakeSeptaServer(error_rate=1.0) as server:
+        client = SeptaClient(url=server.url, cache_ttl=0)
+        with pytest.raises(RuntimeError, match="API request failed"):
+            client.get_arrivals("90006", "N")
+        assert server.errors == 1, "Should count the failed requests"
+
+
+def test_fake_septa_server_latency():
+    with FakeSeptaServer(latency=0.05, seed=0) as server:
+        client = SeptaClient(url=server.url, cache_ttl=0)
+        start = time.perf_counter()
+        for _ in range(5):
+            assert client.get_arrivals("90006", "N")
+        assert time.perf_counter() - start > 0.05, "Should delay the responses"
+        assert server.errors == 0
+
+
+def test_fake_septa_server_invalid_options():
+    with pytest.raises(ValueError, match="latency"):
+        FakeSeptaServer(latency=-1)
+    with pytest.raises(ValueError, match="error_rate"):
+        FakeSeptaServer(error_rate=1.5)
@@ -0,0 +1,86 @@
+import io
+import shutil
+
+from trainchallenge.septa.load_data import build_regional_rail_snapshot
+from trainchallenge.septa.load_data import default_kmz_pth
+from trainchallenge.septa.load_data import load_regional_rail_data
+from trainchallenge.septa.load_data import load_regional_rail_stations
+from trainchallenge.septa.load_data import parse_description
+from trainchallenge.septa.load_data import read_kml_placemarks
+
+
+def make_description(rows):
+    cells = "".join(f"<tr><td>{k}</td><td>{v}</td></tr>" for k, v in rows)
+    return f"<html><body><table><tr><td>Header</td></tr><tr><td><table>{cells}</table></td></tr></table></body></html>"
+
+
+def test_parse_description():
+    description = make_description([("Station_Na", "Airport Terminals E&amp;F"), ("Stop_ID", "90401"), ("Zip", "")])
+    result = parse_description(description)
+    assert result == {"Station_Na": "Airport Terminals E&F", "Stop_ID": "90401", "Zip": ""}
+
+
+def test_read_kml_placemarks():
+    description = make_description([("Stop_ID", "90401"), ("Latitude", "39.879077")])
+    kml = f"""<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Folder>
+<Placemark><name>Airport Line</name><description><![CDATA[{description}]]></description>
+<Point><coordinates> -75.2399,39.8790,0</coordinates></Point></Placemark>
+</Folder></Document></kml>"""
+    result = read_kml_placemarks(io.BytesIO(kml.encode("utf-8")))
+    assert result["Name"].tolist() == ["Airport Line"]
+    assert result["Stop_ID"].tolist() == ["90401"]
+    assert result["Latitude"].dtype == "float64" and result["Latitude"].iloc[0] == 39.879077
+    assert (result.geometry.x.iloc[0], result.geometry.y.iloc[0]) == (-75.2399, 39.8790)
+
+
+def test_read_kml_placemarks_not_point():
+    kml = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Folder>
+<Placemark><name>Airport Line</name><LineString><coordinates>-75.2399,39.8790,0 -75.2,39.9,0</coordinates></LineString>
+</Placemark>
+<Placemark><name>Airport Terminal A</name><Point><coordinates>-75.2399,39.8790,0</coordinates></Point></Placemark>
+</Folder></Document></kml>"""
+    result = read_kml_placemarks(io.BytesIO(kml.encode("utf-8")))
+    assert result["Name"].tolist() == ["Airport Terminal A"], "Should skip placemarks without a point"
+
+    only_line = kml.replace("<Point>", "<LineString>").replace("</Point>", "</LineString>")
+    assert len(read_kml_placemarks(io.BytesIO(only_line.encode("utf-8")))) == 0
+
+
+def test_load_regional_rail_data():
+    result = load_regional_rail_data()
+    assert len(result) > 0
+    assert result.crs == "EPSG:4326"
+    assert result["stop_id"].tolist() == result["Stop_ID"].tolist()
+    assert result["station_name"].tolist() == result["Station_Na"].tolist()
+    assert (abs(result.geometry.y - result["Latitude"]) < 1e-4).all(), "Geometry should match the attributes"
+
+
+def test_load_regional_rail_data_snapshot(tmp_path):
+    kmz_pth = tmp_path / default_kmz_pth.name
+    shutil.copy(default_kmz_pth, kmz_pth)
+    raw = load_regional_rail_data(kmz_pth)
+
+    build_regional_rail_snapshot(kmz_pth)
+    result = load_regional_rail_data(kmz_pth, use_snapshot=True)
+    assert list(result.columns) == ["stop_id", "station_name", "geometry"], "Should load from the snapshot"
+    assert result["stop_id"].tolist() == raw["stop_id"].tolist()
+    assert result["station_name"].tolist() == raw["station_name"].tolist()
+    assert result.geometry.geom_equals(raw.geometry).all()
+
+
+def test_load_regional_rail_stations(tmp_path):
+    kmz_pth = tmp_path / default_kmz_pth.name
+    shutil.copy(default_kmz_pth, kmz_pth)
+    raw = load_regional_rail_data(kmz_pth)
+
+    table = load_regional_rail_stations(kmz_pth)
+    assert list(table.ids) == raw["stop_id"].tolist()
+    assert list(table.names) == raw["station_name"].tolist()
+    assert all(table.points() == raw.geometry.values), "Should keep the 3D points"
+
+    build_regional_rail_snapshot(kmz_pth)
+    result = load_regional_rail_stations(kmz_pth, use_snapshot=True)
+    assert result.ids == table.ids and result.names == table.names, "Should load from the snapshot"
+    assert all(result.points() == raw.geometry.values)
@@ -0,0 +1,96 @@
+import asyncio
+
+from datetime import datetime
+
+import pytest
+
+from trainchallenge.gtfs.departures import DepartureEngine
+from trainchallenge.gtfs.feed import load_gtfs
+from trainchallenge.septa.schedule import AsyncFallbackSeptaArrivals
+from trainchallenge.septa.schedule import FallbackSeptaArrivals
+from trainchallenge.septa.schedule import ScheduledSeptaArrivals
+from trainchallenge.septa.septa_api import septa_date_format
+
+
+@pytest.fixture
+def scheduled(gtfs_pth):
+    return ScheduledSeptaArrivals(DepartureEngine(load_gtfs(gtfs_pth)), direction_ids={"N": 0, "S": 1})
+
+
+def test_scheduled_get_next_arrivals(scheduled):
+    result = scheduled.get_next_arrivals("AIR", "Airport", "S", k=2, after=datetime(2025, 7, 3, 7, 0))
+    assert [t["train_id"] for t in result] == ["AIR_1", "AIR_2"]
+    assert result[0]["line"] == "Airport" and result[0]["direction"] == "S"
+    assert result[0]["status"] == "Scheduled"
+    assert datetime.strptime(result[0]["sched_time"], septa_date_format) == datetime(2025, 7, 3, 8, 0)
+
+
+def test_scheduled_get_next_arrivals_unknown(scheduled):
+    after = datetime(2025, 7, 3, 7, 0)
+    assert scheduled.get_next_arrivals("90401", "Airport", "S", after=after) == [], "Unknown station"
+    assert scheduled.get_next_arrivals("AIR", "Trenton", "S", after=after) == [], "Unknown line"
+    assert scheduled.get_next_arrivals("AIR", "Airport", "N", after=after) == [], "No trains in this direction"
+
+
+class FakeLive:
+    def __init__(self, trains=None):
+        self.trains = trains
+
+    def get_upcoming_trains(self, stop_id, line_name, direction):
+        if self.trains is None:
+            raise RuntimeError("API request failed: timed out")
+        return self.trains
+
+    def get_next_arrival(self, stop_id, line_name, direction):
+        trains = self.get_upcoming_trains(stop_id, line_name, direction)
+        return trains[0] if trains else None
+
+
+def test_fallback_uses_live(scheduled):
+    live_train = {"train_id": "live"}
+    fallback = FallbackSeptaArrivals(FakeLive([live_train]), scheduled)
+    assert fallback.get_next_arrival("AIR", "Airport", "S") is live_train
+    assert fallback.get_upcoming_trains("AIR", "Airport", "S") == [live_train]
+
+
+def test_fallback_uses_schedule_on_failure(scheduled, monkeypatch):
+
+    # the schedule is looked up at the current time, pin it to a weekday in the feed
+    get_next_arrivals = scheduled.get_next_arrivals
+    monkeypatch.setattr(
+        scheduled,
+        "get_next_arrivals",
+        lambda *args, **kwargs: get_next_arrivals(*args, after=datetime(2025, 7, 3, 7, 0), **kwargs),
+    )
+
+    fallback = FallbackSeptaArrivals(FakeLive(), scheduled)
+    result = fallback.get_next_arrival("MED", "Media/Wawa", "S")
+    assert result is not None and result["train_id"] == "MED_1"
+    assert [t["train_id"] for t in fallback.get_upcoming_trains("AIR", "Airport", "S")] == ["AIR_1", "AIR_2"]
+
+
+class FakeAsyncLive(FakeLive):
+    async def get_upcoming_trains(self, stop_id, line_name, direction):
+        return FakeLive.get_upcoming_trains(self, stop_id, line_name, direction)
+
+    async def get_next_arrival(self, stop_id, line_name, direction):
+        trains = await self.get_upcoming_trains(stop_id, line_name, direction)
+        return trains[0] if trains else None
+
+
+def test_async_fallback(scheduled, monkeypatch):
+    get_next_arrivals = scheduled.get_next_arrivals
+    monkeypatch.setattr(
+        scheduled,
+        "get_next_arrivals",
+        lambda *args, **kwargs: get_next_arrivals(*args, after=datetime(2025, 7, 3, 7, 0), **kwargs),
+    )
+
+    live_train = {"train_id": "live"}
+    live = AsyncFallbackSeptaArrivals(FakeAsyncLive([live_train]), scheduled)
+    assert asyncio.run(live.get_upcoming_trains("AIR", "Airport", "S")) == [live_train]
+
+    fallback = AsyncFallbackSeptaArrivals(FakeAsyncLive(), scheduled)
+    assert asyncio.run(fallback.get_next_arrival("MED", "Media/Wawa", "S"))["train_id"] == "MED_1"
+    trains = asyncio.run(fallback.get_upcoming_trains("AIR", "Airport", "S"))
+    assert [t["train_id"] for t in trains] == ["AIR_1", "AIR_2"], "Should use the schedule when SEPTA fails"
@@ -0,0 +1,244 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from trainchallenge.septa.circuit_breaker import CircuitBreaker
+from trainchallenge.septa.fake_api import FakeSeptaServer
+from trainchallenge.septa.septa_api import AsyncSeptaClient
+from trainchallenge.septa.septa_api import SeptaClient
+from trainchallenge.septa.septa_api import parse_next_arrival
+
+
+def make_arrivals(direction: str, trains: list[dict]) -> dict:
+    # the Arrivals API returns a single object for the requested direction
+    return {"Jefferson Departures: October 18, 2026, 8:00 am": [{direction: trains}]}
+
+
+def make_train(line: str, sched_time: str) -> dict:
+    return {"line": line, "sched_time": sched_time, "train_id": f"{line}-{sched_time}"}
+
+
+class FakeResponse:
+    def __init__(self, rj: dict, status_code: int = 200):
+        self.rj = rj
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+    def json(self):
+        return self.rj
+
+
+class FakeSession:
+    def __init__(self, rj: dict, status_code: int = 200, release: threading.Event | None = None):
+        self.rj = rj
+        self.status_code = status_code
+        self.release = release
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.calls.append(params)
+        if self.release is not None:
+            self.release.wait(5)
+        return FakeResponse(self.rj, self.status_code)
+
+    def close(self):
+        pass
+
+
+arrivals = make_arrivals(
+    "Northbound",
+    [
+        make_train("Airport", "2026-10-18 08:20:00.000"),
+        make_train("Trenton", "2026-10-18 08:01:00.000"),
+        make_train("Airport", "2026-10-18 08:05:00.000"),
+    ],
+)
+
+
+def test_parse_next_arrival_earliest():
+    result = parse_next_arrival(arrivals, "Airport", "N")
+    assert result["sched_time"] == "2026-10-18 08:05:00.000", "Should return the earliest scheduled train on the line"
+
+
+def test_parse_next_arrival_southbound():
+    rj = make_arrivals("Southbound", [make_train("Airport", "2026-10-18 08:10:00.000")])
+    result = parse_next_arrival(rj, "Airport", "S")
+    assert result["sched_time"] == "2026-10-18 08:10:00.000"
+
+
+def test_parse_next_arrival_no_trains():
+    assert parse_next_arrival({"Jefferson": []}, "Airport", "N") is None, "Should return None when there are no trains"
+    assert parse_next_arrival(arrivals, "Paoli", "N") is None, "Should return None when no train is on the line"
+
+
+def test_septa_client_caches_responses():
+    session = FakeSession(arrivals)
+    client = SeptaClient(session=session)  # type: ignore[arg-type]
+    assert client.get_arrivals("90006", "N") == arrivals
+    assert client.get_arrivals("90006", "N") == arrivals
+    assert len(session.calls) == 1, "Should serve repeated requests from the cache"
+    client.get_arrivals("90006", "S")
+    assert len(session.calls) == 2, "Should cache per station and direction"
+    assert session.calls[-1] == {"station": "90006", "direction": "S"}
+
+
+def test_septa_client_cache_disabled():
+    session = FakeSession(arrivals)
+    client = SeptaClient(session=session, cache_ttl=0)  # type: ignore[arg-type]
+    client.get_arrivals("90006", "N")
+    client.get_arrivals("90006", "N")
+    assert len(session.calls) == 2, "Should not cache when the ttl is 0"
+
+
+def test_septa_client_http_error():
+    session = FakeSession(arrivals, status_code=500)
+    client = SeptaClient(session=session)  # type: ignore[arg-type]
+    with pytest.raises(RuntimeError, match="API request failed"):
+        client.get_arrivals("90006", "N")
+    with pytest.raises(RuntimeError, match="API request failed"):
+        client.get_arrivals("90006", "N")
+    assert len(session.calls) == 2, "Should not cache failed requests"
+
+
+def test_septa_client_coalesces_concurrent_requests():
+    release = threading.Event()
+    session = FakeSession(arrivals, release=release)
+    client = SeptaClient(session=session)  # type: ignore[arg-type]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get_arrivals("90006", "N"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    # give every thread time to join the request in flight
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(session.calls) == 1, "Should share one upstream call between concurrent requests"
+    assert results == [arrivals] * 8
+
+
+def test_async_septa_client_coalesces_concurrent_requests():
+    session = FakeSession(arrivals)
+    client = AsyncSeptaClient(SeptaClient(session=session, cache_ttl=0))  # type: ignore[arg-type]
+
+    async def run():
+        return await asyncio.gather(*[client.get_next_arrival("90006", "Airport", "N") for _ in range(8)])
+
+    results = asyncio.run(run())
+    assert len(session.calls) == 1, "Should share one upstream call between concurrent requests"
+    assert all(r["sched_time"] == "2026-10-18 08:05:00.000" for r in results)
+
+
+def test_async_septa_client_max_concurrency():
+    release = threading.Event()
+    session = FakeSession(arrivals, release=release)
+    client = AsyncSeptaClient(SeptaClient(session=session, cache_ttl=0), max_concurrency=2)  # type: ignore[arg-type]
+
+    async def run():
+        tasks = [asyncio.ensure_future(client.get_arrivals(str(stop_id), "N")) for stop_id in range(5)]
+        await asyncio.sleep(0.1)
+        running = len(session.calls)
+        release.set()
+        await asyncio.gather(*tasks)
+        return running
+
+    assert asyncio.run(run()) == 2, "Should only run max_concurrency upstream requests at once"
+    assert len(session.calls) == 5
+
+
+def test_async_septa_client_timeout():
+    release = threading.Event()
+    session = FakeSession(arrivals, release=release)
+    client = AsyncSeptaClient(SeptaClient(session=session), timeout=0.05)  # type: ignore[arg-type]
+
+    async def run():
+        with pytest.raises(RuntimeError, match=r"no response within 0\.05 seconds"):
+            await client.get_upcoming_trains("90006", "Airport", "N")
+        release.set()
+        # the request kept running, so its response is cached for the next call
+        await asyncio.sleep(0.1)
+        return await client.get_upcoming_trains("90006", "Airport", "N")
+
+    trains = asyncio.run(run())
+    assert [t["sched_time"] for t in trains] == ["2026-10-18 08:05:00.000", "2026-10-18 08:20:00.000"]
+    assert len(session.calls) == 1
+
+
+def test_async_septa_client_invalid():
+    with pytest.raises(ValueError, match="Invalid max_concurrency"):
+        AsyncSeptaClient(SeptaClient(session=FakeSession(arrivals)), max_concurrency=0)  # type: ignore[arg-type]
+
+
+def test_septa_client_outage_with_fake_upstream(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("trainchallenge.septa.circuit_breaker.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(window_size=4, min_calls=2, reset_timeout=30)
+
+    with FakeSeptaServer() as server:
+        client = SeptaClient(url=server.url, cache_ttl=0, breaker=breaker, stale_ttl=600)
+        fresh = client.get_arrivals("90006", "N")
+
+        # SEPTA goes down
+        server.error_rate = 1.0
+        stale = client.get_arrivals("90006", "N")
+        train = next(iter(stale.values()))[0]["Northbound"][0]
+        assert train["stale"] and train["fetched_at"], "Should serve the last arrivals, marked stale"
+        assert next(iter(fresh.values()))[0]["Northbound"][0].get("stale") is None, "Should not mark the original"
+        with pytest.raises(RuntimeError, match="API request failed"):
+            client.get_arrivals("90007", "N")
+        assert breaker.state == "open"
+
+        # while open, requests fail fast without reaching SEPTA
+        calls = sum(server.requests.values())
+        assert client.get_arrivals("90006", "N") == stale
+        with pytest.raises(RuntimeError, match="circuit open"):
+            client.get_arrivals("90006", "N", allow_stale=False)
+        assert sum(server.requests.values()) == calls
+
+        # SEPTA comes back, the probe closes the circuit
+        server.error_rate = 0.0
+        now[0] = 30.0
+        assert breaker.state == "half_open"
+        assert "stale" not in next(iter(client.get_arrivals("90007", "N").values()))[0]["Northbound"][0]
+        assert breaker.state == "closed"
+        assert sum(server.requests.values()) == calls + 1
+
+
+def test_septa_client_stale_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("trainchallenge.septa.septa_api.time.monotonic", lambda: now[0])
+    session = FakeSession(arrivals)
+    client = SeptaClient(session=session, cache_ttl=0, stale_ttl=60)  # type: ignore[arg-type]
+    client.get_arrivals("90006", "N")
+
+    session.status_code = 500
+    assert client.get_arrivals("90006", "N") is not None
+    now[0] = 61.0
+    with pytest.raises(RuntimeError, match="API request failed"):
+        client.get_arrivals("90006", "N")
+
+
+def test_async_septa_client_serves_stale_on_timeout():
+    release = threading.Event()
+    session = FakeSession(arrivals)
+    client = AsyncSeptaClient(SeptaClient(session=session, cache_ttl=0, stale_ttl=60), timeout=0.05)  # type: ignore[arg-type]
+
+    async def run():
+        await client.get_arrivals("90006", "N")
+        session.release = release
+        trains = await client.get_upcoming_trains("90006", "Airport", "N")
+        release.set()
+        return trains
+
+    trains = asyncio.run(run())
+    assert all(t["stale"] for t in trains), "Should serve the last arrivals when SEPTA is too slow"
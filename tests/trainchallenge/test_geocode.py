@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trainchallenge.cli import main
+from trainchallenge.geocode import geocode_file
+from trainchallenge.networks import registry
+
+
+@pytest.fixture
+def positions_pth(tmp_path):
+    rng = np.random.default_rng(0)
+    positions = pd.DataFrame(
+        {
+            "ping_id": np.arange(50),
+            "lat": rng.uniform(39.7, 40.3, 50),
+            "lon": rng.uniform(-75.6, -74.9, 50),
+        }
+    )
+    positions.loc[3, "lat"] = np.nan  # a missing position
+    positions.loc[7, ["lat", "lon"]] = (45.0, -70.0)  # far from every station
+    pth = tmp_path / "positions.csv"
+    positions.to_csv(pth, index=False)
+    return pth
+
+
+def test_geocode_file_matches_index(positions_pth, tmp_path):
+    output_pth = tmp_path / "tagged.csv"
+    summary = geocode_file(positions_pth, output_pth, "septa", lat_col="lat", lon_col="lon", chunk_size=7)
+    assert (summary.rows, summary.chunks) == (50, 8)
+
+    tagged = pd.read_csv(output_pth, dtype={"stop_id": str})
+    assert list(tagged.columns) == ["ping_id", "lat", "lon", "stop_id", "station_name", "distance_miles"]
+    assert tagged["ping_id"].tolist() == list(range(50)), "Should keep the input rows in order"
+    assert summary.matched == tagged["stop_id"].notna().sum()
+
+    septa = registry.load("septa")
+    stop_ids = septa.stop_ids
+    for row in tagged.itertuples():
+        nearest = None if np.isnan(row.lat) else septa.index.nearest(row.lat, row.lon)
+        if nearest is None:
+            assert pd.isna(row.stop_id) and np.isnan(row.distance_miles)
+        else:
+            assert row.stop_id == str(stop_ids[nearest[0]])
+            assert row.distance_miles == pytest.approx(nearest[1])
+    assert pd.isna(tagged.loc[3, "stop_id"]) and pd.isna(tagged.loc[7, "stop_id"])
+
+
+def test_geocode_file_workers(positions_pth, tmp_path):
+    serial_pth = tmp_path / "serial.csv"
+    parallel_pth = tmp_path / "parallel.csv"
+    geocode_file(positions_pth, serial_pth, "dcmetro", lat_col="lat", lon_col="lon", chunk_size=9)
+    summary = geocode_file(
+        positions_pth, parallel_pth, "dcmetro", lat_col="lat", lon_col="lon", chunk_size=9, workers=2, prefix="dc_"
+    )
+    assert summary.rows == 50
+    serial = pd.read_csv(serial_pth)
+    parallel = pd.read_csv(parallel_pth)
+    assert list(parallel.columns[-3:]) == ["dc_stop_id", "dc_station_name", "dc_distance_miles"]
+    assert parallel.set_axis(serial.columns, axis=1).equals(serial), "Should write the same rows as a single process"
+
+
+def test_geocode_file_parquet(positions_pth, tmp_path):
+    pytest.importorskip("pyarrow")
+    parquet_pth = tmp_path / "positions.parquet"
+    pd.read_csv(positions_pth).to_parquet(parquet_pth)
+    output_pth = tmp_path / "tagged.parquet"
+    geocode_file(parquet_pth, output_pth, "septa", lat_col="lat", lon_col="lon", chunk_size=20)
+    assert len(pd.read_parquet(output_pth)) == 50
+
+
+def test_geocode_file_parquet_first_chunk_unmatched(positions_pth, tmp_path):
+    pytest.importorskip("pyarrow")
+    positions = pd.read_csv(positions_pth)
+    positions.loc[:19, ["lat", "lon"]] = (45.0, -70.0)  # no station near any row of the first chunk
+    parquet_pth = tmp_path / "positions.parquet"
+    positions.to_parquet(parquet_pth)
+    output_pth = tmp_path / "tagged.parquet"
+    summary = geocode_file(parquet_pth, output_pth, "septa", lat_col="lat", lon_col="lon", chunk_size=20)
+
+    tagged = pd.read_parquet(output_pth)
+    assert len(tagged) == 50 and summary.matched == tagged["stop_id"].notna().sum() > 0
+    assert tagged["stop_id"].iloc[:20].isna().all(), "Should leave the unmatched rows empty"
+    assert tagged["distance_miles"].dtype == np.float64
+
+
+def test_geocode_file_errors(positions_pth, tmp_path):
+    with pytest.raises(KeyError, match="latitude"):
+        geocode_file(positions_pth, tmp_path / "tagged.csv", "septa")
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        geocode_file(positions_pth, tmp_path / "tagged.json", "septa", lat_col="lat", lon_col="lon")
+    with pytest.raises(ValueError, match="chunk_size"):
+        geocode_file(positions_pth, tmp_path / "tagged.csv", "septa", chunk_size=0)
+
+
+def test_cli_geocode(positions_pth, tmp_path, capsys):
+    output_pth = tmp_path / "tagged.csv"
+    args = [
+        "geocode",
+        str(positions_pth),
+        str(output_pth),
+        "--network",
+        "septa",
+        "--lat-col",
+        "lat",
+        "--lon-col",
+        "lon",
+    ]
+    assert main(args) == 0
+    assert "geocoded 50 rows" in capsys.readouterr().out
+    assert output_pth.exists()
@@ -0,0 +1,94 @@
+import threading
+
+import geopandas as gpd
+import pytest
+
+from shapely import Point
+
+from trainchallenge.common.station_table import StationTable
+from trainchallenge.networks import Network
+from trainchallenge.networks import NetworkRegistry
+from trainchallenge.networks import registry
+
+
+def make_network(calls):
+    def loader(use_snapshot=False):
+        calls.append(use_snapshot)
+        return gpd.GeoDataFrame(
+            {"id": ["a", "b"], "name": ["Station A", "Station B"]},
+            geometry=[Point(-75.0, 40.0), Point(-75.1, 40.1)],
+            crs="EPSG:4326",
+        )
+
+    return Network(key="test", display_name="Test", loader=loader, id_col="id", name_col="name")
+
+
+def test_network_registry_loads_lazily_once():
+    calls = []
+    networks = NetworkRegistry()
+    networks.register(make_network(calls))
+    assert "test" in networks and list(networks) == ["test"]
+    assert not networks.is_loaded("test") and calls == [], "Registering should not load the network"
+
+    threads = [threading.Thread(target=networks.load, args=("test",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    loaded = networks.load("test")
+    assert calls == [True], "Should load once, from the snapshot"
+    assert isinstance(loaded.stations, StationTable), "Should only keep the compact station table"
+    assert loaded.stop_ids == ("a", "b")
+    assert loaded.station_names == ("Station A", "Station B")
+    assert loaded.stop_ids is loaded.stop_ids, "Should not copy the station ids on every access"
+    assert loaded.index.nearest(40.09, -75.1)[0] == 1
+
+
+def test_network_registry_unload():
+    calls = []
+    networks = NetworkRegistry()
+    networks.register(make_network(calls))
+    networks.load("test")
+    networks.unload("test")
+    assert not networks.is_loaded("test")
+    networks.load("test")
+    assert len(calls) == 2, "Should load again after unloading"
+
+
+def test_network_registry_multi_index():
+    calls = []
+    networks = NetworkRegistry()
+    networks.register(make_network(calls))
+    other = make_network([])
+    networks.register(Network(key="other", display_name="Other", loader=other.loader, id_col="id", name_col="name"))
+
+    index = networks.multi_index()
+    assert index.networks == ("test", "other")
+    assert networks.is_loaded("test") and networks.is_loaded("other"), "Should load the networks"
+    assert networks.multi_index() is index, "Should build the index once"
+    assert networks.multi_index(["other"]).networks == ("other",)
+    assert index.nearest_per_network(40.09, -75.1) == networks.multi_index(["test", "other"]).nearest_per_network(
+        40.09, -75.1
+    )
+
+    networks.unload("test")
+    assert networks.multi_index() is not index, "Should rebuild the index after unloading a network"
+    assert len(calls) == 2
+
+
+def test_network_registry_duplicate():
+    networks = NetworkRegistry()
+    networks.register(make_network([]))
+    with pytest.raises(ValueError, match=r"Network test is already registered\."):
+        networks.register(make_network([]))
+
+
+def test_network_registry_unknown():
+    with pytest.raises(KeyError, match=r"Unknown network: test\."):
+        NetworkRegistry().load("test")
+
+
+def test_default_registry():
+    assert list(registry) == ["septa", "dcmetro"]
+    dcmetro = registry.load("dcmetro")
+    assert len(dcmetro.index) == len(dcmetro.stations) > 0
@@ -0,0 +1,135 @@
+import asyncio
+
+from datetime import datetime
+from datetime import timedelta
+
+import geopandas as gpd
+import pytest
+
+from shapely import Point
+
+from trainchallenge.common.station_index import NearestStationIndex
+from trainchallenge.common.station_table import StationTable
+from trainchallenge.networks import LoadedNetwork
+from trainchallenge.networks import Network
+from trainchallenge.planner import plan_trip
+from trainchallenge.planner import plan_trip_async
+
+
+now = datetime(2024, 5, 6, 8, 0, 0)
+
+
+@pytest.fixture
+def network():
+    # "near" is ~0.35 miles north of the origin, "far" ~1.4 miles north
+    stations = gpd.GeoDataFrame(
+        {"id": ["near", "far"], "name": ["Near", "Far"]},
+        geometry=[Point(-75.0, 40.005), Point(-75.0, 40.02)],
+        crs="EPSG:4326",
+    )
+    declaration = Network(key="test", display_name="Test", loader=lambda **_: stations, id_col="id", name_col="name")
+    table = StationTable.from_geodataframe(stations, "id", "name")
+    return LoadedNetwork(declaration, table, NearestStationIndex(table.lats, table.lons))
+
+
+def plan(network, trains, **kwargs):
+    return plan_trip(
+        40.0, -75.0, network, lambda stop_id: trains.get(stop_id, []), lambda train: train["time"], now=now, **kwargs
+    )
+
+
+def test_plan_trip_next_train(network):
+    trains = {"near": [{"id": 1, "time": now + timedelta(minutes=20)}, {"id": 2, "time": now + timedelta(minutes=50)}]}
+    trip = plan(network, trains)
+    assert trip.station == 0 and trip.train["id"] == 1
+    assert trip.distance_miles == pytest.approx(0.345, abs=0.01)
+    assert trip.leave_time == trip.departure - timedelta(hours=trip.distance_miles / 2.0)
+
+
+def test_plan_trip_later_train(network):
+    # the walk takes ~10 minutes, so the first train can't be made
+    trains = {"near": [{"id": 1, "time": now + timedelta(minutes=5)}, {"id": 2, "time": now + timedelta(minutes=30)}]}
+    trip = plan(network, trains)
+    assert trip.station == 0 and trip.train["id"] == 2
+
+
+def test_plan_trip_farther_station(network):
+    # the walk to the far station takes ~41 minutes
+    trains = {
+        "near": [{"id": 1, "time": now + timedelta(minutes=5)}, {"id": 2, "time": now + timedelta(minutes=90)}],
+        "far": [{"id": 3, "time": now + timedelta(minutes=45)}],
+    }
+    trip = plan(network, trains)
+    assert trip.station == 1 and trip.train["id"] == 3
+
+    assert plan(network, trains, k=1).train["id"] == 2, "Should only consider the nearest station"
+
+
+def test_plan_trip_same_train_most_slack(network):
+    # the same departure time at both stations, the nearer one leaves more time to spare
+    trains = {
+        "near": [{"id": 1, "time": now + timedelta(minutes=60)}],
+        "far": [{"id": 1, "time": now + timedelta(minutes=60)}],
+    }
+    assert plan(network, trains).station == 0
+
+
+def test_plan_trip_none(network):
+    assert plan(network, {}) is None, "Should have no plan without trains"
+    trains = {
+        "near": [{"id": 1, "time": now + timedelta(minutes=5)}],
+        "far": [{"id": 2, "time": now - timedelta(minutes=1)}],
+    }
+    assert plan(network, trains) is None, "Should have no plan when no train can be made"
+    assert plan(network, trains, max_miles=0.1) is None, "Should have no plan without a station in range"
+
+
+def test_plan_trip_station_fails(network):
+    trains = {"far": [{"id": 3, "time": now + timedelta(minutes=45)}]}
+
+    def get_trains(stop_id):
+        if stop_id == "near":
+            raise RuntimeError("API request failed")
+        return trains[stop_id]
+
+    trip = plan_trip(40.0, -75.0, network, get_trains, lambda train: train["time"], now=now)
+    assert trip.station == 1 and trip.train["id"] == 3, "Should skip the station that failed"
+
+    def get_no_trains(stop_id):
+        raise RuntimeError(f"API request failed for {stop_id}")
+
+    with pytest.raises(RuntimeError, match="API request failed for near"):
+        plan_trip(40.0, -75.0, network, get_no_trains, lambda train: train["time"], now=now)
+
+
+def test_plan_trip_async(network):
+    trains = {
+        "near": [{"id": 1, "time": now + timedelta(minutes=5)}, {"id": 2, "time": now + timedelta(minutes=90)}],
+        "far": [{"id": 3, "time": now + timedelta(minutes=45)}],
+    }
+
+    async def get_trains(stop_id):
+        await asyncio.sleep(0)
+        return trains.get(stop_id, [])
+
+    trip = asyncio.run(plan_trip_async(40.0, -75.0, network, get_trains, lambda train: train["time"], now=now))
+    assert trip == plan(network, trains), "Should plan the same trip as plan_trip"
+
+
+def test_plan_trip_async_station_fails(network):
+    trains = {"far": [{"id": 3, "time": now + timedelta(minutes=45)}]}
+
+    async def get_trains(stop_id):
+        await asyncio.sleep(0)
+        if stop_id == "near":
+            raise RuntimeError("Circuit breaker is open")
+        return trains[stop_id]
+
+    trip = asyncio.run(plan_trip_async(40.0, -75.0, network, get_trains, lambda train: train["time"], now=now))
+    assert trip.station == 1 and trip.train["id"] == 3, "Should skip the station that failed"
+
+    async def get_no_trains(stop_id):
+        raise RuntimeError(f"API request failed for {stop_id}")
+
+    with pytest.raises(RuntimeError, match="API request failed for near"):
+        asyncio.run(plan_trip_async(40.0, -75.0, network, get_no_trains, lambda train: train["time"], now=now))
@@ -0,0 +1,63 @@
+import geopandas as gpd
+import pytest
+
+from shapely import Point
+
+from trainchallenge.cli import main
+from trainchallenge.networks import Network
+from trainchallenge.networks import NetworkRegistry
+from trainchallenge.profiling import parse_importtime
+from trainchallenge.profiling import profile_dataset_loads
+from trainchallenge.profiling import profile_imports
+
+
+importtime_output = [
+    "import time: self [us] | cumulative | imported package",
+    "import time:       120 |        120 |   trainchallenge.telemetry",
+    "import time:       500 |        620 | trainchallenge",
+    "unrelated warning",
+]
+
+
+def make_registry():
+    def loader(use_snapshot=False):
+        return gpd.GeoDataFrame({"id": ["a"], "name": ["A"]}, geometry=[Point(-75.0, 40.0)], crs="EPSG:4326")
+
+    networks = NetworkRegistry()
+    networks.register(Network(key="test", display_name="Test", loader=loader, id_col="id", name_col="name"))
+    return networks
+
+
+def test_parse_importtime():
+    timings = parse_importtime(importtime_output)
+    assert [(t.module, t.depth) for t in timings] == [("trainchallenge.telemetry", 1), ("trainchallenge", 0)]
+    assert timings[1].self_seconds == pytest.approx(500e-6)
+    assert timings[1].cumulative_seconds == pytest.approx(620e-6)
+
+
+def test_import_is_lazy():
+    imported = {t.module for t in profile_imports(["trainchallenge"])}
+    assert "trainchallenge.networks" in imported
+    for heavy in ("geopandas", "pandas", "lxml", "requests"):
+        assert heavy not in imported, f"Should only import {heavy} when first used"
+
+
+def test_profile_imports_failure():
+    with pytest.raises(RuntimeError, match="ModuleNotFoundError"):
+        profile_imports(["trainchallenge_missing_module"])
+
+
+def test_profile_dataset_loads():
+    networks = make_registry()
+    first = networks.load("test")
+    (timing,) = profile_dataset_loads(registry=networks)
+    assert timing.network == "test" and timing.stations == 1
+    assert timing.load_seconds > 0 and timing.grid_seconds > 0 and timing.features_seconds > 0
+    assert networks.load("test") is not first, "Should measure a fresh load"
+
+
+def test_cli_profile_startup(tmp_path, capsys):
+    report_pth = tmp_path / "report.json"
+    assert main(["profile-startup", "--module", "json", "--network", "dcmetro", "--output", str(report_pth)]) == 0
+    assert "dcmetro" in capsys.readouterr().out
+    assert '"import_seconds"' in report_pth.read_text()
@@ -0,0 +1,120 @@
+import geopandas as gpd
+import pytest
+
+from shapely import Point
+
+from trainchallenge import telemetry
+from trainchallenge.networks import Network
+from trainchallenge.networks import NetworkRegistry
+
+
+sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+sdk_metrics = pytest.importorskip("opentelemetry.sdk.metrics")
+
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+
+
+@pytest.fixture
+def otel():
+    exporter = InMemorySpanExporter()
+    tracer_provider = sdk_trace.TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    reader = InMemoryMetricReader()
+    telemetry.configure(tracer_provider, sdk_metrics.MeterProvider(metric_readers=[reader]))
+    yield exporter, reader
+    telemetry.configure()
+
+
+def get_durations(reader: InMemoryMetricReader) -> dict[str, int]:
+    """Get the number of recorded durations of each stage."""
+    counts = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                if metric.name == telemetry.STAGE_DURATION_METRIC:
+                    for point in metric.data.data_points:
+                        counts[point.attributes["stage"]] = counts.get(point.attributes["stage"], 0) + point.count
+    return counts
+
+
+def test_stage_disabled():
+    assert not telemetry.is_enabled(), "Should be disabled without a configured provider"
+    with telemetry.stage("parse_input") as stage:
+        stage.set_attribute("ignored", 1)
+
+
+def test_stage_default_providers():
+    from opentelemetry import metrics
+    from opentelemetry import trace
+
+    telemetry.configure(trace.NoOpTracerProvider(), metrics.NoOpMeterProvider())
+    try:
+        assert not telemetry.is_enabled(), "Should be disabled with the no-op providers of the API"
+    finally:
+        telemetry.configure()
+    assert not telemetry._is_tracing(trace.ProxyTracerProvider()), "Should ignore the API proxy tracer provider"
+    assert not telemetry._is_metering(metrics.get_meter_provider(), tracing=False), (
+        "Should ignore the global meter provider without tracing"
+    )
+
+
+def test_stage_meter_provider_only():
+    reader = InMemoryMetricReader()
+    telemetry.configure(meter_provider=sdk_metrics.MeterProvider(metric_readers=[reader]))
+    try:
+        with telemetry.stage("parse_input"):
+            pass
+    finally:
+        telemetry.configure()
+    assert get_durations(reader) == {"parse_input": 1}, "Should record durations with only a meter provider"
+
+
+def test_stage_spans_and_durations(otel):
+    exporter, reader = otel
+    assert telemetry.is_enabled()
+
+    with telemetry.stage("request"), telemetry.stage("nearest_lookup", {"network": "septa"}) as lookup:
+        lookup.set_attribute("station", 3)
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert set(spans) == {"request", "nearest_lookup"}
+    assert spans["nearest_lookup"].parent.span_id == spans["request"].context.span_id, "Should nest the stages"
+    assert spans["nearest_lookup"].attributes == {"network": "septa", "station": 3}
+    assert get_durations(reader) == {"request": 1, "nearest_lookup": 1}
+
+
+def test_stage_records_exceptions(otel):
+    exporter, reader = otel
+    with pytest.raises(ValueError, match="bad input"), telemetry.stage("parse_input"):
+        raise ValueError("bad input")
+
+    (span,) = exporter.get_finished_spans()
+    assert not span.status.is_ok
+    assert span.events[0].name == "exception"
+    assert get_durations(reader) == {"parse_input": 1}, "Should record the duration of failed stages"
+
+
+def test_stage_trace_context_parent(otel):
+    exporter, _ = otel
+    trace_id = "0af7651916cd43dd8448eb211c80319c"
+    with telemetry.stage("request", carrier={"traceparent": f"00-{trace_id}-b7ad6b7169203331-01"}):
+        pass
+
+    (span,) = exporter.get_finished_spans()
+    assert format(span.context.trace_id, "032x") == trace_id, "Should continue the trace of the carrier"
+
+
+def test_network_load_durations(otel):
+    _, reader = otel
+
+    def loader(use_snapshot=False):
+        return gpd.GeoDataFrame({"id": ["a"], "name": ["A"]}, geometry=[Point(-75.0, 40.0)], crs="EPSG:4326")
+
+    networks = NetworkRegistry()
+    networks.register(Network(key="test", display_name="Test", loader=loader, id_col="id", name_col="name"))
+    loaded = networks.load("test")
+    loaded.grid  # noqa: B018
+    loaded.features  # noqa: B018
+    assert get_durations(reader) == {"load_network": 1, "load_grid": 1, "encode_features": 1}
@@ -1,6 +1,12 @@
 from trainchallenge import common
 from trainchallenge import dcmetro
+from trainchallenge import geocode
+from trainchallenge import gtfs
+from trainchallenge import networks
+from trainchallenge import planner
+from trainchallenge import profiling
 from trainchallenge import septa
+from trainchallenge import telemetry
 
 
-__all__ = ["common", "dcmetro", "septa"]
+__all__ = ["common", "dcmetro", "geocode", "gtfs", "networks", "planner", "profiling", "septa", "telemetry"]
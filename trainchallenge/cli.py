@@ -0,0 +1,195 @@
+import argparse
+import json
+
+from pathlib import Path
+
+from trainchallenge.geocode import DEFAULT_CHUNK_SIZE
+from trainchallenge.geocode import geocode_file
+from trainchallenge.networks import registry
+from trainchallenge.profiling import startup_report
+
+
+# the networks of the registry that can be compiled into snapshots
+snapshot_builders = {
+    network.key: network.snapshot_builder
+    for network in map(registry.get, registry)
+    if network.snapshot_builder is not None
+}
+
+
+def build_snapshots(args: argparse.Namespace) -> int:
+    """
+    Compile the station data of each requested network into a snapshot.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The process exit code.
+    """
+
+    networks = args.network or list(snapshot_builders)
+    for network in networks:
+        snapshot_pth = None
+        if args.output_dir is not None:
+            args.output_dir.mkdir(parents=True, exist_ok=True)
+            snapshot_pth = args.output_dir / f"{network}.tcsnap"
+        written_pth = snapshot_builders[network](snapshot_pth=snapshot_pth)
+        print(f"{network}: wrote {written_pth}")
+
+    return 0
+
+
+def profile_startup(args: argparse.Namespace) -> int:
+    """
+    Profile a cold start, printing a summary and optionally writing the full report.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The process exit code.
+    """
+
+    report = startup_report(args.module or ["trainchallenge"], args.path or [], args.network)
+
+    print(f"imports: {report['import_seconds'] * 1000:.1f} ms, slowest modules by self time:")
+    for timing in report["imports"][: args.top]:
+        print(f"  {timing['self_seconds'] * 1000:8.1f} ms  {timing['module']}")
+    print(f"dataset loads: {report['load_seconds'] * 1000:.1f} ms")
+    for timing in report["datasets"]:
+        imported = f", importing {', '.join(timing['imported'])}" if timing["imported"] else ""
+        print(
+            f"  {timing['network']}: {timing['stations']} stations, load {timing['load_seconds'] * 1000:.1f} ms, "
+            f"grid {timing['grid_seconds'] * 1000:.1f} ms, features {timing['features_seconds'] * 1000:.1f} ms"
+            f"{imported}"
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"wrote {args.output}")
+
+    return 0
+
+
+def geocode(args: argparse.Namespace) -> int:
+    """
+    Tag the positions of a file with their nearest station.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The process exit code.
+    """
+
+    summary = geocode_file(
+        args.input,
+        args.output,
+        args.network,
+        lat_col=args.lat_col,
+        lon_col=args.lon_col,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        prefix=args.prefix,
+    )
+    print(
+        f"{args.network}: geocoded {summary.rows} rows in {summary.chunks} chunks, "
+        f"{summary.matched} with a station in range, wrote {args.output}"
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the trainchallenge command line interface.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The command line arguments. If None, `sys.argv` is used.
+        Defaults to None.
+
+    Returns
+    -------
+    int
+        The process exit code.
+    """
+
+    parser = argparse.ArgumentParser(prog="trainchallenge")
+    subparsers = parser.add_subparsers(required=True)
+
+    snapshot_parser = subparsers.add_parser(
+        "build-snapshots", help="Compile the station data into snapshots for fast loading."
+    )
+    snapshot_parser.add_argument(
+        "--network",
+        action="append",
+        choices=list(snapshot_builders),
+        help="Network to compile, can be given multiple times. Defaults to all networks.",
+    )
+    snapshot_parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Directory to write the snapshots to. Defaults to next to the raw data, where the loaders look for them.",
+    )
+    snapshot_parser.set_defaults(func=build_snapshots)
+
+    profile_parser = subparsers.add_parser(
+        "profile-startup", help="Measure the import cost of each module and the load time of each dataset."
+    )
+    profile_parser.add_argument(
+        "--module",
+        action="append",
+        help="Module imported on startup, can be given multiple times. Defaults to trainchallenge.",
+    )
+    profile_parser.add_argument(
+        "--path",
+        action="append",
+        type=Path,
+        help="Directory to import the modules from, e.g. function-app, can be given multiple times.",
+    )
+    profile_parser.add_argument(
+        "--network",
+        action="append",
+        choices=list(registry),
+        help="Network to load, can be given multiple times. Defaults to all networks.",
+    )
+    profile_parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to print.")
+    profile_parser.add_argument("--output", type=Path, help="File to write the full report to, as JSON.")
+    profile_parser.set_defaults(func=profile_startup)
+
+    geocode_parser = subparsers.add_parser(
+        "geocode", help="Tag a CSV or Parquet file of positions with the nearest station and distance."
+    )
+    geocode_parser.add_argument("input", type=Path, help="The CSV or Parquet file of positions.")
+    geocode_parser.add_argument("output", type=Path, help="The CSV or Parquet file to write.")
+    geocode_parser.add_argument("--network", required=True, choices=list(registry), help="Network to search.")
+    geocode_parser.add_argument("--lat-col", default="latitude", help="The latitude column. Defaults to latitude.")
+    geocode_parser.add_argument("--lon-col", default="longitude", help="The longitude column. Defaults to longitude.")
+    geocode_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Number of rows processed at once, bounds the memory used. Defaults to {DEFAULT_CHUNK_SIZE}.",
+    )
+    geocode_parser.add_argument(
+        "--workers", type=int, default=0, help="Number of worker processes. Defaults to 0, for no worker processes."
+    )
+    geocode_parser.add_argument("--prefix", default="", help="Prefix of the added columns, e.g. septa_.")
+    geocode_parser.set_defaults(func=geocode)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
@@ -1,24 +1,130 @@
 import math
 
-from geopandas import GeoSeries
+from typing import TYPE_CHECKING
+from typing import Literal
+from typing import overload
+
+import numpy as np
+import shapely
+
+from numpy.typing import ArrayLike
 from shapely.geometry import Point
 
+from trainchallenge.common import features
+from trainchallenge.common import snapshot
+from trainchallenge.common.cell_cache import NearestCellCache
+from trainchallenge.common.features import StationFeatures
+from trainchallenge.common.geodesy import gps_distance_matrix
+from trainchallenge.common.geodesy import gps_to_miles_array
+from trainchallenge.common.geodesy import miles_bounds
+from trainchallenge.common.geodesy import miles_box
+from trainchallenge.common.network_index import MultiNetworkIndex
+from trainchallenge.common.station_grid import StationGrid
+from trainchallenge.common.station_index import NearestStationIndex
+from trainchallenge.common.station_table import StationTable
+
+
+__all__ = [
+    "MAX_DISTANCE_MILES",
+    "MultiNetworkIndex",
+    "NearestCellCache",
+    "NearestStationIndex",
+    "StationFeatures",
+    "StationGrid",
+    "StationTable",
+    "features",
+    "get_k_nearest_points",
+    "get_nearest_point",
+    "get_nearest_points",
+    "get_next_after_match",
+    "get_points_within",
+    "gps_distance_matrix",
+    "gps_to_miles",
+    "gps_to_miles_array",
+    "snapshot",
+]
+
+
+if TYPE_CHECKING:
+    from geopandas import GeoSeries
+
+# a realistic max for walking distance
+MAX_DISTANCE_MILES = 10.0
+
+
+def _nearest_within(
+    lats: np.ndarray, lons: np.ndarray, pts: "GeoSeries", max_miles: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the great-circle nearest point within a distance for each coordinate.
+
+    The spatial index is only used to find the candidates inside the bounding box
+    of each search circle, the nearest candidate is then picked by haversine
+    distance, so each lookup stays O(log n) in the number of points.
+    """
+
+    nearest = np.full(len(lats), -1, dtype=np.intp)
+    miles = np.full(len(lats), np.nan)
+    if len(lats) == 0:
+        return nearest, miles
+
+    # find the candidates inside the bounding boxes of the search circles
+    min_lons, min_lats, max_lons, max_lats = miles_bounds(lats, lons, max_miles)
+    boxes = shapely.box(min_lons, min_lats, max_lons, max_lats)
+    input_idx, tree_idx = pts.sindex.query(boxes)
+
+    # the boxes also contain some points beyond the search radius
+    cand_coords = shapely.get_coordinates(np.asarray(pts.values)[tree_idx])
+    cand_miles = gps_to_miles_array(lats[input_idx], lons[input_idx], cand_coords[:, 1], cand_coords[:, 0])
+    in_range = cand_miles <= max_miles
+    input_idx, tree_idx, cand_miles = input_idx[in_range], tree_idx[in_range], cand_miles[in_range]
+
+    # keep the closest candidate per coordinate, the lowest index when distances are equal
+    order = np.lexsort((tree_idx, cand_miles, input_idx))
+    first = order[np.unique(input_idx[order], return_index=True)[1]]
+    nearest[input_idx[first]] = tree_idx[first]
+    miles[input_idx[first]] = cand_miles[first]
+
+    return nearest, miles
+
 
-def get_nearest_point(p: Point, pts: GeoSeries):
+@overload
+def get_nearest_point(
+    p: Point, pts: "GeoSeries", max_miles: float = ..., return_distance: Literal[False] = ...
+) -> int | None: ...
+
+
+@overload
+def get_nearest_point(
+    p: Point, pts: "GeoSeries", max_miles: float = ..., *, return_distance: Literal[True]
+) -> tuple[int, float] | None: ...
+
+
+def get_nearest_point(p: Point, pts: "GeoSeries", max_miles: float = MAX_DISTANCE_MILES, return_distance: bool = False):
     """
     Get the index of the nearest point in a GeoSeries to a given point.
 
+    Points are compared by great-circle distance, with coordinates in longitude,
+    latitude order.
+
     Parameters
     ----------
     p : Point
         The point for which the nearest point in the GeoSeries is to be found.
     pts : GeoSeries
         A GeoSeries containing points to search for the nearest point.
+    max_miles : float, optional
+        Points further away than this many miles are not considered.
+        Defaults to 10 miles, a realistic max for walking distance.
+    return_distance : bool, optional
+        Whether to also return the distance in miles to the nearest point.
+        Defaults to False.
 
     Returns
     -------
-    int
-        The index of the nearest point in the GeoSeries.
+    int or tuple of (int, float)
+        The index of the nearest point in the GeoSeries, and its distance in miles
+        if `return_distance` is True. None if there is no point within `max_miles`.
     """
 
     # Check if the GeoSeries is empty
@@ -31,14 +137,184 @@ def get_nearest_point(p: Point, pts: GeoSeries):
     if not p.is_valid:
         raise ValueError("Point is not a valid geometry. Cannot find nearest point.")
 
-    # 0.189609 is approximately 10 miles, a realistic max for walking distance
-    idx = pts.sindex.nearest(p, max_distance=0.189609)
+    # find the candidates inside the bounding box of the search circle, sorted so
+    # that the first point wins when distances are equal
+    lat, lon = p.y, p.x
+    cand_idx = np.sort(pts.sindex.query(shapely.box(*miles_box(lat, lon, max_miles))))
 
     # if there is no result, return None
-    if len(idx[1]) == 0:
+    if len(cand_idx) == 0:
+        return None
+
+    # pick the closest candidate by great-circle distance
+    cand_coords = shapely.get_coordinates(np.asarray(pts.values)[cand_idx])
+    cand_miles = gps_to_miles_array(lat, lon, cand_coords[:, 1], cand_coords[:, 0])
+    nearest = int(np.argmin(cand_miles))
+    miles = float(cand_miles[nearest])
+
+    # the box also contains some points beyond the search radius
+    if miles > max_miles:
         return None
     # otherwise return the index value
-    return idx[1][0]
+    if return_distance:
+        return int(cand_idx[nearest]), miles
+    return int(cand_idx[nearest])
+
+
+@overload
+def get_nearest_points(
+    lats: ArrayLike, lons: ArrayLike, pts: "GeoSeries", max_miles: float = ..., return_distance: Literal[False] = ...
+) -> np.ndarray: ...
+
+
+@overload
+def get_nearest_points(
+    lats: ArrayLike, lons: ArrayLike, pts: "GeoSeries", max_miles: float = ..., *, return_distance: Literal[True]
+) -> tuple[np.ndarray, np.ndarray]: ...
+
+
+def get_nearest_points(
+    lats: ArrayLike,
+    lons: ArrayLike,
+    pts: "GeoSeries",
+    max_miles: float = MAX_DISTANCE_MILES,
+    return_distance: bool = False,
+):
+    """
+    Get the index of the nearest point in a GeoSeries for each of many coordinates.
+
+    All coordinates are resolved with a single bulk query against the spatial index,
+    so this is much faster than calling `get_nearest_point` in a loop.
+
+    Parameters
+    ----------
+    lats : array_like of float
+        Latitudes of the points for which the nearest points are to be found.
+    lons : array_like of float
+        Longitudes of the points for which the nearest points are to be found.
+    pts : GeoSeries
+        A GeoSeries containing points to search for the nearest points.
+    max_miles : float, optional
+        Points further away than this many miles are not considered.
+        Defaults to 10 miles, a realistic max for walking distance.
+    return_distance : bool, optional
+        Whether to also return the distances in miles to the nearest points.
+        Defaults to False.
+
+    Returns
+    -------
+    numpy.ndarray or tuple of numpy.ndarray
+        An integer array with the same length as `lats`, holding the index of the
+        nearest point in the GeoSeries for each coordinate, or -1 where there is
+        no point within `max_miles`. If `return_distance` is True, also a float
+        array of the distances in miles, NaN where there is no point.
+
+    Raises
+    ------
+    IndexError
+        If the GeoSeries is empty.
+    ValueError
+        If the latitudes and longitudes are not 1-D arrays of the same length, or
+        contain values that are not finite.
+    """
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    # Check if the GeoSeries is empty
+    if pts.empty:
+        raise IndexError("GeoSeries is empty. Cannot find nearest point.")
+    # Check that the coordinates line up and are usable
+    if lats.ndim != 1 or lats.shape != lons.shape:
+        raise ValueError("Latitudes and longitudes must be 1-D arrays of the same length.")
+    if not (np.isfinite(lats).all() and np.isfinite(lons).all()):
+        raise ValueError("Latitudes and longitudes must be finite. Cannot find nearest point.")
+
+    nearest, miles = _nearest_within(lats, lons, pts, max_miles)
+
+    if return_distance:
+        return nearest, miles
+    return nearest
+
+
+def get_points_within(p: Point, pts: "GeoSeries", radius_miles: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get all points in a GeoSeries within a distance of a given point, nearest first.
+
+    Parameters
+    ----------
+    p : Point
+        The point to search around, in longitude, latitude order.
+    pts : GeoSeries
+        A GeoSeries containing points to search.
+    radius_miles : float
+        The search radius in miles.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The indexes of the points within the radius and their great-circle
+        distances in miles, sorted by distance and then by index.
+    """
+
+    # Check if the GeoSeries is empty
+    if pts.empty:
+        raise IndexError("GeoSeries is empty. Cannot find nearest point.")
+    # Check if the point is empty
+    if p.is_empty:
+        raise ValueError("Point is empty. Cannot find nearest point.")
+    # Check if the point is a valid geometry
+    if not p.is_valid:
+        raise ValueError("Point is not a valid geometry. Cannot find nearest point.")
+
+    lat, lon = p.y, p.x
+    cand_idx = pts.sindex.query(shapely.box(*miles_box(lat, lon, radius_miles)))
+    cand_coords = shapely.get_coordinates(np.asarray(pts.values)[cand_idx])
+    cand_miles = gps_to_miles_array(lat, lon, cand_coords[:, 1], cand_coords[:, 0])
+
+    # the box also contains some points beyond the search radius
+    in_range = cand_miles <= radius_miles
+    cand_idx, cand_miles = cand_idx[in_range], cand_miles[in_range]
+
+    order = np.lexsort((cand_idx, cand_miles))
+    return cand_idx[order], cand_miles[order]
+
+
+def get_k_nearest_points(
+    p: Point, pts: "GeoSeries", k: int, max_miles: float = MAX_DISTANCE_MILES
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the k nearest points in a GeoSeries to a given point, nearest first.
+
+    Parameters
+    ----------
+    p : Point
+        The point to search around, in longitude, latitude order.
+    pts : GeoSeries
+        A GeoSeries containing points to search.
+    k : int
+        The maximum number of points to return.
+    max_miles : float, optional
+        Points further away than this many miles are not considered.
+        Defaults to 10 miles, a realistic max for walking distance.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The indexes of up to `k` nearest points and their great-circle distances
+        in miles, sorted by distance and then by index.
+
+    Raises
+    ------
+    ValueError
+        If k is less than 1.
+    """
+
+    if k < 1:
+        raise ValueError(f"Invalid k: {k}. Must be at least 1.")
+
+    idx, miles = get_points_within(p, pts, max_miles)
+    return idx[:k], miles[:k]
 
 
 def get_next_after_match(arr: list[str], target: str):
@@ -65,13 +341,14 @@ def get_next_after_match(arr: list[str], target: str):
         If the target is the last element in the array.
     """
 
-    if target not in arr:
-        raise ValueError(f"Target {target} not found in the array.")
-    if arr.index(target) == len(arr) - 1:
+    # a single scan for the target, instead of a membership test and repeated index calls
+    try:
+        target_idx = arr.index(target)
+    except ValueError:
+        raise ValueError(f"Target {target} not found in the array.") from None
+    if target_idx == len(arr) - 1:
         raise ValueError(f"Target {target} is the last element in the array.")
-    if arr.index(target) == len(arr) - 2:
-        return arr[-1]
-    return arr[arr.index(target) + 1]
+    return arr[target_idx + 1]
 
 
 def gps_to_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
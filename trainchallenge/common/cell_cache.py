@@ -0,0 +1,205 @@
+import math
+import threading
+import time
+
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic
+from typing import TypeVar
+
+import numpy as np
+
+from trainchallenge.common.geodesy import gps_to_miles_array
+from trainchallenge.common.station_index import NearestStationIndex
+
+
+T = TypeVar("T")
+
+# Cells that can't be cached, kept so their exact lookups skip the cell check
+_UNCACHEABLE = object()
+
+
+class NearestCellCache(Generic[T]):
+    """
+    LRU cache of nearest station lookups, keyed by a grid cell of the location.
+
+    The locations are snapped to a grid of `10 ** -precision` degrees, and a value
+    rendered from the nearest station, such as a serialized response, is cached per
+    cell. A cell is only cached when the same station is the nearest one for every
+    point in it, which is checked once per cell with the triangle inequality: the
+    nearest station to the cell center must be closer, by more than the cell's
+    diameter, than the second nearest one. Cells that could straddle the boundary
+    between two stations, or the edge of the search radius, fall through to an
+    exact lookup, so a cached result is always the exact result. The cells are
+    checked with the index, while the exact lookups can go through another engine,
+    such as a `StationGrid` over the same stations.
+
+    Parameters
+    ----------
+    index : NearestStationIndex
+        The index to look up the nearest stations in.
+    precision : int, optional
+        The number of decimal digits of the cell size in degrees. 3 is cells of
+        about 110 meters.
+        Defaults to 3.
+    max_size : int, optional
+        The maximum number of cells kept, the least recently used are dropped first.
+        Defaults to 4096.
+    ttl : float, optional
+        Cells are recomputed after this many seconds.
+        Defaults to 300 seconds.
+    nearest : callable, optional
+        Looks up the position of the nearest station to a latitude and longitude,
+        or None if there is none within the `max_miles` of the index, for the
+        locations in cells that can't be cached.
+        Defaults to None, for the `nearest` lookup of the index.
+
+    Raises
+    ------
+    ValueError
+        If max_size is less than 1 or ttl is not positive.
+    """
+
+    def __init__(
+        self,
+        index: NearestStationIndex,
+        precision: int = 3,
+        max_size: int = 4096,
+        ttl: float = 300.0,
+        nearest: Callable[[float, float], int | None] | None = None,
+    ):
+        if max_size < 1:
+            raise ValueError(f"Invalid max_size: {max_size}. Must be at least 1.")
+        if ttl <= 0:
+            raise ValueError(f"Invalid ttl: {ttl}. Must be positive.")
+
+        self.index = index
+        self.precision = precision
+        self.max_size = max_size
+        self.ttl = ttl
+        self.nearest = nearest if nearest is not None else self._index_nearest
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+        self._cell_size = 10.0**-precision
+        self._lock = threading.Lock()
+        self._cells: OrderedDict[tuple[int, int], tuple[float, object, object]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def _index_nearest(self, lat: float, lon: float) -> int | None:
+        """Look up the nearest station to a location in the index."""
+        nearest = self.index.nearest(lat, lon)
+        return None if nearest is None else nearest[0]
+
+    def cell(self, lat: float, lon: float) -> tuple[int, int]:
+        """Get the grid cell of a location."""
+        return math.floor(lat / self._cell_size), math.floor(lon / self._cell_size)
+
+    def _cell_station(self, cell: tuple[int, int]) -> object:
+        """Get the station nearest to every point of a cell, None if none is in range, or `_UNCACHEABLE`."""
+
+        size = self._cell_size
+        south, west = cell[0] * size, cell[1] * size
+        center_lat, center_lon = south + size / 2, west + size / 2
+        # the farthest point of a small cell from its center is one of its corners
+        radius = float(
+            gps_to_miles_array(
+                center_lat,
+                center_lon,
+                np.array([south, south, south + size, south + size]),
+                np.array([west, west + size] * 2),
+            ).max()
+        )
+        # pad against rounding in the distances
+        radius = radius * (1 + 1e-6) + 1e-9
+
+        max_miles = self.index.max_miles
+        station_idx, station_miles = self.index.k_nearest(center_lat, center_lon, 2, max_miles=max_miles + radius)
+        if len(station_idx) == 0:
+            # every point of the cell is out of range of every station
+            return None
+        if station_miles[0] + radius > max_miles:
+            # part of the cell may be out of range of the nearest station
+            return _UNCACHEABLE
+        if len(station_idx) == 2 and station_miles[1] - station_miles[0] <= 2 * radius:
+            # another station may be nearer for part of the cell
+            return _UNCACHEABLE
+        return int(station_idx[0])
+
+    def get(self, lat: float, lon: float, render: Callable[[int | None], T]) -> tuple[int | None, T]:
+        """
+        Get the nearest station to a location and the value rendered from it.
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the location.
+        lon : float
+            Longitude of the location.
+        render : callable
+            Renders the value to cache from the position of the nearest station, or
+            None if there is no station within the `max_miles` of the index.
+
+        Returns
+        -------
+        tuple of (int or None, Any)
+            The position of the nearest station, or None if there is no station
+            within `max_miles`, and the rendered value.
+
+        Raises
+        ------
+        IndexError
+            If the index has no stations.
+        ValueError
+            If the latitude or longitude is not finite.
+        """
+
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            raise ValueError("Latitude and longitude must be finite. Cannot find nearest point.")
+
+        cell = self.cell(lat, lon)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cells.get(cell)
+            if entry is not None and entry[0] <= now:
+                del self._cells[cell]
+                entry = None
+            if entry is not None:
+                self._cells.move_to_end(cell)
+                if entry[1] is not _UNCACHEABLE:
+                    self.hits += 1
+
+        if entry is None:
+            station = self._cell_station(cell)
+            value = None if station is _UNCACHEABLE else render(station)  # type: ignore[arg-type]
+            with self._lock:
+                if station is not _UNCACHEABLE:
+                    self.misses += 1
+                self._cells[cell] = (now + self.ttl, station, value)
+                self._cells.move_to_end(cell)
+                while len(self._cells) > self.max_size:
+                    self._cells.popitem(last=False)
+        else:
+            _, station, value = entry
+
+        if station is _UNCACHEABLE:
+            # the cell straddles a boundary, look the location up exactly
+            with self._lock:
+                self.uncacheable += 1
+            station = self.nearest(lat, lon)
+            return station, render(station)
+
+        return station, value  # type: ignore[return-value]
+
+    def stats(self) -> dict[str, int]:
+        """Get the hit, miss and uncacheable counters, and the number of cached cells."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "uncacheable": self.uncacheable, "size": len(self._cells)}
+
+    def clear(self) -> None:
+        """Drop every cached cell, keeping the counters."""
+        with self._lock:
+            self._cells.clear()
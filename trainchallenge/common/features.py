@@ -0,0 +1,131 @@
+import json
+
+from collections.abc import Iterable
+from collections.abc import Sequence
+from typing import Any
+
+import geojson
+import numpy as np
+import shapely
+
+
+def encode_properties(properties: dict[str, Any]) -> str:
+    """
+    Encode properties as the members of a JSON object, without the braces.
+
+    Parameters
+    ----------
+    properties : dict of str to Any
+        The properties, with JSON serializable values.
+
+    Returns
+    -------
+    str
+        The encoded members, each preceded by a comma, or an empty string if there
+        are no properties.
+    """
+    return "".join(
+        f", {json.dumps(key)}: {json.dumps(value, ensure_ascii=False, allow_nan=False)}"
+        for key, value in properties.items()
+    )
+
+
+def feature_collection(features: Iterable[str]) -> str:
+    """
+    Join encoded GeoJSON features into a FeatureCollection.
+
+    Parameters
+    ----------
+    features : iterable of str
+        The encoded features.
+
+    Returns
+    -------
+    str
+        The encoded FeatureCollection, as `geojson.dumps` would write it.
+    """
+    return '{"type": "FeatureCollection", "features": [' + ", ".join(features) + "]}"
+
+
+def empty_feature(properties: dict[str, Any]) -> str:
+    """
+    Encode a GeoJSON feature without a geometry.
+
+    Parameters
+    ----------
+    properties : dict of str to Any
+        The properties of the feature.
+
+    Returns
+    -------
+    str
+        The encoded feature, as `geojson.dumps` would write it.
+    """
+    return geojson.dumps(geojson.Feature(geometry=None, properties=properties))
+
+
+class StationFeatures:
+    """
+    Pre-encoded GeoJSON features of the stations of a network.
+
+    The geometry, id and name of every station are encoded once, so a response only
+    has to encode its request specific properties, such as the directions link,
+    and splice them in. The output is exactly what `geojson.dumps` writes for the
+    same `geojson.Feature`, without building any geojson or shapely objects per
+    request.
+
+    Parameters
+    ----------
+    geometries : sequence or numpy.ndarray of shapely.Point
+        The station points.
+    stop_ids : sequence
+        The station ids, written as the `stop_id` property.
+    station_names : sequence
+        The station names, written as the `station_name` property.
+
+    Raises
+    ------
+    ValueError
+        If the geometries, ids and names are not the same length.
+    """
+
+    __slots__ = ("_heads", "lats", "lons")
+
+    def __init__(self, geometries: Sequence[Any] | np.ndarray, stop_ids: Sequence[Any], station_names: Sequence[Any]):
+        if not len(geometries) == len(stop_ids) == len(station_names):
+            raise ValueError("Geometries, stop ids and station names must be the same length.")
+
+        # encode each station with geojson itself, and drop the closing braces of the
+        # properties and the feature so more properties can be appended
+        self._heads = [
+            geojson.dumps(geojson.Feature(geometry=geom, properties={"stop_id": stop_id, "station_name": name}))[:-2]
+            for geom, stop_id, name in zip(geometries, stop_ids, station_names, strict=True)
+        ]
+        coords = shapely.get_coordinates(np.asarray(geometries, dtype=object))
+        self.lats: list[float] = coords[:, 1].tolist()
+        self.lons: list[float] = coords[:, 0].tolist()
+
+    def __len__(self) -> int:
+        return len(self._heads)
+
+    def feature(self, station: int, properties: dict[str, Any] | None = None) -> str:
+        """
+        Encode the feature of a station.
+
+        Parameters
+        ----------
+        station : int
+            The position of the station.
+        properties : dict of str to Any, optional
+            Properties written after the `stop_id` and `station_name` of the station,
+            in order.
+            Defaults to None.
+
+        Returns
+        -------
+        str
+            The encoded feature.
+        """
+        if not properties:
+            return self._heads[station] + "}}"
+        return self._heads[station] + encode_properties(properties) + "}}"
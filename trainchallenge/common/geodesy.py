@@ -0,0 +1,244 @@
+import math
+
+from typing import overload
+
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+
+# Radius of Earth in miles, the same value used by `gps_to_miles`
+EARTH_RADIUS_MILES = 3958.76
+
+
+def lat_lon_to_unit_vectors(lats: ArrayLike, lons: ArrayLike) -> np.ndarray:
+    """
+    Convert latitudes and longitudes to 3D unit vectors.
+
+    Parameters
+    ----------
+    lats : array_like of float
+        Latitudes in degrees.
+    lons : array_like of float
+        Longitudes in degrees.
+
+    Returns
+    -------
+    numpy.ndarray
+        A C-contiguous array of shape (n, 3), one unit vector per point.
+    """
+    lat_rad = np.radians(lats)
+    lon_rad = np.radians(lons)
+    cos_lat = np.cos(lat_rad)
+    xyz = np.stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)], axis=-1)
+    return np.ascontiguousarray(xyz)
+
+
+@overload
+def chord_sq_to_miles(chord_sq: float) -> float: ...
+
+
+@overload
+def chord_sq_to_miles(chord_sq: np.ndarray) -> np.ndarray: ...
+
+
+def chord_sq_to_miles(chord_sq: ArrayLike) -> np.ndarray | float:
+    """
+    Convert a squared chord length on the unit sphere to a great-circle distance.
+
+    This is exactly the haversine distance, as the haversine of the central angle
+    is a quarter of the squared chord length.
+
+    Parameters
+    ----------
+    chord_sq : array_like of float
+        Squared straight-line distance between two points on the unit sphere.
+
+    Returns
+    -------
+    numpy.ndarray or float
+        The great-circle distance in miles, a float for a scalar input and an
+        array otherwise.
+    """
+    miles = 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(np.sqrt(chord_sq) / 2, 1.0))
+    if np.ndim(chord_sq) == 0 and not isinstance(chord_sq, np.ndarray):
+        return float(miles)
+    return np.asarray(miles)
+
+
+def miles_to_chord_sq(miles: float) -> float:
+    """
+    Convert a great-circle distance to a squared chord length on the unit sphere.
+
+    Parameters
+    ----------
+    miles : float
+        The great-circle distance in miles.
+
+    Returns
+    -------
+    float
+        The squared straight-line distance on the unit sphere.
+    """
+    angle = min(miles / EARTH_RADIUS_MILES, math.pi)
+    return (2 * math.sin(angle / 2)) ** 2
+
+
+def gps_to_miles_array(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> np.ndarray:
+    """
+    Calculate the distance between arrays of GPS coordinates using the Haversine formula.
+
+    This is the array version of `gps_to_miles`. The inputs are broadcast against
+    each other, so one point can be compared against many, or many points
+    pairwise. The calculation is done in float32 if all inputs are float32, and in
+    float64 otherwise.
+
+    Parameters
+    ----------
+    lat1 : array_like of float
+        Latitudes of the first points.
+    lon1 : array_like of float
+        Longitudes of the first points.
+    lat2 : array_like of float
+        Latitudes of the second points.
+    lon2 : array_like of float
+        Longitudes of the second points.
+
+    Returns
+    -------
+    numpy.ndarray
+        Distances in miles between the points, with the broadcast shape of the
+        inputs.
+
+    Raises
+    ------
+    ValueError
+        If any of the inputs are not numeric, or cannot be broadcast together.
+    """
+
+    # Check that all inputs are numeric, and pick the precision to compute in. The
+    # inputs are converted first, as python scalars would not count towards the
+    # result type of numpy and give float32
+    arrays = [np.asarray(v) for v in (lat1, lon1, lat2, lon2)]
+    for arr in arrays:
+        if not (np.issubdtype(arr.dtype, np.integer) or np.issubdtype(arr.dtype, np.floating)):
+            raise ValueError(f"Invalid input dtype: {arr.dtype}. Must be numeric.")
+    dtype = np.dtype(np.float32 if all(arr.dtype == np.float32 for arr in arrays) else np.float64)
+
+    # Convert latitude and longitude from degrees to radians
+    lat1, lon1, lat2, lon2 = (np.radians(arr.astype(dtype, copy=False)) for arr in arrays)
+
+    # Haversine formula to calculate distance
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+    return c * dtype.type(EARTH_RADIUS_MILES)
+
+
+def gps_distance_matrix(lats1: ArrayLike, lons1: ArrayLike, lats2: ArrayLike, lons2: ArrayLike) -> np.ndarray:
+    """
+    Calculate the distance between every pair of points from two sets of GPS coordinates.
+
+    Parameters
+    ----------
+    lats1 : array_like of float
+        Latitudes of the first set of n points.
+    lons1 : array_like of float
+        Longitudes of the first set of n points.
+    lats2 : array_like of float
+        Latitudes of the second set of m points.
+    lons2 : array_like of float
+        Longitudes of the second set of m points.
+
+    Returns
+    -------
+    numpy.ndarray
+        An (n, m) array with the distance in miles from each point in the first
+        set to each point in the second set.
+
+    Raises
+    ------
+    ValueError
+        If the latitudes and longitudes of a set are not 1-D arrays of the same
+        length, or are not numeric.
+    """
+
+    lats1, lons1, lats2, lons2 = (np.asarray(v) for v in (lats1, lons1, lats2, lons2))
+    if lats1.ndim != 1 or lats1.shape != lons1.shape or lats2.ndim != 1 or lats2.shape != lons2.shape:
+        raise ValueError("Latitudes and longitudes must be 1-D arrays of the same length.")
+
+    return gps_to_miles_array(lats1[:, np.newaxis], lons1[:, np.newaxis], lats2[np.newaxis, :], lons2[np.newaxis, :])
+
+
+def miles_box(lat: float, lon: float, miles: float) -> tuple[float, float, float, float]:
+    """
+    Get the longitude/latitude bounding box of a circle around a point.
+
+    Scalar version of `miles_bounds`, which avoids the overhead of NumPy for a
+    single point.
+
+    Parameters
+    ----------
+    lat : float
+        Latitude of the circle center in degrees.
+    lon : float
+        Longitude of the circle center in degrees.
+    miles : float
+        The radius of the circle in miles.
+
+    Returns
+    -------
+    tuple of float
+        The minimum longitude, minimum latitude, maximum longitude and maximum
+        latitude of the box, in degrees.
+    """
+
+    angle = min(miles / EARTH_RADIUS_MILES, math.pi)
+    dlat = math.degrees(angle)
+    if abs(lat) + dlat >= 90.0:
+        dlon = 180.0
+    else:
+        dlon = math.degrees(math.asin(min(math.sin(angle) / math.cos(math.radians(lat)), 1.0)))
+
+    return lon - dlon, max(lat - dlat, -90.0), lon + dlon, min(lat + dlat, 90.0)
+
+
+def miles_bounds(lats: ArrayLike, lons: ArrayLike, miles: float) -> tuple[np.ndarray, ...]:
+    """
+    Get the longitude/latitude bounding boxes of circles around points.
+
+    The boxes are the tightest ones containing every point within `miles` of the
+    center by great-circle distance, so they are wider in longitude than in
+    latitude away from the equator. Boxes reaching a pole span all longitudes.
+
+    Parameters
+    ----------
+    lats : array_like of float
+        Latitudes of the circle centers in degrees.
+    lons : array_like of float
+        Longitudes of the circle centers in degrees.
+    miles : float
+        The radius of the circles in miles.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The minimum longitude, minimum latitude, maximum longitude and maximum
+        latitude of each box, in degrees.
+    """
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    angle = min(miles / EARTH_RADIUS_MILES, math.pi)
+
+    dlat = math.degrees(angle)
+    # the widest point of a spherical cap is asin(sin(angle) / cos(lat)) from its center
+    cos_lat = np.cos(np.radians(lats))
+    reaches_pole = np.abs(lats) + dlat >= 90.0
+    ratio = np.where(reaches_pole, 1.0, math.sin(angle) / np.maximum(cos_lat, 1e-12))
+    dlon = np.where(reaches_pole, 180.0, np.degrees(np.arcsin(np.minimum(ratio, 1.0))))
+
+    return lons - dlon, np.maximum(lats - dlat, -90.0), lons + dlon, np.minimum(lats + dlat, 90.0)
@@ -0,0 +1,155 @@
+from collections.abc import Iterable
+from collections.abc import Sequence
+
+import numpy as np
+
+from trainchallenge.common.geodesy import chord_sq_to_miles
+from trainchallenge.common.station_index import NearestStationIndex
+
+
+class MultiNetworkIndex:
+    """
+    Nearest station index over the stations of several networks at once.
+
+    The stations of every network are merged into one `NearestStationIndex`, with
+    the network of each station in `network_ids` and its position within its own
+    network in `positions`. A lookup computes the distance to every station once,
+    and then answers for all networks together or for each network separately,
+    instead of one lookup per network.
+
+    Parameters
+    ----------
+    indexes : dict of str to NearestStationIndex
+        The index of each network, by network key, all with the same `max_miles`.
+
+    Raises
+    ------
+    ValueError
+        If there are no networks, or the indexes have different `max_miles`.
+    """
+
+    __slots__ = ("_offsets", "index", "network_ids", "networks", "positions")
+
+    def __init__(self, indexes: dict[str, NearestStationIndex]):
+        if not indexes:
+            raise ValueError("At least one network is needed.")
+        max_miles = {index.max_miles for index in indexes.values()}
+        if len(max_miles) > 1:
+            raise ValueError(f"Indexes must have the same max_miles, got {sorted(max_miles)}.")
+
+        self.networks: tuple[str, ...] = tuple(indexes)
+        sizes = [len(index) for index in indexes.values()]
+        # the stations of each network are contiguous, in network order
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)]).tolist()
+        self.network_ids = np.repeat(np.arange(len(sizes), dtype=np.int16), sizes)
+        self.positions = np.concatenate([np.arange(size, dtype=np.intp) for size in sizes])
+        self.index = NearestStationIndex(
+            np.concatenate([index.lats for index in indexes.values()]),
+            np.concatenate([index.lons for index in indexes.values()]),
+            max_miles=max_miles.pop(),
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _network_slices(self, networks: Iterable[str] | None) -> list[tuple[str, slice]]:
+        """Get the stations of each requested network as a slice of the merged index."""
+
+        if networks is None:
+            networks = self.networks
+        slices = []
+        for network in networks:
+            try:
+                i = self.networks.index(network)
+            except ValueError:
+                raise KeyError(f"Unknown network: {network}.") from None
+            slices.append((network, slice(self._offsets[i], self._offsets[i + 1])))
+        return slices
+
+    def nearest_per_network(
+        self, lat: float, lon: float, networks: Sequence[str] | None = None
+    ) -> dict[str, tuple[int, float] | None]:
+        """
+        Get the nearest station of each network to a given point, in one lookup.
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the point.
+        lon : float
+            Longitude of the point.
+        networks : sequence of str, optional
+            The networks to search.
+            Defaults to None, for every network.
+
+        Returns
+        -------
+        dict of str to tuple of (int, float) or None
+            For each network, in the order requested, the position of its nearest
+            station within that network and the great-circle distance in miles,
+            or None if it has no station within `max_miles`.
+
+        Raises
+        ------
+        KeyError
+            If a network is not in the index.
+        IndexError
+            If the index has no stations.
+        ValueError
+            If the latitude or longitude is not finite.
+        """
+
+        slices = self._network_slices(networks)
+        chord_sq = self.index._chord_sq_to(lat, lon)
+
+        result: dict[str, tuple[int, float] | None] = {}
+        for network, stations in slices:
+            network_chord_sq = chord_sq[stations]
+            if len(network_chord_sq) == 0:
+                result[network] = None
+                continue
+            # argmin returns the first station when distances are equal
+            idx = int(np.argmin(network_chord_sq))
+            if network_chord_sq[idx] > self.index._max_chord_sq:
+                result[network] = None
+            else:
+                result[network] = idx, float(chord_sq_to_miles(network_chord_sq[idx]))
+        return result
+
+    def nearest(self, lat: float, lon: float, networks: Sequence[str] | None = None) -> tuple[str, int, float] | None:
+        """
+        Get the nearest station of any of the networks to a given point.
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the point.
+        lon : float
+            Longitude of the point.
+        networks : sequence of str, optional
+            The networks to search.
+            Defaults to None, for every network.
+
+        Returns
+        -------
+        tuple of (str, int, float) or None
+            The network of the nearest station, its position within that network
+            and its great-circle distance in miles, or None if no network has a
+            station within `max_miles`. When stations of several networks are
+            equally near, the one of the network listed first wins.
+
+        Raises
+        ------
+        KeyError
+            If a network is not in the index.
+        IndexError
+            If the index has no stations.
+        ValueError
+            If the latitude or longitude is not finite.
+        """
+
+        best = None
+        for network, nearest in self.nearest_per_network(lat, lon, networks).items():
+            if nearest is not None and (best is None or nearest[1] < best[2]):
+                best = (network, *nearest)
+        return best
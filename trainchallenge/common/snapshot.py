@@ -0,0 +1,336 @@
+import hashlib
+import itertools
+import json
+import logging
+import struct
+
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import shapely
+
+from trainchallenge.common.station_grid import StationGrid
+from trainchallenge.common.station_index import NearestStationIndex
+from trainchallenge.common.station_table import StationTable
+
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the on-disk layout, or what the loaders store in it, changes
+SNAPSHOT_VERSION = 3
+SNAPSHOT_SUFFIX = ".tcsnap"
+
+_MAGIC = b"TCSNAP\x00\x00"
+# magic, format version, header length
+_PREAMBLE = struct.Struct("<8sII")
+# arrays are aligned so that every memory-mapped view is aligned for its dtype
+_ALIGNMENT = 64
+
+# digests of the files hashed by this process, keyed by path, modification time and size
+_sha256_cache: dict[tuple[str, int, int], str] = {}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    The contents of a snapshot file.
+
+    Attributes
+    ----------
+    source_sha256 : str
+        SHA-256 of the raw source file the snapshot was compiled from.
+    arrays : dict of str to numpy.ndarray
+        Named numeric arrays. When read from disk these are read-only
+        memory-mapped views.
+    strings : dict of str to list of str
+        Named string tables.
+    """
+
+    source_sha256: str
+    arrays: dict[str, np.ndarray] = field(default_factory=dict)
+    strings: dict[str, list[str]] = field(default_factory=dict)
+
+
+def file_sha256(pth: Path) -> str:
+    """
+    Compute the SHA-256 hex digest of a file.
+
+    The digest is computed once per process and reused until the modification
+    time or size of the file changes, so that checking a snapshot against its
+    source does not read the whole source again on every load.
+
+    Parameters
+    ----------
+    pth : Path
+        The path to the file.
+
+    Returns
+    -------
+    str
+        The hex digest of the file contents.
+    """
+
+    stat = pth.stat()
+    key = (str(pth.resolve()), stat.st_mtime_ns, stat.st_size)
+    digest = _sha256_cache.get(key)
+    if digest is None:
+        digest = hashlib.sha256(pth.read_bytes()).hexdigest()
+        _sha256_cache[key] = digest
+    return digest
+
+
+def get_snapshot_pth(source_pth: Path) -> Path:
+    """
+    Get the default snapshot location for a raw source file.
+
+    Parameters
+    ----------
+    source_pth : Path
+        The path to the raw source file.
+
+    Returns
+    -------
+    Path
+        The source path with its suffix replaced by `.tcsnap`.
+    """
+    return source_pth.with_suffix(SNAPSHOT_SUFFIX)
+
+
+def write_snapshot(pth: Path, snapshot: Snapshot) -> None:
+    """
+    Write a snapshot to disk.
+
+    Parameters
+    ----------
+    pth : Path
+        The path to write the snapshot to. Any existing file is replaced.
+    snapshot : Snapshot
+        The snapshot to write.
+    """
+
+    # string tables are stored as utf-8 bytes plus an offsets array
+    blocks = {name: np.ascontiguousarray(arr) for name, arr in snapshot.arrays.items()}
+    for name, values in snapshot.strings.items():
+        encoded = [v.encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+        blocks[f"{name}.offsets"] = offsets
+        blocks[f"{name}.data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    # lay out the array blocks after the header
+    array_meta = {}
+    offset = 0
+    for name, arr in blocks.items():
+        offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+        array_meta[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+    header = json.dumps(
+        {"source_sha256": snapshot.source_sha256, "arrays": array_meta, "strings": list(snapshot.strings)}
+    ).encode("utf-8")
+    data_start = -(-(_PREAMBLE.size + len(header)) // _ALIGNMENT) * _ALIGNMENT
+
+    # write to a temporary file first so readers never see a partial snapshot
+    tmp_pth = pth.with_suffix(pth.suffix + ".tmp")
+    with open(tmp_pth, "wb") as f:
+        f.write(_PREAMBLE.pack(_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, arr in blocks.items():
+            f.seek(data_start + array_meta[name]["offset"])
+            f.write(arr.tobytes())
+    tmp_pth.replace(pth)
+
+
+def read_snapshot(pth: Path, source_sha256: str | None = None) -> Snapshot | None:
+    """
+    Memory-map a snapshot from disk.
+
+    Parameters
+    ----------
+    pth : Path
+        The path to the snapshot file.
+    source_sha256 : str, optional
+        The SHA-256 of the current raw source file. If given, a snapshot
+        compiled from a different source is treated as stale.
+        Defaults to None.
+
+    Returns
+    -------
+    Snapshot or None
+        The snapshot, or None if the file is missing, stale, was written with a
+        different snapshot version, or cannot be read.
+    """
+
+    if not pth.exists():
+        logger.debug("Snapshot %s does not exist", pth)
+        return None
+
+    try:
+        with open(pth, "rb") as f:
+            magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != _MAGIC or version != SNAPSHOT_VERSION:
+                logger.debug("Snapshot %s has an unsupported format version", pth)
+                return None
+            header = json.loads(f.read(header_len))
+
+        if source_sha256 is not None and header["source_sha256"] != source_sha256:
+            logger.debug("Snapshot %s is stale", pth)
+            return None
+
+        data_start = -(-(_PREAMBLE.size + header_len) // _ALIGNMENT) * _ALIGNMENT
+        raw = np.memmap(pth, dtype=np.uint8, mode="r")
+        blocks = {}
+        for name, meta in header["arrays"].items():
+            dtype = np.dtype(meta["dtype"])
+            count = int(np.prod(meta["shape"], dtype=np.int64))
+            start = data_start + meta["offset"]
+            blocks[name] = raw[start : start + count * dtype.itemsize].view(dtype).reshape(meta["shape"])
+
+        strings = {}
+        for name in header["strings"]:
+            offsets = blocks.pop(f"{name}.offsets").tolist()
+            data = blocks.pop(f"{name}.data").tobytes()
+            strings[name] = [data[start:end].decode("utf-8") for start, end in itertools.pairwise(offsets)]
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logger.warning("Snapshot %s could not be read: %s", pth, e)
+        return None
+
+    return Snapshot(source_sha256=header["source_sha256"], arrays=blocks, strings=strings)
+
+
+def write_station_snapshot(
+    pth: Path, stations: "gpd.GeoDataFrame", source_pth: Path, id_col: str, name_col: str
+) -> None:
+    """
+    Compile a GeoDataFrame of stations into a snapshot.
+
+    Only the station coordinates, ids and names are kept, along with a
+    `StationGrid` over the stations for constant time nearest station lookups
+    (see `read_station_grid`).
+
+    Parameters
+    ----------
+    pth : Path
+        The path to write the snapshot to.
+    stations : geopandas.GeoDataFrame
+        The stations, with point geometries.
+    source_pth : Path
+        The raw source file the stations were loaded from.
+    id_col : str
+        The column holding the station id.
+    name_col : str
+        The column holding the station name.
+    """
+
+    coords = shapely.get_coordinates(stations.geometry.values, include_z=True)
+    arrays = {"x": coords[:, 0].astype("<f8"), "y": coords[:, 1].astype("<f8")}
+    if stations.geometry.has_z.all():
+        arrays["z"] = coords[:, 2].astype("<f8")
+    if len(stations) > 0:
+        grid = StationGrid.build(NearestStationIndex(coords[:, 1], coords[:, 0]))
+        arrays.update({f"grid.{name}": arr for name, arr in grid.to_arrays().items()})
+
+    write_snapshot(
+        pth,
+        Snapshot(
+            source_sha256=file_sha256(source_pth),
+            arrays=arrays,
+            strings={id_col: stations[id_col].astype(str).tolist(), name_col: stations[name_col].astype(str).tolist()},
+        ),
+    )
+
+
+def read_station_snapshot(pth: Path, source_pth: Path) -> "gpd.GeoDataFrame | None":
+    """
+    Load a GeoDataFrame of stations from a snapshot.
+
+    Parameters
+    ----------
+    pth : Path
+        The path to the snapshot file.
+    source_pth : Path
+        The raw source file, used to check that the snapshot is not stale.
+
+    Returns
+    -------
+    geopandas.GeoDataFrame or None
+        A GeoDataFrame with the station id and name columns and point geometries,
+        or None if the snapshot is missing or stale.
+    """
+
+    snapshot = read_snapshot(pth, file_sha256(source_pth))
+    if snapshot is None:
+        return None
+
+    arrays = snapshot.arrays
+    # both KML and GeoJSON sources are always WGS 84
+    import geopandas as gpd
+
+    geometry = gpd.points_from_xy(arrays["x"], arrays["y"], arrays.get("z"), crs="EPSG:4326")
+    return gpd.GeoDataFrame(snapshot.strings, geometry=geometry)
+
+
+def read_station_table(pth: Path, source_pth: Path, id_col: str, name_col: str) -> StationTable | None:
+    """
+    Load a `StationTable` of stations from a snapshot, without GeoPandas.
+
+    Parameters
+    ----------
+    pth : Path
+        The path to the snapshot file.
+    source_pth : Path
+        The raw source file, used to check that the snapshot is not stale.
+    id_col : str
+        The string table holding the station id.
+    name_col : str
+        The string table holding the station name.
+
+    Returns
+    -------
+    StationTable or None
+        The stations, with coordinates that are read-only memory-mapped views of
+        the snapshot, or None if the snapshot is missing or stale, or has no such
+        string tables.
+    """
+
+    snapshot = read_snapshot(pth, file_sha256(source_pth))
+    if snapshot is None or id_col not in snapshot.strings or name_col not in snapshot.strings:
+        return None
+
+    arrays = snapshot.arrays
+    return StationTable(snapshot.strings[id_col], snapshot.strings[name_col], arrays["y"], arrays["x"], arrays.get("z"))
+
+
+def read_station_grid(pth: Path, source_pth: Path, index: NearestStationIndex) -> StationGrid | None:
+    """
+    Load the precomputed `StationGrid` of a station snapshot.
+
+    Parameters
+    ----------
+    pth : Path
+        The path to the snapshot file.
+    source_pth : Path
+        The raw source file, used to check that the snapshot is not stale.
+    index : NearestStationIndex
+        The index of the stations, in the order of the snapshot.
+
+    Returns
+    -------
+    StationGrid or None
+        The grid, or None if the snapshot is missing or stale, or has no grid
+        matching the index.
+    """
+
+    snapshot = read_snapshot(pth, file_sha256(source_pth))
+    if snapshot is None or "grid.codes" not in snapshot.arrays:
+        return None
+    prefix = "grid."
+    return StationGrid.from_arrays(
+        index, {name.removeprefix(prefix): arr for name, arr in snapshot.arrays.items() if name.startswith(prefix)}
+    )
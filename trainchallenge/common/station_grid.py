@@ -0,0 +1,321 @@
+import math
+
+import numpy as np
+
+from numpy.typing import ArrayLike
+
+from trainchallenge.common.geodesy import EARTH_RADIUS_MILES
+from trainchallenge.common.geodesy import chord_sq_to_miles
+from trainchallenge.common.geodesy import gps_to_miles_array
+from trainchallenge.common.geodesy import lat_lon_to_unit_vectors
+from trainchallenge.common.geodesy import miles_bounds
+from trainchallenge.common.station_index import NearestStationIndex
+
+
+# Number of grid cells whose candidates are computed at once in `StationGrid.build`,
+# bounds the size of the temporary distance matrix
+_BUILD_CHUNK_SIZE = 4096
+
+# Grids with more cells than this are refused, as a guard against a tiny cell size
+MAX_GRID_CELLS = 4_000_000
+
+# Slack in miles added to the candidate bounds, covering the rounding of the
+# distances computed while building the grid
+_BUILD_PAD_MILES = 1e-3
+
+
+class StationGrid:
+    """
+    Precomputed uniform grid for constant time nearest station lookups.
+
+    The area within `max_miles` of any station is split into cells of equal size in
+    degrees, and each cell lists the stations that can be the nearest one to some
+    point of the cell. A lookup is then a grid index followed by distance checks
+    against the few candidates of the cell, instead of a pass over every station.
+
+    The candidates of a cell are the stations within `d + 2r` of its center, where
+    `d` is the distance from the center to its nearest station and `r` the distance
+    from the center to the farthest corner of the cell. By the triangle inequality
+    the nearest station to any point of the cell is one of them, so lookups return
+    exactly what `NearestStationIndex.nearest` returns.
+
+    Use `StationGrid.build` to create a grid, or `StationGrid.from_arrays` to restore
+    one saved with `to_arrays`.
+
+    Parameters
+    ----------
+    index : NearestStationIndex
+        The index of the stations, whose positions the grid refers to.
+    origin : tuple of float
+        The latitude and longitude of the south-west corner of the grid.
+    cell_size : tuple of float
+        The height and width of a cell in degrees.
+    shape : tuple of int
+        The number of rows and columns of the grid.
+    offsets : numpy.ndarray
+        The start of the candidates of each cell in `codes`, in row-major cell
+        order, followed by the total number of candidates.
+    codes : numpy.ndarray
+        The positions of the candidate stations of every cell, ascending within a
+        cell.
+    """
+
+    __slots__ = ("cell_size", "codes", "index", "offsets", "origin", "shape")
+
+    def __init__(
+        self,
+        index: NearestStationIndex,
+        origin: tuple[float, float],
+        cell_size: tuple[float, float],
+        shape: tuple[int, int],
+        offsets: np.ndarray,
+        codes: np.ndarray,
+    ):
+        self.index = index
+        self.origin = origin
+        self.cell_size = cell_size
+        self.shape = shape
+        self.offsets = offsets
+        self.codes = codes
+
+    @classmethod
+    def build(cls, index: NearestStationIndex, cell_miles: float = 0.5) -> "StationGrid":
+        """
+        Build a grid over the stations of an index.
+
+        Parameters
+        ----------
+        index : NearestStationIndex
+            The index of the stations.
+        cell_miles : float, optional
+            The maximum height and width of a cell in miles. Smaller cells have
+            fewer candidates each, but make the grid bigger.
+            Defaults to 0.5 miles.
+
+        Returns
+        -------
+        StationGrid
+            The grid.
+
+        Raises
+        ------
+        IndexError
+            If the index has no stations.
+        ValueError
+            If cell_miles is not positive, or the grid would have more than
+            `MAX_GRID_CELLS` cells.
+        """
+
+        if len(index) == 0:
+            raise IndexError("Index is empty. Cannot build a grid.")
+        if not cell_miles > 0:
+            raise ValueError(f"Invalid cell_miles: {cell_miles}. Must be positive.")
+
+        # cover every point within max_miles of a station
+        min_lons, min_lats, max_lons, max_lats = miles_bounds(index.lats, index.lons, index.max_miles)
+        south, west = float(min_lats.min()), float(min_lons.min())
+        north, east = float(max_lats.max()), float(max_lons.max())
+
+        # cells are widest in miles at the latitude of the grid closest to the equator
+        dlat = math.degrees(cell_miles / EARTH_RADIUS_MILES)
+        n_rows = max(math.ceil((north - south) / dlat), 1)
+        grid_north = south + dlat * n_rows
+        equatorward_lat = 0.0 if south <= 0.0 <= grid_north else min(abs(south), abs(grid_north))
+        dlon = dlat / math.cos(math.radians(min(equatorward_lat, 89.0)))
+        n_cols = max(math.ceil((east - west) / dlon), 1)
+        if n_rows * n_cols > MAX_GRID_CELLS:
+            raise ValueError(f"Grid of {n_rows} x {n_cols} cells is too big. Must have at most {MAX_GRID_CELLS} cells.")
+
+        # the distance from the center of each row's cells to their farthest corner
+        row_south = south + dlat * np.arange(n_rows)
+        row_center = row_south + dlat / 2
+        corner_miles = [
+            gps_to_miles_array(row_center, dlon / 2, corner_lat, corner_lon)
+            for corner_lat in (row_south, row_south + dlat)
+            for corner_lon in (0.0, dlon)
+        ]
+        row_radius = np.max(corner_miles, axis=0) + _BUILD_PAD_MILES
+
+        offsets = np.zeros(n_rows * n_cols + 1, dtype=np.int64)
+        codes_chunks = []
+        counts_chunks = []
+        station_xyz = lat_lon_to_unit_vectors(index.lats, index.lons)
+        for start in range(0, n_rows * n_cols, _BUILD_CHUNK_SIZE):
+            cells = np.arange(start, min(start + _BUILD_CHUNK_SIZE, n_rows * n_cols))
+            rows, cols = np.divmod(cells, n_cols)
+            center_xyz = lat_lon_to_unit_vectors(row_center[rows], west + dlon * (cols + 0.5))
+            # |a - b|^2 = 2 - 2 a.b for unit vectors, clipped against rounding
+            chord_sq: np.ndarray = np.maximum(2.0 - 2.0 * (center_xyz @ station_xyz.T), 0.0)
+            miles = chord_sq_to_miles(chord_sq)
+
+            radius = row_radius[rows][:, np.newaxis]
+            nearest_miles = miles.min(axis=1, keepdims=True)
+            is_candidate = (miles <= nearest_miles + 2 * radius) & (miles - radius <= index.max_miles)
+            cell_idx, station_idx = np.nonzero(is_candidate)
+            codes_chunks.append(station_idx.astype(np.int32))
+            counts_chunks.append(np.bincount(cell_idx, minlength=len(cells)))
+
+        np.cumsum(np.concatenate(counts_chunks), out=offsets[1:])
+        codes = np.concatenate(codes_chunks) if codes_chunks else np.zeros(0, dtype=np.int32)
+
+        return cls(index, (south, west), (dlat, dlon), (n_rows, n_cols), offsets, codes)
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Get the arrays describing the grid, e.g. to store them in a snapshot.
+
+        Returns
+        -------
+        dict of str to numpy.ndarray
+            The grid geometry and station count, offsets and candidate codes.
+        """
+        return {
+            "geometry": np.array([*self.origin, *self.cell_size, self.index.max_miles, len(self.index)], dtype="<f8"),
+            "shape": np.array(self.shape, dtype="<i8"),
+            "offsets": self.offsets.astype("<i8", copy=False),
+            "codes": self.codes.astype("<i4", copy=False),
+        }
+
+    @classmethod
+    def from_arrays(cls, index: NearestStationIndex, arrays: dict[str, np.ndarray]) -> "StationGrid | None":
+        """
+        Restore a grid from the arrays of `to_arrays`.
+
+        Parameters
+        ----------
+        index : NearestStationIndex
+            The index of the stations the grid was built over.
+        arrays : dict of str to numpy.ndarray
+            The arrays of the grid.
+
+        Returns
+        -------
+        StationGrid or None
+            The grid, or None if it was built for a different number of stations
+            or `max_miles` than the index has.
+        """
+
+        south, west, dlat, dlon, max_miles, n_stations = arrays["geometry"].tolist()
+        if max_miles != index.max_miles or n_stations != len(index):
+            return None
+        n_rows, n_cols = arrays["shape"].tolist()
+        return cls(index, (south, west), (dlat, dlon), (n_rows, n_cols), arrays["offsets"], arrays["codes"])
+
+    @property
+    def n_cells(self) -> int:
+        """The number of cells of the grid."""
+        return self.shape[0] * self.shape[1]
+
+    def nearest(self, lat: float, lon: float) -> tuple[int, float] | None:
+        """
+        Get the nearest station to a given point.
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the point.
+        lon : float
+            Longitude of the point.
+
+        Returns
+        -------
+        tuple of (int, float) or None
+            The position of the nearest station and its great-circle distance in
+            miles, or None if there is no station within `max_miles`.
+
+        Raises
+        ------
+        ValueError
+            If the latitude or longitude is not finite.
+        """
+
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            raise ValueError("Latitude and longitude must be finite. Cannot find nearest point.")
+
+        # points outside of the grid are out of range of every station
+        row = math.floor((lat - self.origin[0]) / self.cell_size[0])
+        col = math.floor((lon - self.origin[1]) / self.cell_size[1])
+        if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+            return None
+        cell = row * self.shape[1] + col
+        candidates = self.codes[self.offsets[cell] : self.offsets[cell + 1]]
+        if len(candidates) == 0:
+            return None
+
+        lat_rad = math.radians(lat)
+        lon_rad = math.radians(lon)
+        cos_lat = math.cos(lat_rad)
+        diff = self.index._xyz[candidates] - (
+            cos_lat * math.cos(lon_rad),
+            cos_lat * math.sin(lon_rad),
+            math.sin(lat_rad),
+        )
+        chord_sq = np.einsum("ij,ij->i", diff, diff)
+
+        # candidates are in ascending order, so argmin returns the first station
+        # when distances are equal, like the index
+        best = int(np.argmin(chord_sq))
+        if chord_sq[best] > self.index._max_chord_sq:
+            return None
+        return int(candidates[best]), float(chord_sq_to_miles(chord_sq[best]))
+
+    def nearest_many(self, lats: ArrayLike, lons: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the nearest station to each of many points.
+
+        Parameters
+        ----------
+        lats : array_like of float
+            Latitudes of the points.
+        lons : array_like of float
+            Longitudes of the points.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The position of the nearest station for each point, or -1 where there
+            is no station within `max_miles`, and the great-circle distance in
+            miles to it, or NaN where there is no station.
+
+        Raises
+        ------
+        ValueError
+            If the latitudes and longitudes are not 1-D arrays of the same length,
+            or contain values that are not finite.
+        """
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if lats.ndim != 1 or lats.shape != lons.shape:
+            raise ValueError("Latitudes and longitudes must be 1-D arrays of the same length.")
+        if not (np.isfinite(lats).all() and np.isfinite(lons).all()):
+            raise ValueError("Latitudes and longitudes must be finite. Cannot find nearest point.")
+
+        nearest = np.full(len(lats), -1, dtype=np.intp)
+        miles = np.full(len(lats), np.nan)
+
+        rows = np.floor((lats - self.origin[0]) / self.cell_size[0])
+        cols = np.floor((lons - self.origin[1]) / self.cell_size[1])
+        in_grid = np.flatnonzero((rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1]))
+        cells = rows[in_grid].astype(np.int64) * self.shape[1] + cols[in_grid].astype(np.int64)
+
+        # one row per (point, candidate) pair
+        starts = self.offsets[cells]
+        counts = self.offsets[cells + 1] - starts
+        pair_point = np.repeat(np.arange(len(in_grid)), counts)
+        pair_offset = np.arange(len(pair_point)) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_station = self.codes[np.repeat(starts, counts) + pair_offset]
+
+        query_xyz = lat_lon_to_unit_vectors(lats[in_grid], lons[in_grid])
+        diff = self.index._xyz[pair_station] - query_xyz[pair_point]
+        chord_sq = np.einsum("ij,ij->i", diff, diff)
+
+        # the closest candidate per point, the lowest position when distances are equal
+        order = np.lexsort((pair_station, chord_sq, pair_point))
+        first = order[np.unique(pair_point[order], return_index=True)[1]]
+        found = first[chord_sq[first] <= self.index._max_chord_sq]
+        points = in_grid[pair_point[found]]
+        nearest[points] = pair_station[found]
+        miles[points] = chord_sq_to_miles(chord_sq[found])
+
+        return nearest, miles
@@ -0,0 +1,262 @@
+import math
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import shapely
+
+from numpy.typing import ArrayLike
+
+from trainchallenge.common.geodesy import chord_sq_to_miles
+from trainchallenge.common.geodesy import lat_lon_to_unit_vectors
+from trainchallenge.common.geodesy import miles_to_chord_sq
+
+
+if TYPE_CHECKING:
+    from geopandas import GeoSeries
+
+# Number of query points compared against every station at once in `nearest_many`,
+# bounds the size of the temporary distance matrix
+_QUERY_CHUNK_SIZE = 4096
+
+
+class NearestStationIndex:
+    """
+    Nearest station lookups over contiguous coordinate arrays.
+
+    The stations are stored as 3D unit vectors, so the nearest station by
+    great-circle distance is the one with the shortest straight-line (chord)
+    distance. Lookups are a single vectorized pass over the stations and do not
+    create any shapely or pandas objects, which for the few hundred stations of a
+    train network is much cheaper than going through a spatial index.
+
+    Parameters
+    ----------
+    lats : array_like of float
+        Latitudes of the stations.
+    lons : array_like of float
+        Longitudes of the stations.
+    max_miles : float, optional
+        Stations further away than this many miles are never returned.
+        Defaults to 10 miles, a realistic max for walking distance.
+
+    Raises
+    ------
+    ValueError
+        If the latitudes and longitudes are not 1-D arrays of the same length, or
+        contain values that are not finite.
+    """
+
+    __slots__ = ("_max_chord_sq", "_xyz", "lats", "lons", "max_miles")
+
+    def __init__(self, lats: ArrayLike, lons: ArrayLike, max_miles: float = 10.0):
+        self.lats = np.ascontiguousarray(lats, dtype=np.float64)
+        self.lons = np.ascontiguousarray(lons, dtype=np.float64)
+        if self.lats.ndim != 1 or self.lats.shape != self.lons.shape:
+            raise ValueError("Latitudes and longitudes must be 1-D arrays of the same length.")
+        if not (np.isfinite(self.lats).all() and np.isfinite(self.lons).all()):
+            raise ValueError("Latitudes and longitudes must be finite.")
+
+        self.max_miles = max_miles
+        self._xyz = lat_lon_to_unit_vectors(self.lats, self.lons)
+        # compare squared chord lengths, which avoids a sqrt per station
+        self._max_chord_sq = miles_to_chord_sq(max_miles)
+
+    @classmethod
+    def from_geoseries(cls, pts: "GeoSeries", max_miles: float = 10.0) -> "NearestStationIndex":
+        """
+        Build an index from a GeoSeries of points in longitude/latitude order.
+
+        Parameters
+        ----------
+        pts : GeoSeries
+            A GeoSeries containing the station points.
+        max_miles : float, optional
+            Stations further away than this many miles are never returned.
+            Defaults to 10 miles.
+
+        Returns
+        -------
+        NearestStationIndex
+            The index, with station positions matching the GeoSeries positions.
+        """
+        coords = shapely.get_coordinates(pts.values)
+        return cls(coords[:, 1], coords[:, 0], max_miles=max_miles)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _chord_sq_to(self, lat: float, lon: float) -> np.ndarray:
+        """Get the squared chord length from a point to every station."""
+
+        if len(self.lats) == 0:
+            raise IndexError("Index is empty. Cannot find nearest point.")
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            raise ValueError("Latitude and longitude must be finite. Cannot find nearest point.")
+
+        lat_rad = math.radians(lat)
+        lon_rad = math.radians(lon)
+        cos_lat = math.cos(lat_rad)
+        diff = self._xyz - (cos_lat * math.cos(lon_rad), cos_lat * math.sin(lon_rad), math.sin(lat_rad))
+        return np.einsum("ij,ij->i", diff, diff)
+
+    def nearest(self, lat: float, lon: float) -> tuple[int, float] | None:
+        """
+        Get the nearest station to a given point.
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the point.
+        lon : float
+            Longitude of the point.
+
+        Returns
+        -------
+        tuple of (int, float) or None
+            The position of the nearest station and its great-circle distance in
+            miles, or None if there is no station within `max_miles`.
+
+        Raises
+        ------
+        IndexError
+            If the index has no stations.
+        ValueError
+            If the latitude or longitude is not finite.
+        """
+
+        chord_sq = self._chord_sq_to(lat, lon)
+
+        # argmin returns the first station when distances are equal
+        idx = int(np.argmin(chord_sq))
+        if chord_sq[idx] > self._max_chord_sq:
+            return None
+        return idx, float(chord_sq_to_miles(chord_sq[idx]))
+
+    def k_nearest(
+        self, lat: float, lon: float, k: int, max_miles: float | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the k nearest stations to a given point, nearest first.
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the point.
+        lon : float
+            Longitude of the point.
+        k : int
+            The maximum number of stations to return.
+        max_miles : float, optional
+            Stations further away than this many miles are not returned.
+            Defaults to the `max_miles` of the index.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The positions of up to `k` nearest stations and their great-circle
+            distances in miles, sorted by distance and then by position.
+
+        Raises
+        ------
+        IndexError
+            If the index has no stations.
+        ValueError
+            If k is less than 1, or the latitude or longitude is not finite.
+        """
+
+        if k < 1:
+            raise ValueError(f"Invalid k: {k}. Must be at least 1.")
+
+        chord_sq = self._chord_sq_to(lat, lon)
+        max_chord_sq = self._max_chord_sq if max_miles is None else miles_to_chord_sq(max_miles)
+        cand = np.flatnonzero(chord_sq <= max_chord_sq)
+        # a stable sort keeps the lowest position first when distances are equal
+        cand = cand[np.argsort(chord_sq[cand], kind="stable")][:k]
+
+        return cand, chord_sq_to_miles(chord_sq[cand])
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get all stations within a distance of a given point, nearest first.
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the point.
+        lon : float
+            Longitude of the point.
+        radius_miles : float
+            The search radius in miles.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The positions of the stations within the radius and their great-circle
+            distances in miles, sorted by distance and then by position.
+
+        Raises
+        ------
+        IndexError
+            If the index has no stations.
+        ValueError
+            If the latitude or longitude is not finite.
+        """
+        return self.k_nearest(lat, lon, max(len(self), 1), max_miles=radius_miles)
+
+    def nearest_many(self, lats: ArrayLike, lons: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the nearest station to each of many points.
+
+        Parameters
+        ----------
+        lats : array_like of float
+            Latitudes of the points.
+        lons : array_like of float
+            Longitudes of the points.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The position of the nearest station for each point, or -1 where there
+            is no station within `max_miles`, and the great-circle distance in
+            miles to it, or NaN where there is no station.
+
+        Raises
+        ------
+        IndexError
+            If the index has no stations.
+        ValueError
+            If the latitudes and longitudes are not 1-D arrays of the same length,
+            or contain values that are not finite.
+        """
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if len(self.lats) == 0:
+            raise IndexError("Index is empty. Cannot find nearest point.")
+        if lats.ndim != 1 or lats.shape != lons.shape:
+            raise ValueError("Latitudes and longitudes must be 1-D arrays of the same length.")
+        if not (np.isfinite(lats).all() and np.isfinite(lons).all()):
+            raise ValueError("Latitudes and longitudes must be finite. Cannot find nearest point.")
+
+        nearest = np.full(len(lats), -1, dtype=np.intp)
+        chord_sq = np.full(len(lats), np.nan)
+        query_xyz = lat_lon_to_unit_vectors(lats, lons)
+        for start in range(0, len(lats), _QUERY_CHUNK_SIZE):
+            chunk = query_xyz[start : start + _QUERY_CHUNK_SIZE]
+            # |a - b|^2 = 2 - 2 a.b for unit vectors, clipped against rounding
+            chunk_chord_sq = np.maximum(2.0 - 2.0 * (chunk @ self._xyz.T), 0.0)
+            chunk_idx = np.argmin(chunk_chord_sq, axis=1)
+            nearest[start : start + len(chunk)] = chunk_idx
+            chord_sq[start : start + len(chunk)] = chunk_chord_sq[np.arange(len(chunk)), chunk_idx]
+
+        # recompute the distances to the winners precisely, the matrix form loses
+        # precision for very short distances
+        found = chord_sq <= self._max_chord_sq
+        diff = self._xyz[nearest[found]] - query_xyz[found]
+        chord_sq[found] = np.einsum("ij,ij->i", diff, diff)
+        nearest[~found] = -1
+        chord_sq[~found] = np.nan
+
+        return nearest, chord_sq_to_miles(chord_sq)
@@ -0,0 +1,139 @@
+import sys
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+from typing import Any
+
+import numpy as np
+import shapely
+
+from numpy.typing import ArrayLike
+from numpy.typing import NDArray
+
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+
+class StationTable:
+    """
+    Compact table of the stations of a network: ids, names and coordinates.
+
+    It holds only what the lookups and responses need, as interned strings and
+    float64 coordinate arrays, instead of a GeoDataFrame with a shapely point, a
+    pandas index and every source column per station. The arrays can be
+    read-only memory-mapped views of a snapshot, whose pages are shared by every
+    process on the host.
+
+    Parameters
+    ----------
+    ids : iterable
+        The station ids, stored as interned strings.
+    names : iterable
+        The station names, stored as interned strings.
+    lats : array_like
+        Latitudes of the stations.
+    lons : array_like
+        Longitudes of the stations.
+    zs : array_like, optional
+        Elevations of the stations, for sources with 3D points.
+        Defaults to None, for 2D points.
+
+    Raises
+    ------
+    ValueError
+        If the ids, names and coordinates are not the same length.
+    """
+
+    __slots__ = ("ids", "lats", "lons", "names", "zs")
+
+    def __init__(
+        self,
+        ids: Iterable[Any],
+        names: Iterable[Any],
+        lats: ArrayLike,
+        lons: ArrayLike,
+        zs: ArrayLike | None = None,
+    ):
+        self.ids: tuple[str, ...] = tuple(sys.intern(str(v)) for v in ids)
+        self.names: tuple[str, ...] = tuple(sys.intern(str(v)) for v in names)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.zs = None if zs is None else np.asarray(zs, dtype=np.float64)
+        lengths = {len(self.ids), len(self.names), len(self.lats), len(self.lons)}
+        if self.zs is not None:
+            lengths.add(len(self.zs))
+        if len(lengths) > 1:
+            raise ValueError("Ids, names and coordinates must be the same length.")
+
+    @classmethod
+    def from_geodataframe(cls, stations: "gpd.GeoDataFrame", id_col: str, name_col: str) -> "StationTable":
+        """
+        Build a table from a GeoDataFrame of stations, keeping only the ids, names and points.
+
+        Parameters
+        ----------
+        stations : geopandas.GeoDataFrame
+            The stations, with point geometries.
+        id_col : str
+            The column holding the station id.
+        name_col : str
+            The column holding the station name.
+
+        Returns
+        -------
+        StationTable
+            The table of the stations, in the same order.
+        """
+
+        geometry = stations.geometry
+        has_z = len(geometry) > 0 and bool(geometry.has_z.all())
+        coords = shapely.get_coordinates(geometry.values, include_z=has_z)
+        return cls(
+            stations[id_col].tolist(),
+            stations[name_col].tolist(),
+            coords[:, 1],
+            coords[:, 0],
+            coords[:, 2] if has_z else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def points(self) -> NDArray[np.object_]:
+        """
+        Build the station points.
+
+        Returns
+        -------
+        numpy.ndarray
+            The shapely points of the stations, as an array of objects.
+        """
+        # the coordinates are 1D, so shapely returns an array and never a single point
+        return np.asarray(shapely.points(self.lons, self.lats, self.zs), dtype=object)
+
+    def to_geodataframe(self, id_col: str = "stop_id", name_col: str = "station_name") -> "gpd.GeoDataFrame":
+        """
+        Build a GeoDataFrame of the stations, e.g. for GeoPandas spatial queries.
+
+        Parameters
+        ----------
+        id_col : str, optional
+            The column of the station ids.
+            Defaults to "stop_id".
+        name_col : str, optional
+            The column of the station names.
+            Defaults to "station_name".
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The stations, with the id and name columns and point geometries in WGS 84.
+        """
+
+        import geopandas as gpd
+
+        return gpd.GeoDataFrame(
+            {id_col: list(self.ids), name_col: list(self.names)},
+            geometry=gpd.points_from_xy(self.lons, self.lats, self.zs, crs="EPSG:4326"),
+        )
@@ -1,5 +1,8 @@
 from trainchallenge.dcmetro import load_data
+from trainchallenge.dcmetro.load_data import build_dcmetro_snapshot
 from trainchallenge.dcmetro.load_data import load_dcmetro_data
+from trainchallenge.dcmetro.load_data import load_dcmetro_grid
+from trainchallenge.dcmetro.load_data import load_dcmetro_stations
 
 
-__all__ = ["load_data", "load_dcmetro_data"]
+__all__ = ["build_dcmetro_snapshot", "load_data", "load_dcmetro_data", "load_dcmetro_grid", "load_dcmetro_stations"]
@@ -1,9 +1,24 @@
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import geopandas as gpd
+from trainchallenge.common.snapshot import get_snapshot_pth
+from trainchallenge.common.snapshot import read_station_grid
+from trainchallenge.common.snapshot import read_station_snapshot
+from trainchallenge.common.snapshot import read_station_table
+from trainchallenge.common.snapshot import write_station_snapshot
+from trainchallenge.common.station_grid import StationGrid
+from trainchallenge.common.station_index import NearestStationIndex
+from trainchallenge.common.station_table import StationTable
 
 
-def load_dcmetro_data(geojson_pth: Path | None = None) -> gpd.GeoDataFrame:
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+
+default_geojson_pth = Path(__file__).parent / "data" / "Metro_Stations_Regional.geojson"
+
+
+def load_dcmetro_data(geojson_pth: Path | None = None, use_snapshot: bool = False) -> "gpd.GeoDataFrame":
     """
     Load the DC metro data from the specified file path.
 
@@ -16,11 +31,17 @@ def load_dcmetro_data(geojson_pth: Path | None = None) -> gpd.GeoDataFrame:
         The default location is the `data` directory relative to the module's
         location.
         The file is named `Metro_Stations_Regional.geojson`.
+    use_snapshot : bool, optional
+        Whether to load from the precompiled snapshot next to the GeoJSON file
+        (see `build_dcmetro_snapshot`). The raw GeoJSON file is used instead if
+        the snapshot is missing or was compiled from a different GeoJSON file.
+        Defaults to False.
 
     Returns
     -------
     geopandas.GeoDataFrame
-        A GeoDataFrame containing the DC metro data.
+        A GeoDataFrame containing the DC metro data. When loaded from a snapshot,
+        only the `GIS_ID`, `NAME` and `geometry` columns are present.
 
     Raises
     ------
@@ -30,11 +51,120 @@ def load_dcmetro_data(geojson_pth: Path | None = None) -> gpd.GeoDataFrame:
 
     # check that the geojson file exists
     if geojson_pth is None:
-        geojson_pth = Path(__file__).parent / "data" / "Metro_Stations_Regional.geojson"
+        geojson_pth = default_geojson_pth
     if not geojson_pth.exists():
         raise FileNotFoundError(f"DC Metro data file not found: {geojson_pth}")
 
+    # use the precompiled snapshot if it is up to date
+    if use_snapshot:
+        metro_data = read_station_snapshot(get_snapshot_pth(geojson_pth), geojson_pth)
+        if metro_data is not None:
+            return metro_data
+
     # Load the metro data
+    import geopandas as gpd
+
     metro_data = gpd.read_file(geojson_pth)
 
     return metro_data
+
+
+def load_dcmetro_stations(geojson_pth: Path | None = None, use_snapshot: bool = False) -> StationTable:
+    """
+    Load the DC metro stations as a compact `StationTable`.
+
+    Only the `GIS_ID`, `NAME` and coordinates of the stations are kept. From an
+    up to date snapshot the table is read directly, without building a
+    GeoDataFrame.
+
+    Parameters
+    ----------
+    geojson_pth : Path, optional
+        The path to the GeoJSON file. If None, the default location is used.
+        Defaults to None.
+    use_snapshot : bool, optional
+        Whether to load from the precompiled snapshot next to the GeoJSON file
+        (see `build_dcmetro_snapshot`), falling back to the raw GeoJSON file.
+        Defaults to False.
+
+    Returns
+    -------
+    StationTable
+        The stations, with the `GIS_ID` and `NAME` of each station.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the specified GeoJSON file does not exist.
+    """
+
+    if geojson_pth is None:
+        geojson_pth = default_geojson_pth
+
+    if use_snapshot and geojson_pth.exists():
+        table = read_station_table(get_snapshot_pth(geojson_pth), geojson_pth, "GIS_ID", "NAME")
+        if table is not None:
+            return table
+
+    return StationTable.from_geodataframe(load_dcmetro_data(geojson_pth), "GIS_ID", "NAME")
+
+
+def build_dcmetro_snapshot(geojson_pth: Path | None = None, snapshot_pth: Path | None = None) -> Path:
+    """
+    Compile the DC metro data into a snapshot for fast loading.
+
+    Parameters
+    ----------
+    geojson_pth : Path, optional
+        The path to the GeoJSON file. If None, the default location is used.
+        Defaults to None.
+    snapshot_pth : Path, optional
+        The path to write the snapshot to. If None, the snapshot is written next
+        to the GeoJSON file, where `load_dcmetro_data` looks for it.
+        Defaults to None.
+
+    Returns
+    -------
+    Path
+        The path the snapshot was written to.
+    """
+
+    if geojson_pth is None:
+        geojson_pth = default_geojson_pth
+    if snapshot_pth is None:
+        snapshot_pth = get_snapshot_pth(geojson_pth)
+
+    metro_data = load_dcmetro_data(geojson_pth)
+    write_station_snapshot(snapshot_pth, metro_data, geojson_pth, "GIS_ID", "NAME")
+
+    return snapshot_pth
+
+
+def load_dcmetro_grid(index: NearestStationIndex, geojson_pth: Path | None = None) -> StationGrid:
+    """
+    Load the nearest station grid of the DC metro stations.
+
+    The grid precomputed in the snapshot (see `build_dcmetro_snapshot`) is used when it is
+    up to date, otherwise the grid is built from the index.
+
+    Parameters
+    ----------
+    index : NearestStationIndex
+        The index of the stations, as loaded by `load_dcmetro_data`.
+    geojson_pth : Path, optional
+        The path to the GeoJSON file. If None, the default location is used.
+        Defaults to None.
+
+    Returns
+    -------
+    StationGrid
+        The grid over the stations.
+    """
+
+    if geojson_pth is None:
+        geojson_pth = default_geojson_pth
+
+    grid = read_station_grid(get_snapshot_pth(geojson_pth), geojson_pth, index)
+    if grid is None:
+        grid = StationGrid.build(index)
+    return grid
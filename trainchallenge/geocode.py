@@ -0,0 +1,378 @@
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+
+import numpy as np
+
+from trainchallenge.networks import LoadedNetwork
+from trainchallenge.networks import registry
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from typing_extensions import Self
+
+
+# Number of rows read, geocoded and written at once, bounds the memory used
+DEFAULT_CHUNK_SIZE = 100_000
+
+# The network geocoded against in each worker process, set by `_init_worker`
+_worker_network: LoadedNetwork | None = None
+
+
+@dataclass(frozen=True)
+class GeocodeSummary:
+    """
+    Counts of a bulk geocoding run.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows read.
+    matched : int
+        The number of rows with a station within range.
+    chunks : int
+        The number of chunks processed.
+    """
+
+    rows: int
+    matched: int
+    chunks: int
+
+
+def get_file_format(pth: Path) -> str:
+    """
+    Get the format of a positions file from its suffix, either "csv" or "parquet".
+
+    Raises
+    ------
+    ValueError
+        If the suffix is not a supported format.
+    """
+
+    suffix = pth.suffix.lower()
+    if suffix in (".csv", ".parquet"):
+        return suffix[1:]
+    raise ValueError(f"Unsupported file format: {pth.name}. Must be .csv or .parquet.")
+
+
+def read_chunks(pth: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator["pd.DataFrame"]:
+    """
+    Stream a CSV or Parquet file in chunks of rows.
+
+    Parquet files require pyarrow.
+
+    Parameters
+    ----------
+    pth : Path
+        The file to read.
+    chunk_size : int, optional
+        The maximum number of rows per chunk.
+        Defaults to `DEFAULT_CHUNK_SIZE`.
+
+    Yields
+    ------
+    pandas.DataFrame
+        The next chunk of rows.
+    """
+
+    import pandas as pd
+
+    if get_file_format(pth) == "csv":
+        with pd.read_csv(pth, chunksize=chunk_size) as reader:
+            yield from reader
+        return
+
+    import pyarrow.parquet as pq
+
+    with pq.ParquetFile(pth) as parquet_file:
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+def encode_chunk(chunk: "pd.DataFrame", file_format: str, header: bool) -> "str | pd.DataFrame":
+    """
+    Encode a chunk of rows for `ChunkWriter.write`, e.g. in a worker process.
+
+    CSV chunks are encoded to text, the slow part of writing them, with the column
+    names first if `header` is True. Parquet chunks are left to the writer.
+    """
+    if file_format == "csv":
+        return chunk.to_csv(index=False, header=header, lineterminator="\n")
+    return chunk
+
+
+class ChunkWriter:
+    """
+    Write chunks of rows to a CSV or Parquet file as they come.
+
+    The file is created by the first chunk, and closed by `close` or on leaving a
+    `with` block. Parquet files require pyarrow, every chunk must have the same
+    columns, and the Parquet schema is taken from the first chunk, with the types
+    in `column_types` overriding the inferred ones. Every chunk is cast to that
+    schema, so a column that is empty in the first chunk, which pyarrow infers as
+    null, does not break the later chunks.
+
+    Parameters
+    ----------
+    pth : Path
+        The file to write.
+    column_types : dict of str to str, optional
+        The pyarrow type of some columns of Parquet files, by column, e.g.
+        "string" or "float64".
+        Defaults to None, for the types inferred from the first chunk.
+    """
+
+    def __init__(self, pth: Path, column_types: dict[str, str] | None = None):
+        self.pth = pth
+        self.format = get_file_format(pth)
+        self.column_types = column_types or {}
+        self._writer: Any = None
+
+    def write(self, chunk: "str | pd.DataFrame") -> None:
+        """Append a chunk of rows, or a chunk encoded by `encode`, to the file."""
+
+        if self.format == "csv":
+            if self._writer is None:
+                self._writer = self.pth.open("w", encoding="utf-8", newline="")
+            if not isinstance(chunk, str):
+                chunk = encode_chunk(chunk, self.format, header=self._writer.tell() == 0)
+            self._writer.write(chunk)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            schema = table.schema
+            for name, type_name in self.column_types.items():
+                i = schema.get_field_index(name)
+                if i >= 0:
+                    schema = schema.set(i, pa.field(name, pa.type_for_alias(type_name)))
+            self._writer = pq.ParquetWriter(self.pth, schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self) -> None:
+        """Finish the file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "Self":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def nearest_stations(network: LoadedNetwork, lats: np.ndarray, lons: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the nearest station of a network to each of many points, skipping invalid points.
+
+    Parameters
+    ----------
+    network : LoadedNetwork
+        The network to search.
+    lats : numpy.ndarray
+        Latitudes of the points.
+    lons : numpy.ndarray
+        Longitudes of the points.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The position of the nearest station for each point, or -1 where there is
+        no station in range or the coordinates are missing or not finite, and the
+        great-circle distance in miles to it, or NaN where there is no station.
+    """
+
+    nearest = np.full(len(lats), -1, dtype=np.intp)
+    miles = np.full(len(lats), np.nan)
+    valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+    nearest[valid], miles[valid] = network.grid.nearest_many(lats[valid], lons[valid])
+    return nearest, miles
+
+
+def tag_chunk(
+    network: LoadedNetwork, chunk: "pd.DataFrame", lat_col: str, lon_col: str, prefix: str = ""
+) -> tuple["pd.DataFrame", int]:
+    """
+    Add the nearest station and the distance to it to a chunk of positions.
+
+    Parameters
+    ----------
+    network : LoadedNetwork
+        The network to search.
+    chunk : pandas.DataFrame
+        The positions.
+    lat_col : str
+        The latitude column.
+    lon_col : str
+        The longitude column.
+    prefix : str, optional
+        Prefix of the added `stop_id`, `station_name` and `distance_miles` columns.
+        Defaults to no prefix.
+
+    Returns
+    -------
+    tuple of (pandas.DataFrame, int)
+        The chunk with the added columns, empty where there is no station in
+        range, and the number of rows with a station.
+
+    Raises
+    ------
+    KeyError
+        If the chunk is missing the coordinate columns.
+    """
+
+    missing = [col for col in (lat_col, lon_col) if col not in chunk.columns]
+    if missing:
+        raise KeyError(f"Positions are missing the coordinate columns: {', '.join(missing)}.")
+
+    lats = chunk[lat_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    lons = chunk[lon_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    nearest, miles = nearest_stations(network, lats, lons)
+
+    found = nearest >= 0
+    stop_ids = np.full(len(chunk), None, dtype=object)
+    station_names = np.full(len(chunk), None, dtype=object)
+    stop_ids[found] = np.asarray(network.stop_ids, dtype=object)[nearest[found]]
+    station_names[found] = np.asarray(network.station_names, dtype=object)[nearest[found]]
+    tagged = chunk.assign(
+        **{f"{prefix}stop_id": stop_ids, f"{prefix}station_name": station_names, f"{prefix}distance_miles": miles}
+    )
+    return tagged, int(found.sum())
+
+
+def _init_worker(network_key: str) -> None:
+    """Load the network once per worker process."""
+
+    global _worker_network
+
+    # with the fork start method the network loaded by the parent is inherited,
+    # otherwise it is mapped from the snapshot, whose pages the workers share
+    _worker_network = registry.load(network_key)
+    _ = _worker_network.grid
+
+
+def _worker_geocode_chunk(
+    chunk: "pd.DataFrame", lat_col: str, lon_col: str, prefix: str, file_format: str, header: bool
+) -> tuple["str | pd.DataFrame", int, int]:
+    """Tag and encode a chunk in a worker process, returning it with its row and match counts."""
+    if _worker_network is None:
+        raise RuntimeError("Worker process is not initialized.")
+    tagged, matched = tag_chunk(_worker_network, chunk, lat_col, lon_col, prefix)
+    return encode_chunk(tagged, file_format, header), len(tagged), matched
+
+
+def geocode_file(
+    input_pth: Path,
+    output_pth: Path,
+    network_key: str,
+    lat_col: str = "latitude",
+    lon_col: str = "longitude",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 0,
+    prefix: str = "",
+) -> GeocodeSummary:
+    """
+    Tag every position of a file with its nearest station and the distance to it.
+
+    The input is streamed in chunks, and each chunk is geocoded with a vectorized
+    grid lookup and written out in order, with at most a few chunks in memory at a
+    time, so the memory used is bounded by the chunk size whatever the size of the
+    file. With worker processes, the chunks are geocoded and encoded in parallel,
+    each worker using its own read-only copy of the network. The output has the
+    input columns followed by `stop_id`, `station_name` and `distance_miles`, empty
+    where there is no station within range or the coordinates are missing.
+
+    Parameters
+    ----------
+    input_pth : Path
+        The CSV or Parquet file of positions.
+    output_pth : Path
+        The CSV or Parquet file to write.
+    network_key : str
+        The key of the network in `trainchallenge.networks.registry`.
+    lat_col : str, optional
+        The latitude column.
+        Defaults to "latitude".
+    lon_col : str, optional
+        The longitude column.
+        Defaults to "longitude".
+    chunk_size : int, optional
+        The number of rows geocoded at once.
+        Defaults to `DEFAULT_CHUNK_SIZE`.
+    workers : int, optional
+        The number of worker processes geocoding chunks in parallel, 0 geocodes
+        in this process.
+        Defaults to 0.
+    prefix : str, optional
+        Prefix of the added columns, e.g. "septa_".
+        Defaults to no prefix.
+
+    Returns
+    -------
+    GeocodeSummary
+        The number of rows, of rows with a station and of chunks.
+
+    Raises
+    ------
+    KeyError
+        If the network is unknown, or the input is missing the coordinate columns.
+    ValueError
+        If chunk_size is less than 1 or workers is negative, or a file format is
+        not supported.
+    """
+
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk_size: {chunk_size}. Must be at least 1.")
+    if workers < 0:
+        raise ValueError(f"Invalid workers: {workers}. Must be at least 0.")
+    get_file_format(input_pth)
+
+    # load the network and its grid once, before forking the workers
+    network = registry.load(network_key)
+    _ = network.grid
+
+    # the added columns are all empty in chunks without a station in range
+    column_types = {
+        f"{prefix}stop_id": "string",
+        f"{prefix}station_name": "string",
+        f"{prefix}distance_miles": "float64",
+    }
+    rows = matched = chunks = 0
+    with ChunkWriter(output_pth, column_types) as writer:
+        if workers == 0:
+            for chunk in read_chunks(input_pth, chunk_size):
+                tagged, chunk_matched = tag_chunk(network, chunk, lat_col, lon_col, prefix)
+                writer.write(tagged)
+                rows, matched, chunks = rows + len(tagged), matched + chunk_matched, chunks + 1
+            return GeocodeSummary(rows, matched, chunks)
+
+        # keep a bounded window of chunks in flight, written back in input order
+        pending: deque[Future] = deque()
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(network_key,)) as executor:
+            for i, chunk in enumerate(read_chunks(input_pth, chunk_size)):
+                pending.append(
+                    executor.submit(
+                        _worker_geocode_chunk, chunk, lat_col, lon_col, prefix, writer.format, header=i == 0
+                    )
+                )
+                while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                    encoded, chunk_rows, chunk_matched = pending.popleft().result()
+                    writer.write(encoded)
+                    rows, matched, chunks = rows + chunk_rows, matched + chunk_matched, chunks + 1
+            while pending:
+                encoded, chunk_rows, chunk_matched = pending.popleft().result()
+                writer.write(encoded)
+                rows, matched, chunks = rows + chunk_rows, matched + chunk_matched, chunks + 1
+
+    return GeocodeSummary(rows, matched, chunks)
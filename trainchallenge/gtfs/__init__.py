@@ -0,0 +1,9 @@
+from trainchallenge.gtfs import departures
+from trainchallenge.gtfs import feed
+from trainchallenge.gtfs.departures import Departure
+from trainchallenge.gtfs.departures import DepartureEngine
+from trainchallenge.gtfs.feed import GtfsFeed
+from trainchallenge.gtfs.feed import load_gtfs
+
+
+__all__ = ["Departure", "DepartureEngine", "GtfsFeed", "departures", "feed", "load_gtfs"]
@@ -0,0 +1,211 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+import numpy as np
+
+from trainchallenge.gtfs.feed import NO_TIME
+from trainchallenge.gtfs.feed import GtfsFeed
+
+
+# Number of service days whose active services are kept by a `DepartureEngine`
+_ACTIVE_SERVICES_CACHE_SIZE = 8
+
+
+@dataclass(frozen=True)
+class Departure:
+    """
+    A scheduled departure of a trip from a stop.
+
+    Attributes
+    ----------
+    stop_id : str
+        The GTFS id of the stop.
+    trip_id : str
+        The GTFS id of the trip.
+    route_id : str
+        The GTFS id of the route of the trip.
+    direction_id : int
+        The GTFS direction id of the trip, or -1 when not given.
+    headsign : str
+        The headsign of the trip.
+    departure : datetime
+        The scheduled departure time.
+    """
+
+    stop_id: str
+    trip_id: str
+    route_id: str
+    direction_id: int
+    headsign: str
+    departure: datetime
+
+
+class DepartureEngine:
+    """
+    Next departure lookups over the schedule of a GTFS feed.
+
+    The departures of each stop are presorted by time of day, so finding the next
+    departures after a time is a binary search into the stop's departures followed
+    by a vectorized filter on the service, route and direction of the trips.
+
+    Departures from the last stop of a trip are left out, as the train ends there.
+
+    Parameters
+    ----------
+    feed : GtfsFeed
+        The feed to look up departures in.
+    """
+
+    def __init__(self, feed: GtfsFeed):
+        self.feed = feed
+
+        # departures with a time, that are not the end of their trip
+        departures = feed.stop_time_departures
+        is_last = np.r_[feed.stop_time_trips[1:] != feed.stop_time_trips[:-1], True]
+        keep = np.flatnonzero((departures != NO_TIME) & ~is_last)
+
+        # group the departures by stop, then sort them by time within a stop
+        order = keep[np.lexsort((departures[keep], feed.stop_time_stops[keep]))]
+        self._times = np.ascontiguousarray(departures[order])
+        self._trips = np.ascontiguousarray(feed.stop_time_trips[order])
+        self._offsets = np.zeros(len(feed.stop_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(feed.stop_time_stops[order], minlength=len(feed.stop_ids)), out=self._offsets[1:])
+
+        self._active_services: dict[date, np.ndarray] = {}
+
+    def active_services(self, day: date) -> np.ndarray:
+        """Get the services running on a date, cached for the last few dates."""
+
+        active = self._active_services.get(day)
+        if active is None:
+            if len(self._active_services) >= _ACTIVE_SERVICES_CACHE_SIZE:
+                self._active_services.pop(next(iter(self._active_services)))
+            active = self.feed.active_services(day)
+            self._active_services[day] = active
+        return active
+
+    def route_ids_for_line(self, line_name: str) -> list[str]:
+        """
+        Get the routes matching a line name.
+
+        A route matches when its id, short name or long name is the line name,
+        ignoring case and a trailing " Line", so "Airport" matches the route
+        named "Airport Line".
+
+        Parameters
+        ----------
+        line_name : str
+            The line name.
+
+        Returns
+        -------
+        list of str
+            The ids of the matching routes.
+        """
+
+        def normalize(name: str) -> str:
+            name = name.strip().casefold()
+            return name.removesuffix(" line")
+
+        target = normalize(line_name)
+        feed = self.feed
+        names = zip(
+            feed.route_ids.tolist(), feed.route_short_names.tolist(), feed.route_long_names.tolist(), strict=True
+        )
+        return [
+            route_id for route_id, *route_names in names if target in {normalize(n) for n in (route_id, *route_names)}
+        ]
+
+    def next_departures(
+        self,
+        stop_id: str,
+        after: datetime,
+        k: int = 1,
+        route_ids: Iterable[str] | None = None,
+        direction_id: int | None = None,
+    ) -> list[Departure]:
+        """
+        Get the next scheduled departures from a stop.
+
+        Parameters
+        ----------
+        stop_id : str
+            The GTFS id of the stop.
+        after : datetime
+            Departures at or after this time are returned, as a naive local time in
+            the time zone of the feed.
+        k : int, optional
+            The maximum number of departures to return.
+            Defaults to 1.
+        route_ids : iterable of str, optional
+            Only departures of trips on these routes are returned. If None, all
+            routes.
+            Defaults to None.
+        direction_id : int, optional
+            Only departures of trips in this GTFS direction are returned. If None,
+            all directions.
+            Defaults to None.
+
+        Returns
+        -------
+        list of Departure
+            Up to `k` departures, earliest first. Departures up to a day after
+            `after` are considered.
+
+        Raises
+        ------
+        KeyError
+            If the stop is not in the feed.
+        ValueError
+            If k is less than 1.
+        """
+
+        if k < 1:
+            raise ValueError(f"Invalid k: {k}. Must be at least 1.")
+
+        feed = self.feed
+        code = feed.stop_codes[stop_id]
+        start, end = self._offsets[code], self._offsets[code + 1]
+        times = self._times[start:end]
+        trips = self._trips[start:end]
+
+        # trips matching the route and direction, independent of the day
+        matches = np.ones(len(trips), dtype=bool)
+        if route_ids is not None:
+            route_codes = [feed.route_codes[r] for r in route_ids if r in feed.route_codes]
+            matches &= np.isin(feed.trip_routes[trips], route_codes)
+        if direction_id is not None:
+            matches &= feed.trip_directions[trips] == direction_id
+
+        # GTFS times are relative to the service day and can be past 24:00:00, so
+        # a departure can belong to the previous service day, today's, or be
+        # tomorrow's if nothing is left today
+        midnight = datetime.combine(after.date(), datetime.min.time())
+        seconds = int((after - midnight).total_seconds())
+        found: list[tuple[int, int]] = []
+        for day_offset in (-1, 0, 1):
+            service_day = after.date() + timedelta(days=day_offset)
+            # the time of `after` relative to this service day
+            day_seconds = seconds - day_offset * 86400
+            first = int(np.searchsorted(times, day_seconds, side="left"))
+            candidates = first + np.flatnonzero(
+                matches[first:] & self.active_services(service_day)[feed.trip_services[trips[first:]]]
+            )
+            # departures of a service day are in time order, so the first k are enough
+            found.extend((int(times[i]) + day_offset * 86400, int(trips[i])) for i in candidates[:k])
+
+        found.sort()
+        return [
+            Departure(
+                stop_id=stop_id,
+                trip_id=str(feed.trip_ids[trip]),
+                route_id=str(feed.route_ids[feed.trip_routes[trip]]),
+                direction_id=int(feed.trip_directions[trip]),
+                headsign=str(feed.trip_headsigns[trip]),
+                departure=midnight + timedelta(seconds=time_of_day),
+            )
+            for time_of_day, trip in found[:k]
+        ]
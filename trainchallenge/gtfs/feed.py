@@ -0,0 +1,532 @@
+import zipfile
+
+from dataclasses import dataclass
+from datetime import date
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Number of stop_times rows parsed at once, bounds the memory used while loading
+STOP_TIMES_CHUNK_SIZE = 1_000_000
+
+# Marks a missing time, GTFS allows stop_times without times between timepoints
+NO_TIME = -1
+
+weekday_columns = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def parse_gtfs_times(times: "pd.Series[str]") -> np.ndarray:
+    """
+    Parse GTFS times into seconds after midnight.
+
+    GTFS times are "HH:MM:SS" (or "H:MM:SS") relative to the start of the service
+    day, and can be past 24:00:00 for trips running past midnight.
+
+    Parameters
+    ----------
+    times : pandas.Series of str
+        The GTFS times.
+
+    Returns
+    -------
+    numpy.ndarray
+        The times in seconds as int32, or `NO_TIME` where the time is empty.
+
+    Raises
+    ------
+    ValueError
+        If a time is not in the GTFS format.
+    """
+
+    # pad to fixed width "HH:MM:SS" bytes and parse the digits with array operations,
+    # which is much faster than parsing millions of strings one by one
+    stripped = np.strings.strip(times.fillna("").to_numpy(dtype="S16"))
+    missing = stripped == b""
+    if len(stripped) == 0:
+        return np.empty(0, dtype=np.int32)
+    padded = np.strings.zfill(stripped, 8).astype("S8")
+    digits = np.frombuffer(padded.tobytes(), dtype=np.uint8).reshape(-1, 8).astype(np.int32) - ord("0")
+
+    colons = digits[:, [2, 5]] == ord(":") - ord("0")
+    valid = (digits[:, [0, 1, 3, 4, 6, 7]] >= 0) & (digits[:, [0, 1, 3, 4, 6, 7]] <= 9)
+    too_long = np.strings.str_len(stripped) > 8
+    bad = ~missing & (too_long | ~(colons.all(axis=1) & valid.all(axis=1)))
+    if bad.any():
+        raise ValueError(f"Invalid GTFS time: {times.iloc[int(np.argmax(bad))]}. Must be HH:MM:SS.")
+
+    seconds = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 3] * 10 + digits[:, 4]) * 60
+    seconds += digits[:, 6] * 10 + digits[:, 7]
+    seconds[missing] = NO_TIME
+    return seconds.astype(np.int32)
+
+
+def _unique(values: np.ndarray) -> np.ndarray:
+    """Get the sorted unique values of an integer array, faster than `np.unique` for large arrays."""
+    values = np.sort(values)
+    return values[np.r_[True, values[1:] != values[:-1]]] if len(values) else values
+
+
+def _csr(keys: np.ndarray, values: np.ndarray, n_keys: int) -> tuple[np.ndarray, np.ndarray]:
+    """Group values by integer key into offsets and values, keeping the value order within a key."""
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return offsets, values[order]
+
+
+@dataclass(frozen=True)
+class GtfsFeed:
+    """
+    A GTFS static feed stored as columnar arrays.
+
+    Ids are stored once in the `*_ids` string arrays, and every reference to a
+    stop, route or trip is an int32 code, the position in the matching id array.
+    Stop times are sorted by trip and stop sequence.
+
+    Attributes
+    ----------
+    stop_ids, stop_names : numpy.ndarray of str
+        The id and name of each stop.
+    stop_lats, stop_lons : numpy.ndarray of float
+        The location of each stop.
+    stop_parents : numpy.ndarray of int32
+        The code of the parent station of each stop, or -1.
+    route_ids, route_short_names, route_long_names : numpy.ndarray of str
+        The id and names of each route.
+    route_types : numpy.ndarray of int16
+        The GTFS route type of each route.
+    trip_ids, trip_headsigns : numpy.ndarray of str
+        The id and headsign of each trip.
+    trip_routes : numpy.ndarray of int32
+        The route code of each trip.
+    trip_services : numpy.ndarray of int32
+        The code of the service of each trip, a position in `service_ids`.
+    trip_directions : numpy.ndarray of int8
+        The GTFS direction id of each trip, or -1 when not given.
+    service_ids : numpy.ndarray of str
+        The ids of the services the trips run on.
+    stop_time_trips, stop_time_stops : numpy.ndarray of int32
+        The trip and stop code of each stop time.
+    stop_time_sequences : numpy.ndarray of int32
+        The stop sequence of each stop time within its trip.
+    stop_time_arrivals, stop_time_departures : numpy.ndarray of int32
+        The arrival and departure time of each stop time in seconds after
+        midnight, or `NO_TIME`.
+    stop_route_offsets, stop_route_codes : numpy.ndarray
+        The routes serving each stop: the codes of the routes serving stop `i` are
+        `stop_route_codes[stop_route_offsets[i] : stop_route_offsets[i + 1]]`.
+    route_stop_offsets, route_stop_codes : numpy.ndarray
+        The stops of each route in travel order, in the same layout.
+    service_weekdays : numpy.ndarray of bool
+        An (n_services, 7) array of the weekdays each service runs on, Monday
+        first, from calendar.txt.
+    service_start_dates, service_end_dates : numpy.ndarray of int32
+        The first and last date of each service as YYYYMMDD, or 0 for services
+        not in calendar.txt.
+    service_exception_services, service_exception_dates : numpy.ndarray of int32
+        The service code and date (YYYYMMDD) of each exception in
+        calendar_dates.txt.
+    service_exception_types : numpy.ndarray of int8
+        The GTFS exception type of each exception, 1 if the service is added on
+        the date and 2 if it is removed.
+    """
+
+    stop_ids: np.ndarray
+    stop_names: np.ndarray
+    stop_lats: np.ndarray
+    stop_lons: np.ndarray
+    stop_parents: np.ndarray
+    route_ids: np.ndarray
+    route_short_names: np.ndarray
+    route_long_names: np.ndarray
+    route_types: np.ndarray
+    trip_ids: np.ndarray
+    trip_headsigns: np.ndarray
+    trip_routes: np.ndarray
+    trip_services: np.ndarray
+    trip_directions: np.ndarray
+    service_ids: np.ndarray
+    stop_time_trips: np.ndarray
+    stop_time_stops: np.ndarray
+    stop_time_sequences: np.ndarray
+    stop_time_arrivals: np.ndarray
+    stop_time_departures: np.ndarray
+    stop_route_offsets: np.ndarray
+    stop_route_codes: np.ndarray
+    route_stop_offsets: np.ndarray
+    route_stop_codes: np.ndarray
+    service_weekdays: np.ndarray
+    service_start_dates: np.ndarray
+    service_end_dates: np.ndarray
+    service_exception_services: np.ndarray
+    service_exception_dates: np.ndarray
+    service_exception_types: np.ndarray
+
+    @cached_property
+    def stop_codes(self) -> dict[str, int]:
+        """Map of stop id to stop code."""
+        return {stop_id: i for i, stop_id in enumerate(self.stop_ids.tolist())}
+
+    @cached_property
+    def route_codes(self) -> dict[str, int]:
+        """Map of route id to route code."""
+        return {route_id: i for i, route_id in enumerate(self.route_ids.tolist())}
+
+    def active_services(self, day: date) -> np.ndarray:
+        """
+        Get the services running on a date.
+
+        Parameters
+        ----------
+        day : date
+            The service date.
+
+        Returns
+        -------
+        numpy.ndarray of bool
+            Whether each service runs on the date.
+        """
+
+        yyyymmdd = day.year * 10000 + day.month * 100 + day.day
+        active = (
+            self.service_weekdays[:, day.weekday()]
+            & (self.service_start_dates <= yyyymmdd)
+            & (self.service_end_dates >= yyyymmdd)
+        )
+        on_day = self.service_exception_dates == yyyymmdd
+        active[self.service_exception_services[on_day & (self.service_exception_types == 1)]] = True
+        active[self.service_exception_services[on_day & (self.service_exception_types == 2)]] = False
+        return active
+
+    def routes_at_stop(self, stop_id: str) -> list[str]:
+        """
+        Get the routes serving a stop.
+
+        Parameters
+        ----------
+        stop_id : str
+            The GTFS stop id.
+
+        Returns
+        -------
+        list of str
+            The ids of the routes with a trip stopping at the stop, or at one of
+            its child stops if it is a station.
+
+        Raises
+        ------
+        KeyError
+            If the stop is not in the feed.
+        """
+
+        code = self.stop_codes[stop_id]
+        codes = self.stop_route_codes[self.stop_route_offsets[code] : self.stop_route_offsets[code + 1]]
+        return self.route_ids[codes].tolist()
+
+    def stops_on_route(self, route_id: str) -> list[str]:
+        """
+        Get the stops of a route in travel order.
+
+        Parameters
+        ----------
+        route_id : str
+            The GTFS route id.
+
+        Returns
+        -------
+        list of str
+            The ids of the stops of the route. The stops of the route's longest
+            trip come first in the order they are visited, followed by any stops
+            only visited by other trips.
+
+        Raises
+        ------
+        KeyError
+            If the route is not in the feed.
+        """
+
+        code = self.route_codes[route_id]
+        codes = self.route_stop_codes[self.route_stop_offsets[code] : self.route_stop_offsets[code + 1]]
+        return self.stop_ids[codes].tolist()
+
+
+def _read_table(feed: zipfile.ZipFile, name: str, columns: dict[str, bool]) -> "pd.DataFrame":
+    """Read a small GTFS table as strings, with empty optional columns when they are missing."""
+
+    import pandas as pd
+
+    if name not in feed.namelist():
+        raise FileNotFoundError(f"GTFS feed is missing {name}")
+    with feed.open(name) as f:
+        table = pd.read_csv(f, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    table.columns = table.columns.str.strip()
+    for col, required in columns.items():
+        if col not in table.columns:
+            if required:
+                raise ValueError(f"GTFS file {name} is missing the required column {col}")
+            table[col] = ""
+    return table
+
+
+def _read_calendar(feed: zipfile.ZipFile, service_ids: np.ndarray) -> dict[str, np.ndarray]:
+    """Read the service calendar, from calendar.txt and calendar_dates.txt when they are present."""
+
+    n_services = len(service_ids)
+    weekdays = np.zeros((n_services, 7), dtype=bool)
+    start_dates = np.zeros(n_services, dtype=np.int32)
+    end_dates = np.zeros(n_services, dtype=np.int32)
+    if "calendar.txt" in feed.namelist():
+        calendar = _read_table(
+            feed,
+            "calendar.txt",
+            {"service_id": True, "start_date": True, "end_date": True} | dict.fromkeys(weekday_columns, True),
+        )
+        codes = _codes(service_ids, calendar["service_id"])
+        calendar = calendar[codes >= 0]
+        codes = codes[codes >= 0]
+        weekdays[codes] = calendar[list(weekday_columns)].to_numpy() == "1"
+        start_dates[codes] = calendar["start_date"].astype(np.int32).to_numpy()
+        end_dates[codes] = calendar["end_date"].astype(np.int32).to_numpy()
+
+    exception_services = np.empty(0, dtype=np.int32)
+    exception_dates = np.empty(0, dtype=np.int32)
+    exception_types = np.empty(0, dtype=np.int8)
+    if "calendar_dates.txt" in feed.namelist():
+        calendar_dates = _read_table(
+            feed, "calendar_dates.txt", {"service_id": True, "date": True, "exception_type": True}
+        )
+        codes = _codes(service_ids, calendar_dates["service_id"])
+        calendar_dates = calendar_dates[codes >= 0]
+        exception_services = codes[codes >= 0]
+        exception_dates = calendar_dates["date"].astype(np.int32).to_numpy()
+        exception_types = calendar_dates["exception_type"].astype(np.int8).to_numpy()
+
+    return {
+        "service_weekdays": weekdays,
+        "service_start_dates": start_dates,
+        "service_end_dates": end_dates,
+        "service_exception_services": exception_services,
+        "service_exception_dates": exception_dates,
+        "service_exception_types": exception_types,
+    }
+
+
+def _codes(ids: np.ndarray, values: "pd.Series[str]") -> np.ndarray:
+    """Get the int32 codes of ids, -1 where the id is unknown."""
+    import pandas as pd
+
+    return pd.Index(ids).get_indexer(values).astype(np.int32)
+
+
+def load_gtfs(gtfs_pth: Path, chunksize: int = STOP_TIMES_CHUNK_SIZE) -> GtfsFeed:
+    """
+    Load a GTFS static feed from a zip file.
+
+    The stops, routes, trips and stop times are loaded, and the service calendar
+    from calendar.txt and calendar_dates.txt, either of which can be missing.
+
+    The stop times, by far the largest table, are streamed from the zip file in
+    chunks and stored as int32 columns, so the memory used while loading is
+    bounded by the chunk size plus the compact result.
+
+    Parameters
+    ----------
+    gtfs_pth : Path
+        The path to the GTFS zip file.
+    chunksize : int, optional
+        The number of stop times parsed at once.
+        Defaults to `STOP_TIMES_CHUNK_SIZE`.
+
+    Returns
+    -------
+    GtfsFeed
+        The feed.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist, or is missing one of stops.txt, routes.txt,
+        trips.txt and stop_times.txt.
+    ValueError
+        If a table is missing a required column, or a time is not valid.
+    """
+
+    import pandas as pd
+
+    if not gtfs_pth.exists():
+        raise FileNotFoundError(f"GTFS feed not found: {gtfs_pth}")
+
+    with zipfile.ZipFile(gtfs_pth, "r") as feed:
+        stops = _read_table(
+            feed,
+            "stops.txt",
+            {"stop_id": True, "stop_name": False, "stop_lat": False, "stop_lon": False, "parent_station": False},
+        )
+        routes = _read_table(
+            feed,
+            "routes.txt",
+            {"route_id": True, "route_short_name": False, "route_long_name": False, "route_type": False},
+        )
+        trips = _read_table(
+            feed,
+            "trips.txt",
+            {"route_id": True, "service_id": True, "trip_id": True, "direction_id": False, "trip_headsign": False},
+        )
+
+        stop_ids = stops["stop_id"].to_numpy(dtype=str)
+        route_ids = routes["route_id"].to_numpy(dtype=str)
+        trip_ids = trips["trip_id"].to_numpy(dtype=str)
+        service_ids = np.unique(trips["service_id"].to_numpy(dtype=str))
+        calendar = _read_calendar(feed, service_ids)
+
+        if "stop_times.txt" not in feed.namelist():
+            raise FileNotFoundError("GTFS feed is missing stop_times.txt")
+
+        # stream the stop times, keeping only the integer coded columns of each chunk
+        chunks: list[tuple[np.ndarray, ...]] = []
+        stop_index = pd.Index(stop_ids)
+        trip_index = pd.Index(trip_ids)
+        usecols = ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"]
+        with feed.open("stop_times.txt") as f:
+            reader = pd.read_csv(
+                f,
+                usecols=lambda c: c.strip() in usecols,
+                dtype=str,
+                na_filter=False,
+                encoding="utf-8-sig",
+                chunksize=chunksize,
+            )
+            for chunk in reader:
+                chunk.columns = chunk.columns.str.strip()
+                trip_codes = trip_index.get_indexer(chunk["trip_id"]).astype(np.int32)
+                stop_codes = stop_index.get_indexer(chunk["stop_id"]).astype(np.int32)
+                # drop stop times of unknown trips or stops
+                known = (trip_codes >= 0) & (stop_codes >= 0)
+                chunk = chunk[known]
+                chunks.append(
+                    (
+                        trip_codes[known],
+                        stop_codes[known],
+                        chunk["stop_sequence"].astype(np.int32).to_numpy(),
+                        parse_gtfs_times(chunk["arrival_time"]),
+                        parse_gtfs_times(chunk["departure_time"]),
+                    )
+                )
+
+    if chunks:
+        st_trips, st_stops, st_seqs, st_arrivals, st_departures = (np.concatenate(c) for c in zip(*chunks, strict=True))
+    else:
+        st_trips, st_stops, st_seqs, st_arrivals, st_departures = (np.empty(0, dtype=np.int32) for _ in range(5))
+    del chunks
+
+    # sort the stop times by trip, then by stop sequence
+    order = np.lexsort((st_seqs, st_trips))
+    st_trips, st_stops, st_seqs, st_arrivals, st_departures = (
+        a[order] for a in (st_trips, st_stops, st_seqs, st_arrivals, st_departures)
+    )
+
+    trip_routes = _codes(route_ids, trips["route_id"])
+    stop_parents = _codes(stop_ids, stops["parent_station"])
+    direction = pd.to_numeric(trips["direction_id"], errors="coerce").fillna(-1)
+
+    stop_route_offsets, stop_route_codes = _stop_routes(st_trips, st_stops, trip_routes, stop_parents, len(route_ids))
+    route_stop_offsets, route_stop_codes = _route_stops(st_trips, st_stops, trip_routes, len(route_ids), len(stop_ids))
+
+    return GtfsFeed(
+        stop_ids=stop_ids,
+        stop_names=stops["stop_name"].to_numpy(dtype=str),
+        stop_lats=pd.to_numeric(stops["stop_lat"], errors="coerce").to_numpy(dtype=np.float64),
+        stop_lons=pd.to_numeric(stops["stop_lon"], errors="coerce").to_numpy(dtype=np.float64),
+        stop_parents=stop_parents,
+        route_ids=route_ids,
+        route_short_names=routes["route_short_name"].to_numpy(dtype=str),
+        route_long_names=routes["route_long_name"].to_numpy(dtype=str),
+        route_types=pd.to_numeric(routes["route_type"], errors="coerce").fillna(-1).to_numpy(dtype=np.int16),
+        trip_ids=trip_ids,
+        trip_headsigns=trips["trip_headsign"].to_numpy(dtype=str),
+        trip_routes=trip_routes,
+        trip_services=_codes(service_ids, trips["service_id"]),
+        trip_directions=direction.to_numpy(dtype=np.int8),
+        service_ids=service_ids,
+        stop_time_trips=st_trips,
+        stop_time_stops=st_stops,
+        stop_time_sequences=st_seqs,
+        stop_time_arrivals=st_arrivals,
+        stop_time_departures=st_departures,
+        stop_route_offsets=stop_route_offsets,
+        stop_route_codes=stop_route_codes,
+        route_stop_offsets=route_stop_offsets,
+        route_stop_codes=route_stop_codes,
+        **calendar,
+    )
+
+
+def _stop_routes(
+    st_trips: np.ndarray, st_stops: np.ndarray, trip_routes: np.ndarray, stop_parents: np.ndarray, n_routes: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Index the routes serving each stop, and each parent station of a served stop."""
+
+    n_stops = len(stop_parents)
+    routes = trip_routes[st_trips].astype(np.int64)
+    stops = st_stops.astype(np.int64)
+    served = routes >= 0
+    routes, stops = routes[served], stops[served]
+
+    # a station is served by every route serving one of its child stops
+    has_parent = stop_parents[stops] >= 0
+    stops = np.concatenate([stops, stop_parents[stops[has_parent]]])
+    routes = np.concatenate([routes, routes[has_parent]])
+
+    # unique (stop, route) pairs, sorted by stop then route
+    pairs = _unique(stops * max(n_routes, 1) + routes)
+    return _csr(pairs // max(n_routes, 1), (pairs % max(n_routes, 1)).astype(np.int32), n_stops)
+
+
+def _route_stops(
+    st_trips: np.ndarray, st_stops: np.ndarray, trip_routes: np.ndarray, n_routes: int, n_stops: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Index the stops of each route, in the order of the route's longest trip."""
+
+    if len(st_trips) == 0:
+        return np.zeros(n_routes + 1, dtype=np.int64), np.empty(0, dtype=np.int32)
+
+    # the stop times of a trip are contiguous, as they are sorted by trip
+    trip_starts = np.flatnonzero(np.r_[True, st_trips[1:] != st_trips[:-1]])
+    trip_lengths = np.diff(np.r_[trip_starts, len(st_trips)])
+    trips = st_trips[trip_starts]
+    routes = trip_routes[trips]
+
+    # the longest trip of each route, the first one when there are ties
+    order = np.lexsort((-trip_lengths, routes))
+    first = np.r_[True, routes[order][1:] != routes[order][:-1]]
+    longest = order[first]
+    longest = longest[routes[longest] >= 0]
+
+    route_keys = []
+    stop_values = []
+    for t in longest.tolist():
+        start = trip_starts[t]
+        pattern = st_stops[start : start + trip_lengths[t]]
+        # keep the first visit of stops visited more than once, e.g. loops
+        _, first_visit = np.unique(pattern, return_index=True)
+        pattern = pattern[np.sort(first_visit)]
+        route_keys.append(np.full(len(pattern), routes[t], dtype=np.int64))
+        stop_values.append(pattern)
+
+    # then the stops only visited by the route's other trips
+    st_routes = trip_routes[st_trips].astype(np.int64)
+    served = st_routes >= 0
+    all_pairs = _unique(st_routes[served] * n_stops + st_stops[served])
+    seen = _unique(np.concatenate(route_keys) * n_stops + np.concatenate(stop_values)) if route_keys else []
+    extra = np.setdiff1d(all_pairs, seen, assume_unique=True)
+    route_keys.append(extra // n_stops)
+    stop_values.append((extra % n_stops).astype(np.int32))
+
+    return _csr(np.concatenate(route_keys), np.concatenate(stop_values).astype(np.int32), n_routes)
@@ -0,0 +1,298 @@
+import threading
+
+from collections.abc import Callable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from trainchallenge import dcmetro
+from trainchallenge import septa
+from trainchallenge import telemetry
+from trainchallenge.common.features import StationFeatures
+from trainchallenge.common.network_index import MultiNetworkIndex
+from trainchallenge.common.station_grid import StationGrid
+from trainchallenge.common.station_index import NearestStationIndex
+from trainchallenge.common.station_table import StationTable
+
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+
+@dataclass(frozen=True)
+class Network:
+    """
+    Declaration of a transit network.
+
+    Parameters
+    ----------
+    key : str
+        The short name identifying the network, e.g. in URLs.
+    display_name : str
+        The human readable name of the network.
+    loader : callable
+        Loads the stations of the network as a GeoDataFrame of points. It is called
+        with `use_snapshot=True`.
+    id_col : str
+        The column holding the station id.
+    name_col : str
+        The column holding the station name.
+    snapshot_builder : callable, optional
+        Compiles the stations into a snapshot, called with `snapshot_pth`.
+        Defaults to None, for networks without snapshots.
+    grid_loader : callable, optional
+        Loads the precomputed nearest station grid of the network, called with its
+        `NearestStationIndex`.
+        Defaults to None, for networks whose grid is built on first use.
+    table_loader : callable, optional
+        Loads the stations of the network straight into a `StationTable`. It is
+        called with `use_snapshot=True`.
+        Defaults to None, for networks whose table is converted from `loader`.
+    """
+
+    key: str
+    display_name: str
+    loader: Callable[..., "gpd.GeoDataFrame"]
+    id_col: str
+    name_col: str
+    snapshot_builder: Callable[..., Path] | None = None
+    grid_loader: Callable[[NearestStationIndex], StationGrid] | None = None
+    table_loader: Callable[..., StationTable] | None = None
+
+
+@dataclass(frozen=True)
+class LoadedNetwork:
+    """
+    The loaded stations of a transit network.
+
+    Parameters
+    ----------
+    network : Network
+        The declaration of the network.
+    stations : StationTable
+        The stations of the network.
+    index : NearestStationIndex
+        The nearest station index over the stations, with matching positions.
+    """
+
+    network: Network
+    stations: StationTable
+    index: NearestStationIndex
+
+    @cached_property
+    def grid(self) -> StationGrid:
+        """The nearest station grid over the stations, loaded on first use."""
+        with telemetry.stage("load_grid", {"network": self.network.key}):
+            if self.network.grid_loader is not None:
+                return self.network.grid_loader(self.index)
+            return StationGrid.build(self.index)
+
+    @cached_property
+    def features(self) -> StationFeatures:
+        """The pre-encoded GeoJSON features of the stations, encoded on first use."""
+        with telemetry.stage("encode_features", {"network": self.network.key}):
+            return StationFeatures(self.stations.points(), self.stop_ids, self.station_names)
+
+    @cached_property
+    def geometry(self) -> "gpd.GeoSeries":
+        """The station points as a GeoSeries, for GeoPandas spatial index lookups, built on first use."""
+        import geopandas as gpd
+
+        return gpd.GeoSeries(self.stations.points(), crs="EPSG:4326")
+
+    @property
+    def stop_ids(self) -> tuple[str, ...]:
+        """The interned station ids of the station table, in station order."""
+        return self.stations.ids
+
+    @property
+    def station_names(self) -> tuple[str, ...]:
+        """The interned station names of the station table, in station order."""
+        return self.stations.names
+
+
+class NetworkRegistry:
+    """
+    Registry of transit networks, loading each network on first use.
+
+    Loading a network is done at most once, even when it is first used from
+    several threads at the same time, and the result is kept for later calls.
+    """
+
+    def __init__(self):
+        self._networks: dict[str, Network] = {}
+        self._loaded: dict[str, LoadedNetwork] = {}
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._multi_indexes: dict[tuple[str, ...], MultiNetworkIndex] = {}
+
+    def register(self, network: Network) -> Network:
+        """
+        Add a network to the registry.
+
+        Parameters
+        ----------
+        network : Network
+            The declaration of the network.
+
+        Returns
+        -------
+        Network
+            The registered network.
+
+        Raises
+        ------
+        ValueError
+            If a network with the same key is already registered.
+        """
+
+        with self._lock:
+            if network.key in self._networks:
+                raise ValueError(f"Network {network.key} is already registered.")
+            self._networks[network.key] = network
+            self._load_locks[network.key] = threading.Lock()
+        return network
+
+    def get(self, key: str) -> Network:
+        """
+        Get the declaration of a network, without loading it.
+
+        Parameters
+        ----------
+        key : str
+            The key of the network.
+
+        Returns
+        -------
+        Network
+            The declaration of the network.
+
+        Raises
+        ------
+        KeyError
+            If no network is registered with the key.
+        """
+
+        try:
+            return self._networks[key]
+        except KeyError:
+            raise KeyError(f"Unknown network: {key}.") from None
+
+    def load(self, key: str) -> LoadedNetwork:
+        """
+        Get the stations of a network, loading them on first use.
+
+        Parameters
+        ----------
+        key : str
+            The key of the network.
+
+        Returns
+        -------
+        LoadedNetwork
+            The loaded stations of the network.
+
+        Raises
+        ------
+        KeyError
+            If no network is registered with the key.
+        """
+
+        loaded = self._loaded.get(key)
+        if loaded is not None:
+            return loaded
+
+        network = self.get(key)
+        with self._load_locks[key]:
+            # another thread may have loaded the network while waiting for the lock
+            loaded = self._loaded.get(key)
+            if loaded is None:
+                with telemetry.stage("load_network", {"network": key}):
+                    # only the compact table is kept, not the full GeoDataFrame of the source
+                    if network.table_loader is not None:
+                        stations = network.table_loader(use_snapshot=True)
+                    else:
+                        stations = StationTable.from_geodataframe(
+                            network.loader(use_snapshot=True), network.id_col, network.name_col
+                        )
+                    loaded = LoadedNetwork(network, stations, NearestStationIndex(stations.lats, stations.lons))
+                self._loaded[key] = loaded
+        return loaded
+
+    def is_loaded(self, key: str) -> bool:
+        """Whether a network has been loaded."""
+        return key in self._loaded
+
+    def multi_index(self, keys: Sequence[str] | None = None) -> MultiNetworkIndex:
+        """
+        Get the index merging the stations of several networks, built on first use.
+
+        Parameters
+        ----------
+        keys : sequence of str, optional
+            The keys of the networks, loaded if needed.
+            Defaults to None, for every registered network.
+
+        Returns
+        -------
+        MultiNetworkIndex
+            The index over the stations of the networks, in the order of the keys.
+
+        Raises
+        ------
+        KeyError
+            If no network is registered with one of the keys.
+        """
+
+        keys = tuple(self) if keys is None else tuple(keys)
+        index = self._multi_indexes.get(keys)
+        if index is None:
+            index = MultiNetworkIndex({key: self.load(key).index for key in keys})
+            self._multi_indexes[keys] = index
+        return index
+
+    def unload(self, key: str) -> None:
+        """Drop the loaded stations of a network, so the next use loads them again."""
+        self._loaded.pop(key, None)
+        for keys in [keys for keys in self._multi_indexes if key in keys]:
+            self._multi_indexes.pop(keys, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._networks
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._networks))
+
+    def __len__(self) -> int:
+        return len(self._networks)
+
+
+registry = NetworkRegistry()
+
+registry.register(
+    Network(
+        key="septa",
+        display_name="SEPTA",
+        loader=septa.load_regional_rail_data,
+        id_col="stop_id",
+        name_col="station_name",
+        snapshot_builder=septa.build_regional_rail_snapshot,
+        grid_loader=septa.load_regional_rail_grid,
+        table_loader=septa.load_regional_rail_stations,
+    )
+)
+registry.register(
+    Network(
+        key="dcmetro",
+        display_name="DC Metro",
+        loader=dcmetro.load_dcmetro_data,
+        id_col="GIS_ID",
+        name_col="NAME",
+        snapshot_builder=dcmetro.build_dcmetro_snapshot,
+        grid_loader=dcmetro.load_dcmetro_grid,
+        table_loader=dcmetro.load_dcmetro_stations,
+    )
+)
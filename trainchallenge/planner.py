@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import threading
+
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+import numpy as np
+
+from trainchallenge.common import MAX_DISTANCE_MILES
+from trainchallenge.networks import LoadedNetwork
+
+
+logger = logging.getLogger(__name__)
+
+# Conservative walking speed, also accounting for distances being as the crow flies
+WALKING_SPEED_MPH = 2.0
+
+# Maximum number of stations whose trains are fetched at the same time
+MAX_FETCH_WORKERS = 8
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used to fetch the trains of several stations at once."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="trainchallenge-planner")
+        return _executor
+
+
+@dataclass(frozen=True)
+class TripPlan:
+    """
+    The train to take, and when to leave for it.
+
+    Attributes
+    ----------
+    station : int
+        The position of the station to leave from in the network's stations.
+    distance_miles : float
+        The great-circle distance to the station in miles.
+    train : Any
+        The train, as returned by the train source.
+    departure : datetime
+        The time the train leaves the station.
+    leave_time : datetime
+        The latest time to leave to walk to the station in time for the train.
+    """
+
+    station: int
+    distance_miles: float
+    train: Any
+    departure: datetime
+    leave_time: datetime
+
+
+def _drop_failed_stations(
+    station_idx: np.ndarray, station_miles: np.ndarray, results: list[list[Any] | BaseException]
+) -> tuple[np.ndarray, np.ndarray, list[list[Any]]]:
+    """
+    Keep the stations whose trains were fetched, raising the first error only if every fetch failed.
+
+    One station failing to load, e.g. for an upstream error, should not drop the
+    trains of the others from the plan.
+    """
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if len(errors) == len(results):
+        raise errors[0]
+    for i, result in enumerate(results):
+        if isinstance(result, BaseException):
+            logger.warning("Skipping station %s, its trains could not be fetched: %s", int(station_idx[i]), result)
+    ok = [i for i, result in enumerate(results) if not isinstance(result, BaseException)]
+    trains = [result for result in results if not isinstance(result, BaseException)]
+    return station_idx[ok], station_miles[ok], trains
+
+
+def _best_plan(
+    station_idx: np.ndarray,
+    station_miles: np.ndarray,
+    station_trains: list[list[Any]],
+    get_departure: Callable[[Any], datetime],
+    now: datetime,
+    walking_speed_mph: float,
+) -> TripPlan | None:
+    """Pick the earliest catchable train from the upcoming trains of each of the nearest stations."""
+
+    # flatten to one row per (station, train) pair
+    counts = np.array([len(trains) for trains in station_trains], dtype=np.intp)
+    if counts.sum() == 0:
+        return None
+    trains = [train for trains in station_trains for train in trains]
+    candidate_station = np.repeat(np.arange(len(station_idx)), counts)
+    departure_times = [get_departure(train) for train in trains]
+    departures = np.array([(d - now).total_seconds() for d in departure_times], dtype=np.float64)
+
+    # seconds to spare when leaving now, negative if the train can't be caught
+    walk_seconds = station_miles / walking_speed_mph * 3600.0
+    slack = departures - walk_seconds[candidate_station]
+    catchable = np.flatnonzero(slack >= 0)
+    if len(catchable) == 0:
+        return None
+
+    # the earliest departure, then the most time to spare
+    best = catchable[np.lexsort((-slack[catchable], departures[catchable]))[0]]
+    station = int(candidate_station[best])
+    return TripPlan(
+        station=int(station_idx[station]),
+        distance_miles=float(station_miles[station]),
+        train=trains[best],
+        departure=departure_times[best],
+        leave_time=departure_times[best] - timedelta(seconds=float(walk_seconds[station])),
+    )
+
+
+def plan_trip(
+    lat: float,
+    lon: float,
+    network: LoadedNetwork,
+    get_trains: Callable[[str], Iterable[Any]],
+    get_departure: Callable[[Any], datetime],
+    now: datetime | None = None,
+    k: int = 5,
+    max_miles: float = MAX_DISTANCE_MILES,
+    walking_speed_mph: float = WALKING_SPEED_MPH,
+) -> TripPlan | None:
+    """
+    Find the earliest train that can be caught from any of the nearest stations.
+
+    The trains of the `k` nearest stations are fetched concurrently, then every
+    (station, train) pair is evaluated in one vectorized pass: a train can be
+    caught if walking to its station takes no longer than the time until it
+    leaves. Of those, the train leaving first is picked, and when several leave at
+    the same time the one leaving the most time to spare. Stations whose trains
+    fail to load are skipped, as long as the trains of one station load.
+
+    Parameters
+    ----------
+    lat : float
+        Latitude of the starting point.
+    lon : float
+        Longitude of the starting point.
+    network : LoadedNetwork
+        The network to plan on.
+    get_trains : callable
+        Gets the upcoming trains at a station from its id, e.g.
+        `lambda stop_id: client.get_upcoming_trains(stop_id, line_name, direction)`.
+    get_departure : callable
+        Gets the time a train leaves its station.
+    now : datetime, optional
+        The time the trip starts. If None, the current time.
+        Defaults to None.
+    k : int, optional
+        The number of nearest stations to consider.
+        Defaults to 5.
+    max_miles : float, optional
+        Stations further away than this many miles are not considered.
+        Defaults to `MAX_DISTANCE_MILES`.
+    walking_speed_mph : float, optional
+        The walking speed in miles per hour.
+        Defaults to `WALKING_SPEED_MPH`.
+
+    Returns
+    -------
+    TripPlan or None
+        The plan, or None if no train at any of the stations can be caught.
+
+    Raises
+    ------
+    ValueError
+        If k is less than 1, or the latitude or longitude is not finite.
+    Exception
+        The error of `get_trains` for the nearest station, if the trains of every
+        station fail to load.
+    """
+
+    if now is None:
+        now = datetime.now()
+
+    station_idx, station_miles = network.index.k_nearest(lat, lon, k, max_miles=max_miles)
+    if len(station_idx) == 0:
+        return None
+
+    def fetch(stop_id: str) -> list[Any] | BaseException:
+        try:
+            return list(get_trains(stop_id))
+        except Exception as e:  # noqa: BLE001, reported by _drop_failed_stations
+            return e
+
+    # fetch the trains of every station concurrently, they are independent requests
+    stop_ids = network.stop_ids
+    station_stop_ids = [stop_ids[i] for i in station_idx.tolist()]
+    if len(station_stop_ids) == 1:
+        results = [fetch(station_stop_ids[0])]
+    else:
+        results = list(_get_executor().map(fetch, station_stop_ids))
+    station_idx, station_miles, station_trains = _drop_failed_stations(station_idx, station_miles, results)
+
+    return _best_plan(station_idx, station_miles, station_trains, get_departure, now, walking_speed_mph)
+
+
+async def plan_trip_async(
+    lat: float,
+    lon: float,
+    network: LoadedNetwork,
+    get_trains: Callable[[str], Awaitable[Iterable[Any]]],
+    get_departure: Callable[[Any], datetime],
+    now: datetime | None = None,
+    k: int = 5,
+    max_miles: float = MAX_DISTANCE_MILES,
+    walking_speed_mph: float = WALKING_SPEED_MPH,
+) -> TripPlan | None:
+    """
+    Find the earliest train that can be caught from any of the nearest stations, without blocking.
+
+    Same as `plan_trip`, with the trains of the stations awaited concurrently on
+    the event loop instead of fetched in the planner's thread pool. Stations whose
+    trains fail to load are skipped, as long as the trains of one station load.
+
+    Parameters
+    ----------
+    lat : float
+        Latitude of the starting point.
+    lon : float
+        Longitude of the starting point.
+    network : LoadedNetwork
+        The network to plan on.
+    get_trains : callable
+        Gets the upcoming trains at a station from its id, as a coroutine, e.g.
+        `lambda stop_id: client.get_upcoming_trains(stop_id, line_name, direction)`
+        with an `AsyncSeptaClient`.
+    get_departure : callable
+        Gets the time a train leaves its station.
+    now : datetime, optional
+        The time the trip starts. If None, the current time.
+        Defaults to None.
+    k : int, optional
+        The number of nearest stations to consider.
+        Defaults to 5.
+    max_miles : float, optional
+        Stations further away than this many miles are not considered.
+        Defaults to `MAX_DISTANCE_MILES`.
+    walking_speed_mph : float, optional
+        The walking speed in miles per hour.
+        Defaults to `WALKING_SPEED_MPH`.
+
+    Returns
+    -------
+    TripPlan or None
+        The plan, or None if no train at any of the stations can be caught.
+
+    Raises
+    ------
+    ValueError
+        If k is less than 1, or the latitude or longitude is not finite.
+    Exception
+        The error of `get_trains` for the nearest station, if the trains of every
+        station fail to load.
+    """
+
+    if now is None:
+        now = datetime.now()
+
+    station_idx, station_miles = network.index.k_nearest(lat, lon, k, max_miles=max_miles)
+    if len(station_idx) == 0:
+        return None
+
+    stop_ids = network.stop_ids
+    results = await asyncio.gather(*(get_trains(stop_ids[i]) for i in station_idx.tolist()), return_exceptions=True)
+    station_idx, station_miles, station_trains = _drop_failed_stations(
+        station_idx,
+        station_miles,
+        [result if isinstance(result, BaseException) else list(result) for result in results],
+    )
+    return _best_plan(station_idx, station_miles, station_trains, get_departure, now, walking_speed_mph)
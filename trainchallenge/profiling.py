@@ -0,0 +1,227 @@
+import os
+import subprocess
+import sys
+import time
+
+from collections.abc import Iterable
+from collections.abc import Sequence
+from dataclasses import asdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from trainchallenge.networks import NetworkRegistry
+from trainchallenge.networks import registry as default_registry
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    """
+    The import cost of a module, as reported by `python -X importtime`.
+
+    Parameters
+    ----------
+    module : str
+        The fully qualified module name.
+    self_seconds : float
+        The time spent importing the module itself.
+    cumulative_seconds : float
+        The time spent importing the module and the modules it imported first.
+    depth : int
+        The nesting level of the import, 0 for the modules imported directly.
+    """
+
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+
+@dataclass(frozen=True)
+class DatasetTiming:
+    """
+    The load time of the stations of a network and of the structures built over them.
+
+    Parameters
+    ----------
+    network : str
+        The key of the network.
+    stations : int
+        The number of stations.
+    load_seconds : float
+        The time spent loading the stations and building the nearest station index.
+    grid_seconds : float
+        The time spent loading or building the nearest station grid.
+    features_seconds : float
+        The time spent encoding the GeoJSON features.
+    imported : list of str
+        The public top-level packages first imported while loading, whose import
+        time is part of the load time.
+    """
+
+    network: str
+    stations: int
+    load_seconds: float
+    grid_seconds: float
+    features_seconds: float
+    imported: list[str]
+
+
+def parse_importtime(lines: Iterable[str]) -> list[ImportTiming]:
+    """
+    Parse the output of `python -X importtime`.
+
+    Parameters
+    ----------
+    lines : iterable of str
+        The lines written to stderr, other lines are skipped.
+
+    Returns
+    -------
+    list of ImportTiming
+        The import cost of each module, in import completion order.
+    """
+
+    timings = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        # the header line has column names instead of numbers
+        if not self_us.strip().isdigit():
+            continue
+        module = name.rstrip()
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        timings.append(ImportTiming(module.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return timings
+
+
+def profile_imports(modules: Sequence[str], paths: Sequence[Path] = ()) -> list[ImportTiming]:
+    """
+    Measure the cost of importing modules in a fresh interpreter.
+
+    Parameters
+    ----------
+    modules : sequence of str
+        The modules to import, in order.
+    paths : sequence of Path, optional
+        Directories prepended to the module search path, e.g. the function app
+        folder.
+        Defaults to no extra directories.
+
+    Returns
+    -------
+    list of ImportTiming
+        The import cost of each module imported, including the dependencies.
+
+    Raises
+    ------
+    RuntimeError
+        If importing the modules fails.
+    """
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([*map(str, paths), *filter(None, [env.get("PYTHONPATH")])])
+    statement = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(  # noqa: S603, runs this interpreter
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode
+        raise RuntimeError(f"Importing {', '.join(modules)} failed: {error}")
+    return parse_importtime(result.stderr.splitlines())
+
+
+def profile_dataset_loads(
+    networks: Sequence[str] | None = None, registry: NetworkRegistry = default_registry
+) -> list[DatasetTiming]:
+    """
+    Measure the load time of the stations of networks, as on the first request.
+
+    Networks that are already loaded are unloaded and loaded again.
+
+    Parameters
+    ----------
+    networks : sequence of str, optional
+        The keys of the networks.
+        Defaults to None, for every network of the registry.
+    registry : NetworkRegistry, optional
+        The registry of the networks.
+        Defaults to the registry of `trainchallenge.networks`.
+
+    Returns
+    -------
+    list of DatasetTiming
+        The load time of each network.
+    """
+
+    timings = []
+    for key in networks or list(registry):
+        registry.unload(key)
+        before = {name.partition(".")[0] for name in sys.modules}
+
+        start = time.perf_counter()
+        loaded = registry.load(key)
+        loaded_at = time.perf_counter()
+        _ = loaded.grid
+        grid_at = time.perf_counter()
+        _ = loaded.features
+        features_at = time.perf_counter()
+
+        imported = sorted(
+            name for name in {name.partition(".")[0] for name in sys.modules} - before if not name.startswith("_")
+        )
+        timings.append(
+            DatasetTiming(
+                key, len(loaded.stations), loaded_at - start, grid_at - loaded_at, features_at - grid_at, imported
+            )
+        )
+    return timings
+
+
+def startup_report(
+    modules: Sequence[str] = ("trainchallenge",),
+    paths: Sequence[Path] = (),
+    networks: Sequence[str] | None = None,
+    registry: NetworkRegistry = default_registry,
+) -> dict[str, Any]:
+    """
+    Profile a cold start: the imports in a fresh interpreter, then the dataset loads.
+
+    Parameters
+    ----------
+    modules : sequence of str, optional
+        The modules imported on startup.
+        Defaults to `trainchallenge`.
+    paths : sequence of Path, optional
+        Directories prepended to the module search path.
+        Defaults to no extra directories.
+    networks : sequence of str, optional
+        The keys of the networks to load.
+        Defaults to None, for every network of the registry.
+    registry : NetworkRegistry, optional
+        The registry of the networks.
+        Defaults to the registry of `trainchallenge.networks`.
+
+    Returns
+    -------
+    dict of str to Any
+        The JSON serializable report, with the total import time, the import
+        cost of every module, sorted by self time, and the load time of each
+        network.
+    """
+
+    imports = profile_imports(modules, paths)
+    datasets = profile_dataset_loads(networks, registry)
+    return {
+        "python": sys.version.split()[0],
+        "modules": list(modules),
+        "import_seconds": sum(t.cumulative_seconds for t in imports if t.depth == 0),
+        "load_seconds": sum(t.load_seconds + t.grid_seconds + t.features_seconds for t in datasets),
+        "imports": [asdict(t) for t in sorted(imports, key=lambda t: t.self_seconds, reverse=True)],
+        "datasets": [asdict(t) for t in datasets],
+    }
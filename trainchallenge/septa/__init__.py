@@ -1,6 +1,32 @@
+from trainchallenge.septa import arrivals_board
+from trainchallenge.septa import circuit_breaker
 from trainchallenge.septa import load_data
+from trainchallenge.septa import schedule
 from trainchallenge.septa import septa_api
+from trainchallenge.septa.arrivals_board import ArrivalsBoard
+from trainchallenge.septa.circuit_breaker import CircuitBreaker
+from trainchallenge.septa.load_data import build_regional_rail_snapshot
 from trainchallenge.septa.load_data import load_regional_rail_data
+from trainchallenge.septa.load_data import load_regional_rail_grid
+from trainchallenge.septa.load_data import load_regional_rail_stations
+from trainchallenge.septa.schedule import AsyncFallbackSeptaArrivals
+from trainchallenge.septa.schedule import FallbackSeptaArrivals
+from trainchallenge.septa.schedule import ScheduledSeptaArrivals
 
 
-__all__ = ["load_data", "load_regional_rail_data", "septa_api"]
+__all__ = [
+    "ArrivalsBoard",
+    "AsyncFallbackSeptaArrivals",
+    "CircuitBreaker",
+    "FallbackSeptaArrivals",
+    "ScheduledSeptaArrivals",
+    "arrivals_board",
+    "build_regional_rail_snapshot",
+    "circuit_breaker",
+    "load_data",
+    "load_regional_rail_data",
+    "load_regional_rail_grid",
+    "load_regional_rail_stations",
+    "schedule",
+    "septa_api",
+]
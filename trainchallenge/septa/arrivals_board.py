@@ -0,0 +1,279 @@
+import logging
+import threading
+import time
+
+from collections.abc import Iterable
+from typing import Any
+from typing import Literal
+
+from trainchallenge.septa.septa_api import SeptaClient
+
+
+logger = logging.getLogger(__name__)
+
+directions: tuple[Literal["N", "S"], ...] = ("N", "S")
+
+
+def index_arrivals(rj: Any, direction: Literal["N", "S"]) -> dict[str, list[Any]]:
+    """
+    Index an Arrivals API response by line, with each line's trains in schedule order.
+
+    Parameters
+    ----------
+    rj : Any
+        The parsed JSON response of the SEPTA Arrivals API for a station.
+    direction : str
+        The direction the response is for, either nortbound or southbound ("N", "S")
+
+    Returns
+    -------
+    dict of str to list
+        The trains of each line, earliest scheduled first.
+    """
+
+    train_list = next(iter(rj.values()), [])
+    if len(train_list) == 0:
+        return {}
+    train_list = train_list[0]["Northbound" if direction == "N" else "Southbound"]
+
+    by_line: dict[str, list[Any]] = {}
+    # the zero-padded date format sorts as text in time order
+    for train in sorted(train_list, key=lambda t: t["sched_time"]):
+        by_line.setdefault(train["line"], []).append(train)
+    return by_line
+
+
+class ArrivalsBoard:
+    """
+    In-memory board of upcoming arrivals at SEPTA stations, refreshed in the background.
+
+    A background thread periodically fetches the arrivals at the board's stations,
+    most queried stations first, and keeps them indexed by stop id, direction and
+    line. Lookups are served from the board while it is fresh enough, and fall back
+    to a live call to SEPTA otherwise.
+
+    Parameters
+    ----------
+    client : SeptaClient
+        The client used to fetch arrivals.
+    stop_ids : iterable of str
+        The stations to keep on the board.
+    refresh_interval : float, optional
+        Seconds between refresh cycles.
+        Defaults to 30 seconds.
+    max_fetches_per_cycle : int, optional
+        The maximum number of (station, direction) pairs fetched per refresh cycle,
+        bounding the load on SEPTA.
+        Defaults to 20.
+    max_staleness : float, optional
+        Board entries older than this many seconds are not served.
+        Defaults to 90 seconds.
+    """
+
+    def __init__(
+        self,
+        client: SeptaClient,
+        stop_ids: Iterable[str],
+        refresh_interval: float = 30,
+        max_fetches_per_cycle: int = 20,
+        max_staleness: float = 90,
+    ):
+        self.client = client
+        self.stop_ids = list(dict.fromkeys(stop_ids))
+        self.refresh_interval = refresh_interval
+        self.max_fetches_per_cycle = max_fetches_per_cycle
+        self.max_staleness = max_staleness
+
+        self._lock = threading.Lock()
+        # (stop_id, direction) -> (fetched at, trains by line)
+        self._board: dict[tuple[str, str], tuple[float, dict[str, list[Any]]]] = {}
+        # decaying count of recent queries per (stop_id, direction)
+        self._query_counts: dict[tuple[str, str], float] = {}
+        # rotates through the stations nobody has queried recently
+        self._next_idle = 0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record_query(self, stop_id: str, direction: Literal["N", "S"]) -> None:
+        """
+        Record a query for a station, raising its refresh priority.
+
+        Parameters
+        ----------
+        stop_id : str
+            The SEPTA stop id of the station.
+        direction : str
+            Which direction the query is for, either nortbound or southbound ("N", "S")
+        """
+        key = (stop_id, direction)
+        with self._lock:
+            self._query_counts[key] = self._query_counts.get(key, 0.0) + 1.0
+
+    def _refresh_order(self) -> list[tuple[str, str]]:
+        """Pick the (stop_id, direction) pairs to fetch this cycle, most queried first."""
+        with self._lock:
+            queried = sorted(self._query_counts, key=lambda k: -self._query_counts[k])
+            # halve the counts every cycle so the priorities follow recent traffic
+            self._query_counts = {k: v / 2 for k, v in self._query_counts.items() if v >= 0.05}
+
+            order = queried[: self.max_fetches_per_cycle]
+            # fill the rest of the budget by rotating through the other stations
+            pairs = [(stop_id, d) for stop_id in self.stop_ids for d in directions]
+            for _ in range(len(pairs)):
+                if len(order) >= self.max_fetches_per_cycle:
+                    break
+                pair = pairs[self._next_idle % len(pairs)]
+                self._next_idle += 1
+                if pair not in order:
+                    order.append(pair)
+        return order
+
+    def refresh_once(self) -> int:
+        """
+        Run one refresh cycle.
+
+        Returns
+        -------
+        int
+            The number of (station, direction) pairs successfully refreshed.
+        """
+
+        refreshed = 0
+        for stop_id, direction in self._refresh_order():
+            if self._stop_event.is_set():
+                break
+            try:
+                # stale responses would look fresh on the board, which keeps its own
+                rj = self.client.get_arrivals(stop_id, direction, allow_stale=False)  # type: ignore[arg-type]
+                self.update(stop_id, direction, rj)  # type: ignore[arg-type]
+                refreshed += 1
+            except (RuntimeError, KeyError, IndexError, ValueError, AttributeError) as e:
+                logger.warning("Failed to refresh arrivals for %s %s: %s", stop_id, direction, e)
+        return refreshed
+
+    def update(self, stop_id: str, direction: Literal["N", "S"], rj: Any) -> None:
+        """
+        Put an Arrivals API response on the board.
+
+        Parameters
+        ----------
+        stop_id : str
+            The SEPTA stop id of the station.
+        direction : str
+            The direction the response is for, either nortbound or southbound ("N", "S")
+        rj : Any
+            The parsed JSON response of the SEPTA Arrivals API.
+        """
+        by_line = index_arrivals(rj, direction)
+        with self._lock:
+            self._board[(stop_id, direction)] = (time.monotonic(), by_line)
+
+    def get_board_arrivals(self, stop_id: str, direction: Literal["N", "S"]) -> dict[str, list[Any]] | None:
+        """
+        Get the trains at a station from the board, if the board is fresh enough.
+
+        Parameters
+        ----------
+        stop_id : str
+            The SEPTA stop id of the station.
+        direction : str
+            Which direction the trains are traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        dict of str to list or None
+            The trains of each line, earliest scheduled first, or None if the station
+            is not on the board or its entry is older than `max_staleness`.
+        """
+        entry = self._board.get((stop_id, direction))
+        if entry is None or time.monotonic() - entry[0] > self.max_staleness:
+            return None
+        return entry[1]
+
+    def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+        """
+        Get the upcoming trains at a given station going in a particular direction
+        on a particular line.
+
+        The board is used when it is fresh enough, otherwise the arrivals are fetched
+        live and put on the board.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        list
+            The JSON objects with the train data, earliest scheduled first.
+
+        Raises
+        ------
+        RuntimeError
+            If the board misses and the live request to SEPTA fails.
+        """
+
+        self.record_query(stop_id, direction)
+        by_line = self.get_board_arrivals(stop_id, direction)
+        if by_line is None:
+            rj = self.client.get_arrivals(stop_id, direction, allow_stale=False)
+            self.update(stop_id, direction, rj)
+            by_line = index_arrivals(rj, direction)
+        return by_line.get(line_name, [])
+
+    def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the next arriving train at a given station going in a particular direction
+        on a particular line.
+
+        The board is used when it is fresh enough, otherwise the arrivals are fetched
+        live and put on the board.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any
+            A JSON object with the train data
+
+        Raises
+        ------
+        RuntimeError
+            If the board misses and the live request to SEPTA fails.
+        """
+        trains = self.get_upcoming_trains(stop_id, line_name, direction)
+        return trains[0] if trains else None
+
+    def _run(self) -> None:
+        """Refresh the board until stopped."""
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            self.refresh_once()
+            self._stop_event.wait(max(self.refresh_interval - (time.monotonic() - started), 0))
+
+    def start(self) -> "ArrivalsBoard":
+        """Start refreshing the board on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="septa-arrivals-board", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop refreshing the board."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,152 @@
+import threading
+import time
+
+from collections import deque
+from typing import Literal
+
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker tracking the failure rate of calls to an upstream service.
+
+    While closed, calls go through and their outcomes are tracked over a sliding
+    window. Once at least `min_calls` of the last `window_size` calls were made
+    and the share of failures reaches `failure_rate_threshold`, the circuit opens
+    and calls fail fast, without reaching the upstream, for `reset_timeout`
+    seconds. The circuit then turns half open and lets a single probe call
+    through: it closes again if the probe succeeds, and opens for another
+    `reset_timeout` if it fails. The breaker is safe to use from multiple threads.
+
+    Parameters
+    ----------
+    failure_rate_threshold : float, optional
+        The share of failed calls in the window that opens the circuit, between 0
+        and 1.
+        Defaults to 0.5.
+    window_size : int, optional
+        The number of most recent calls whose outcome is tracked.
+        Defaults to 20.
+    min_calls : int, optional
+        The minimum number of tracked calls before the circuit can open, so a few
+        early failures do not open it.
+        Defaults to 5.
+    reset_timeout : float, optional
+        Seconds the circuit stays open before a probe call is let through.
+        Defaults to 30 seconds.
+
+    Raises
+    ------
+    ValueError
+        If failure_rate_threshold is not in (0, 1], window_size or min_calls is
+        less than 1, min_calls is more than window_size, or reset_timeout is not
+        positive.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError(f"Invalid failure_rate_threshold: {failure_rate_threshold}. Must be in (0, 1].")
+        if window_size < 1:
+            raise ValueError(f"Invalid window_size: {window_size}. Must be at least 1.")
+        if not 1 <= min_calls <= window_size:
+            raise ValueError(f"Invalid min_calls: {min_calls}. Must be from 1 to window_size.")
+        if reset_timeout <= 0:
+            raise ValueError(f"Invalid reset_timeout: {reset_timeout}. Must be positive.")
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        # outcome of the most recent calls while closed, True for a failure
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        """The state of the circuit, "half_open" once an open circuit is due for a probe."""
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> CircuitState:
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or now >= self._opened_at + self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def failure_rate(self) -> float:
+        """The share of failed calls in the window, 0 without any call."""
+        with self._lock:
+            return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def allow(self) -> bool:
+        """
+        Whether a call can go through now.
+
+        A call that is allowed must then be reported with `record_success` or
+        `record_failure`, as the probe of a half open circuit holds it half open
+        until it is reported.
+
+        Returns
+        -------
+        bool
+            True while the circuit is closed, and for the single probe call of a
+            half open circuit, False otherwise.
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Report a successful call, closing a half open circuit."""
+        with self._lock:
+            if self._opened_at is not None:
+                # calls let through before the circuit opened may finish late, only
+                # the probe decides whether it closes
+                if not self._probing:
+                    return
+                self._opened_at = None
+                self._probing = False
+                self._outcomes.clear()
+            self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        """Report a failed call, opening the circuit if the failure rate is too high."""
+        with self._lock:
+            now = time.monotonic()
+            if self._opened_at is not None:
+                # the probe failed, stay open for another reset timeout
+                if self._probing:
+                    self._opened_at = now
+                    self._probing = False
+                return
+            self._outcomes.append(True)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate_threshold
+            ):
+                self._opened_at = now
+
+    def reset(self) -> None:
+        """Close the circuit and forget the tracked calls."""
+        with self._lock:
+            self._opened_at = None
+            self._probing = False
+            self._outcomes.clear()
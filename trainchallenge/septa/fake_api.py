@@ -0,0 +1,186 @@
+import json
+import random
+import threading
+import time
+
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import TYPE_CHECKING
+from typing import Any
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+from trainchallenge.septa.septa_api import septa_date_format
+
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+default_lines = ("Airport", "Paoli/Thorndale", "Trenton", "Warminster")
+
+
+def make_fake_arrivals(stop_id: str, direction: str, now: datetime | None = None) -> Any:
+    """
+    Build a SEPTA Arrivals API style response for a station.
+
+    Every line in `default_lines` has two trains, a few minutes apart, in the
+    requested direction.
+
+    Parameters
+    ----------
+    stop_id : str
+        The SEPTA stop id of the station.
+    direction : str
+        Which direction the trains are traveling in, either "N" or "S".
+    now : datetime, optional
+        The time the trains are scheduled relative to. If None, the current time.
+        Defaults to None.
+
+    Returns
+    -------
+    Any
+        The JSON response body.
+    """
+
+    if now is None:
+        now = datetime.now()
+    direction_key = "Northbound" if direction == "N" else "Southbound"
+    trains = [
+        {
+            "direction": direction,
+            "train_id": f"{stop_id}{line_idx}{i}",
+            "line": line,
+            "sched_time": (now + timedelta(minutes=5 + 3 * line_idx + 20 * i)).strftime(septa_date_format),
+            "status": "On Time",
+        }
+        for line_idx, line in enumerate(default_lines)
+        for i in range(2)
+    ]
+    return {f"{stop_id} Departures: {now:%B %d, %Y, %I:%M %p}": [{direction_key: trains}]}
+
+
+class FakeSeptaServer:
+    """
+    A local HTTP server imitating the SEPTA Arrivals API, for tests and load tests.
+
+    The server runs on a background thread. Use it as a context manager, and point
+    a `SeptaClient` at `url`.
+
+    Parameters
+    ----------
+    arrivals : callable, optional
+        Builds the response body from the stop id and direction.
+        Defaults to `make_fake_arrivals`.
+    host : str, optional
+        The interface to listen on.
+        Defaults to "127.0.0.1".
+    port : int, optional
+        The port to listen on, 0 picks a free port.
+        Defaults to 0.
+    latency : float, optional
+        The mean time in seconds the server takes to answer, exponentially
+        distributed like the long tail of a real upstream.
+        Defaults to 0.
+    error_rate : float, optional
+        The fraction of requests answered with a 503 error.
+        Defaults to 0.
+    seed : int, optional
+        Seed of the latency and error draws, for reproducible runs.
+        Defaults to None.
+    """
+
+    def __init__(
+        self,
+        arrivals: Callable[[str, str], Any] = make_fake_arrivals,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        if latency < 0:
+            raise ValueError(f"Invalid latency: {latency}. Must be at least 0.")
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f"Invalid error_rate: {error_rate}. Must be between 0 and 1.")
+
+        self.arrivals = arrivals
+        self.latency = latency
+        self.error_rate = error_rate
+        self.errors = 0
+        self._random = random.Random(seed)  # noqa: S311, simulation only
+        self.requests: Counter[tuple[str, str]] = Counter()
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                stop_id = query.get("station", [""])[0]
+                direction = query.get("direction", ["N"])[0]
+                server.record_request(stop_id, direction)
+                server.respond(self, stop_id, direction)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """The URL of the fake Arrivals API endpoint."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/Arrivals/index.php"
+
+    def record_request(self, stop_id: str, direction: str) -> None:
+        """Count a request for a station and direction."""
+        with self._lock:
+            self.requests[(stop_id, direction)] += 1
+
+    def respond(self, handler: BaseHTTPRequestHandler, stop_id: str, direction: str) -> None:
+        """Write the response to a request, after the simulated latency."""
+
+        with self._lock:
+            delay = self._random.expovariate(1 / self.latency) if self.latency > 0 else 0.0
+            is_error = self._random.random() < self.error_rate
+            if is_error:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+
+        if is_error:
+            handler.send_error(503, "Service Unavailable")
+            return
+
+        body = json.dumps(self.arrivals(stop_id, direction)).encode("utf-8")
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self) -> "Self":
+        """Start serving on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "Self":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
@@ -1,21 +1,116 @@
-import tempfile
 import zipfile
 
 from pathlib import Path
+from typing import IO
+from typing import TYPE_CHECKING
 
-import geopandas as gpd
+import numpy as np
+import shapely
 
-from lxml import html
+from trainchallenge.common.snapshot import get_snapshot_pth
+from trainchallenge.common.snapshot import read_station_grid
+from trainchallenge.common.snapshot import read_station_snapshot
+from trainchallenge.common.snapshot import read_station_table
+from trainchallenge.common.snapshot import write_station_snapshot
+from trainchallenge.common.station_grid import StationGrid
+from trainchallenge.common.station_index import NearestStationIndex
+from trainchallenge.common.station_table import StationTable
 
-from trainchallenge.common import get_next_after_match
 
+if TYPE_CHECKING:
+    import geopandas as gpd
 
-def load_regional_rail_data(kmz_pth: Path | None = None) -> gpd.GeoDataFrame:
+
+default_kmz_pth = Path(__file__).parent / "data" / "SEPTARegionalRailStations2016.kmz"
+
+kml_ns = "http://www.opengis.net/kml/2.2"
+
+# Types of the station attributes in the placemark descriptions, the rest are strings
+attribute_dtypes = {"Latitude": np.float64, "Longitude": np.float64}
+
+
+def parse_description(description: str) -> dict[str, str]:
+    """
+    Parse the attribute table in the HTML description of a placemark.
+
+    Parameters
+    ----------
+    description : str
+        The HTML description of the placemark.
+
+    Returns
+    -------
+    dict of str to str
+        The attribute names and values, in table order.
+    """
+
+    from lxml import html
+
+    # attributes are the rows of the inner table with a name cell and a value cell
+    rows = html.fromstring(description).xpath("//tr[count(td) = 2]")
+    return {row[0].text_content().strip(): row[1].text_content().strip() for row in rows}
+
+
+def read_kml_placemarks(kml: IO[bytes]) -> "gpd.GeoDataFrame":
+    """
+    Read the point placemarks of a KML document in a single streaming pass.
+
+    Placemarks without a point, such as lines or polygons, are skipped.
+
+    Parameters
+    ----------
+    kml : file-like object
+        The KML document, opened in binary mode.
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+        A GeoDataFrame with the `Name` and `Description` of each placemark, a
+        typed column for each attribute in the descriptions, and the placemark
+        points as the geometry.
+    """
+
+    # only needed to parse the raw data, the snapshot loads without them
+    import geopandas as gpd
+    import pandas as pd
+
+    from lxml import etree
+
+    names = []
+    descriptions = []
+    attributes = []
+    coords = []
+    for _, placemark in etree.iterparse(kml, tag=f"{{{kml_ns}}}Placemark"):
+        point = placemark.findtext(f".//{{{kml_ns}}}Point/{{{kml_ns}}}coordinates")
+        # lines, polygons and other placemarks without a point are not stations
+        if point is not None:
+            description = placemark.findtext(f"{{{kml_ns}}}description", default="")
+            names.append(placemark.findtext(f"{{{kml_ns}}}name", default=""))
+            descriptions.append(description)
+            attributes.append(parse_description(description) if description else {})
+            coords.append(point.split(","))
+        # free the parsed placemark, only the extracted values are kept
+        placemark.clear()
+        while placemark.getprevious() is not None:
+            del placemark.getparent()[0]
+
+    data = pd.DataFrame.from_records(attributes)
+    for col, dtype in attribute_dtypes.items():
+        if col in data.columns:
+            data[col] = data[col].astype(dtype)
+    data.insert(0, "Name", names)
+    data.insert(1, "Description", descriptions)
+
+    geometry = shapely.points(np.array(coords, dtype=np.float64).reshape(len(coords), -1 if coords else 2))
+    return gpd.GeoDataFrame(data, geometry=geometry, crs="EPSG:4326")
+
+
+def load_regional_rail_data(kmz_pth: Path | None = None, use_snapshot: bool = False) -> "gpd.GeoDataFrame":
     """
     Load the SEPTA Regional Rail data from a KMZ file and return it as a GeoDataFrame.
 
-    The function extracts the KMZ file, processes the KML data, and parses specific
-    fields such as `stop_id` and `station_name` from the description.
+    The KML document is streamed from the KMZ file and parsed in a single pass,
+    parsing the description of each station once to get all of its attributes.
 
     Parameters
     ----------
@@ -26,12 +121,19 @@ def load_regional_rail_data(kmz_pth: Path | None = None) -> gpd.GeoDataFrame:
         The default location is the `data` directory relative to the module's
         location.
         The file is named `SEPTARegionalRailStations2016.kmz`.
+    use_snapshot : bool, optional
+        Whether to load from the precompiled snapshot next to the KMZ file
+        (see `build_regional_rail_snapshot`). The raw KMZ file is used instead if
+        the snapshot is missing or was compiled from a different KMZ file.
+        Defaults to False.
 
     Returns
     -------
     geopandas.GeoDataFrame
-        A GeoDataFrame containing the SEPTA Regional Rail data with additional
-        columns for `stop_id` and `station_name`.
+        A GeoDataFrame containing the SEPTA Regional Rail data, with a column for
+        each station attribute in the KML descriptions (e.g. `Line_Name`, `Zip`,
+        `Latitude`) and additional columns for `stop_id` and `station_name`. When loaded from a snapshot,
+        only the `stop_id`, `station_name` and `geometry` columns are present.
 
     Raises
     ------
@@ -41,24 +143,121 @@ def load_regional_rail_data(kmz_pth: Path | None = None) -> gpd.GeoDataFrame:
 
     # check that the kmz file exists
     if kmz_pth is None:
-        kmz_pth = Path(__file__).parent / "data" / "SEPTARegionalRailStations2016.kmz"
+        kmz_pth = default_kmz_pth
     if not kmz_pth.exists():
         raise FileNotFoundError(f"SEPTA data file not found: {kmz_pth}")
 
-    # create a temporary directory to hold extracted files
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        # Open the KMZ file and extract its contents
-        with zipfile.ZipFile(kmz_pth, "r") as kmz:
-            kmz.extractall(tmp_dir)
+    # use the precompiled snapshot if it is up to date
+    if use_snapshot:
+        septa_data = read_station_snapshot(get_snapshot_pth(kmz_pth), kmz_pth)
+        if septa_data is not None:
+            return septa_data
 
-        # Load the SEPTA data
-        septa_data = gpd.read_file(tmp_dir + "/doc.kml", driver="libkml")
+    # stream the KML document straight out of the KMZ file
+    with zipfile.ZipFile(kmz_pth, "r") as kmz, kmz.open("doc.kml") as kml:
+        septa_data = read_kml_placemarks(kml)
 
-    septa_data["stop_id"] = septa_data["Description"].apply(
-        lambda x: get_next_after_match(html.fromstring(x).xpath("//tr/td/text()"), "Stop_ID")
-    )
-    septa_data["station_name"] = septa_data["Description"].apply(
-        lambda x: get_next_after_match(html.fromstring(x).xpath("//tr/td/text()"), "Station_Na")
-    )
+    septa_data["stop_id"] = septa_data["Stop_ID"]
+    septa_data["station_name"] = septa_data["Station_Na"]
 
     return septa_data
+
+
+def load_regional_rail_stations(kmz_pth: Path | None = None, use_snapshot: bool = False) -> StationTable:
+    """
+    Load the SEPTA Regional Rail stations as a compact `StationTable`.
+
+    Only the stop ids, station names and coordinates are kept. From an up to date
+    snapshot the table is read directly, without building a GeoDataFrame.
+
+    Parameters
+    ----------
+    kmz_pth : Path, optional
+        The path to the KMZ file. If None, the default location is used.
+        Defaults to None.
+    use_snapshot : bool, optional
+        Whether to load from the precompiled snapshot next to the KMZ file (see
+        `build_regional_rail_snapshot`), falling back to the raw KMZ file.
+        Defaults to False.
+
+    Returns
+    -------
+    StationTable
+        The stations, with the `stop_id` and `station_name` of each station.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the specified KMZ file does not exist.
+    """
+
+    if kmz_pth is None:
+        kmz_pth = default_kmz_pth
+
+    if use_snapshot and kmz_pth.exists():
+        table = read_station_table(get_snapshot_pth(kmz_pth), kmz_pth, "stop_id", "station_name")
+        if table is not None:
+            return table
+
+    return StationTable.from_geodataframe(load_regional_rail_data(kmz_pth), "stop_id", "station_name")
+
+
+def build_regional_rail_snapshot(kmz_pth: Path | None = None, snapshot_pth: Path | None = None) -> Path:
+    """
+    Compile the SEPTA Regional Rail data into a snapshot for fast loading.
+
+    Parameters
+    ----------
+    kmz_pth : Path, optional
+        The path to the KMZ file. If None, the default location is used.
+        Defaults to None.
+    snapshot_pth : Path, optional
+        The path to write the snapshot to. If None, the snapshot is written next
+        to the KMZ file, where `load_regional_rail_data` looks for it.
+        Defaults to None.
+
+    Returns
+    -------
+    Path
+        The path the snapshot was written to.
+    """
+
+    if kmz_pth is None:
+        kmz_pth = default_kmz_pth
+    if snapshot_pth is None:
+        snapshot_pth = get_snapshot_pth(kmz_pth)
+
+    septa_data = load_regional_rail_data(kmz_pth)
+    write_station_snapshot(snapshot_pth, septa_data, kmz_pth, "stop_id", "station_name")
+
+    return snapshot_pth
+
+
+def load_regional_rail_grid(index: NearestStationIndex, kmz_pth: Path | None = None) -> StationGrid:
+    """
+    Load the nearest station grid of the SEPTA Regional Rail stations.
+
+    The grid precomputed in the snapshot (see `build_regional_rail_snapshot`) is used when it is
+    up to date, otherwise the grid is built from the index.
+
+    Parameters
+    ----------
+    index : NearestStationIndex
+        The index of the stations, as loaded by `load_regional_rail_data`.
+    kmz_pth : Path, optional
+        The path to the KMZ file. If None, the default location is used.
+        Defaults to None.
+
+    Returns
+    -------
+    StationGrid
+        The grid over the stations.
+    """
+
+    if kmz_pth is None:
+        kmz_pth = default_kmz_pth
+
+    grid = read_station_grid(get_snapshot_pth(kmz_pth), kmz_pth, index)
+    if grid is None:
+        grid = StationGrid.build(index)
+    return grid
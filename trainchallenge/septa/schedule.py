@@ -0,0 +1,325 @@
+import logging
+
+from datetime import datetime
+from typing import Any
+from typing import Literal
+from typing import Protocol
+
+from trainchallenge.gtfs.departures import Departure
+from trainchallenge.gtfs.departures import DepartureEngine
+from trainchallenge.septa.septa_api import septa_date_format
+
+
+logger = logging.getLogger(__name__)
+
+# GTFS direction id of the trains going in each Arrivals API direction. Feeds
+# differ in how they number directions, so this is only a default, which can be
+# overridden per `ScheduledSeptaArrivals`
+septa_direction_ids: dict[str, int] = {"N": 0, "S": 1}
+
+
+def departure_to_train(departure: Departure, line_name: str, direction: Literal["N", "S"]) -> dict[str, Any]:
+    """
+    Convert a scheduled departure to a train in the format of the Arrivals API.
+
+    Parameters
+    ----------
+    departure : Departure
+        The scheduled departure.
+    line_name : str
+        The SEPTA train line name
+    direction : str
+        Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+    Returns
+    -------
+    dict
+        The train data, with a `status` of "Scheduled" as there is no realtime
+        information.
+    """
+    return {
+        "direction": direction,
+        "train_id": departure.trip_id,
+        "line": line_name,
+        "destination": departure.headsign,
+        "sched_time": departure.departure.strftime(septa_date_format),
+        "status": "Scheduled",
+    }
+
+
+class ScheduledSeptaArrivals:
+    """
+    Next SEPTA train lookups from the GTFS schedule, without calling SEPTA.
+
+    Parameters
+    ----------
+    engine : DepartureEngine
+        The departure engine over the SEPTA Regional Rail GTFS feed.
+    direction_ids : dict of str to int, optional
+        The GTFS direction id of each Arrivals API direction.
+        Defaults to `septa_direction_ids`.
+    max_upcoming : int, optional
+        The number of trains returned by `get_upcoming_trains`.
+        Defaults to 5.
+    """
+
+    def __init__(self, engine: DepartureEngine, direction_ids: dict[str, int] | None = None, max_upcoming: int = 5):
+        self.engine = engine
+        self.direction_ids = septa_direction_ids if direction_ids is None else direction_ids
+        self.max_upcoming = max_upcoming
+
+    def get_next_arrivals(
+        self,
+        stop_id: str,
+        line_name: str,
+        direction: Literal["N", "S"],
+        k: int = 1,
+        after: datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get the next scheduled trains at a given station going in a particular
+        direction on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+        k : int, optional
+            The maximum number of trains to return.
+            Defaults to 1.
+        after : datetime, optional
+            Trains scheduled at or after this time are returned. If None, the
+            current time.
+            Defaults to None.
+
+        Returns
+        -------
+        list of dict
+            Up to `k` trains in the format of the Arrivals API, earliest first.
+            Empty if the station or line is not in the schedule.
+        """
+
+        if stop_id not in self.engine.feed.stop_codes:
+            return []
+        route_ids = self.engine.route_ids_for_line(line_name)
+        if not route_ids:
+            return []
+
+        departures = self.engine.next_departures(
+            stop_id,
+            datetime.now() if after is None else after,
+            k=k,
+            route_ids=route_ids,
+            direction_id=self.direction_ids[direction],
+        )
+        return [departure_to_train(d, line_name, direction) for d in departures]
+
+    def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the next scheduled train at a given station going in a particular
+        direction on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any
+            A JSON object with the train data, or None if there is no train.
+        """
+        trains = self.get_next_arrivals(stop_id, line_name, direction)
+        return trains[0] if trains else None
+
+    def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+        """
+        Get the next `max_upcoming` scheduled trains at a given station going in a
+        particular direction on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        list
+            The JSON objects with the train data, earliest scheduled first.
+        """
+        return self.get_next_arrivals(stop_id, line_name, direction, k=self.max_upcoming)
+
+
+class SeptaArrivals(Protocol):
+    """A source of SEPTA trains, such as `SeptaClient`, `ArrivalsBoard` or `ScheduledSeptaArrivals`."""
+
+    def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None: ...
+
+    def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]: ...
+
+
+class FallbackSeptaArrivals:
+    """
+    Next SEPTA train lookups from the live API, falling back to the schedule.
+
+    When the live lookup fails, for example because SEPTA is down or does not
+    answer within the client timeout, the trains are taken from the GTFS schedule
+    instead.
+
+    Parameters
+    ----------
+    live : SeptaArrivals
+        The live lookups, e.g. a `SeptaClient` or an `ArrivalsBoard`. They raise a
+        RuntimeError when SEPTA cannot be reached.
+    scheduled : ScheduledSeptaArrivals
+        The schedule based lookups.
+    """
+
+    def __init__(self, live: SeptaArrivals, scheduled: ScheduledSeptaArrivals):
+        self.live = live
+        self.scheduled = scheduled
+
+    def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the next arriving train at a given station going in a particular
+        direction on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any
+            A JSON object with the train data, from the schedule if SEPTA could not
+            be reached.
+        """
+        try:
+            return self.live.get_next_arrival(stop_id, line_name, direction)
+        except RuntimeError as e:
+            logger.warning("SEPTA API unavailable, using the schedule for %s %s: %s", stop_id, direction, e)
+            return self.scheduled.get_next_arrival(stop_id, line_name, direction)
+
+    def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+        """
+        Get the upcoming trains at a given station going in a particular direction
+        on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        list
+            The JSON objects with the train data, earliest scheduled first, from the
+            schedule if SEPTA could not be reached.
+        """
+        try:
+            return self.live.get_upcoming_trains(stop_id, line_name, direction)
+        except RuntimeError as e:
+            logger.warning("SEPTA API unavailable, using the schedule for %s %s: %s", stop_id, direction, e)
+            return self.scheduled.get_upcoming_trains(stop_id, line_name, direction)
+
+
+class AsyncSeptaArrivals(Protocol):
+    """An asyncio source of SEPTA trains, such as `AsyncSeptaClient`."""
+
+    async def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None: ...
+
+    async def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]: ...
+
+
+class AsyncFallbackSeptaArrivals:
+    """
+    Asyncio next SEPTA train lookups from the live API, falling back to the schedule.
+
+    Same as `FallbackSeptaArrivals`, for live lookups that are awaited, e.g. an
+    `AsyncSeptaClient` whose timeout budget is shorter than the request deadline,
+    so a slow SEPTA is answered from the schedule instead.
+
+    Parameters
+    ----------
+    live : AsyncSeptaArrivals
+        The live lookups. They raise a RuntimeError when SEPTA cannot be reached.
+    scheduled : ScheduledSeptaArrivals
+        The schedule based lookups.
+    """
+
+    def __init__(self, live: AsyncSeptaArrivals, scheduled: ScheduledSeptaArrivals):
+        self.live = live
+        self.scheduled = scheduled
+
+    async def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the next arriving train at a given station going in a particular
+        direction on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any
+            A JSON object with the train data, from the schedule if SEPTA could not
+            be reached.
+        """
+        try:
+            return await self.live.get_next_arrival(stop_id, line_name, direction)
+        except RuntimeError as e:
+            logger.warning("SEPTA API unavailable, using the schedule for %s %s: %s", stop_id, direction, e)
+            return self.scheduled.get_next_arrival(stop_id, line_name, direction)
+
+    async def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+        """
+        Get the upcoming trains at a given station going in a particular direction
+        on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        list
+            The JSON objects with the train data, earliest scheduled first, from the
+            schedule if SEPTA could not be reached.
+        """
+        try:
+            return await self.live.get_upcoming_trains(stop_id, line_name, direction)
+        except RuntimeError as e:
+            logger.warning("SEPTA API unavailable, using the schedule for %s %s: %s", stop_id, direction, e)
+            return self.scheduled.get_upcoming_trains(stop_id, line_name, direction)
@@ -1,11 +1,597 @@
+import asyncio
+import logging
+import threading
+import time
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Literal
 
-import requests
+from trainchallenge.septa.circuit_breaker import CircuitBreaker
+
+
+if TYPE_CHECKING:
+    import requests
 
 
+logger = logging.getLogger(__name__)
+
 septa_date_format = "%Y-%m-%d %H:%M:%S.%f"
+arrivals_url = "https://www3.septa.org/api/Arrivals/index.php"
+
+
+def parse_next_arrival(rj: Any, line_name: str, direction: Literal["N", "S"]) -> Any | None:
+    """
+    Get the next arriving train on a particular line from an Arrivals API response.
+
+    Parameters
+    ----------
+    rj : Any
+        The parsed JSON response of the SEPTA Arrivals API for a station.
+    line_name : str
+        The SEPTA train line name
+    direction : str
+        Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+    Returns
+    -------
+    Any
+        A JSON object with the train data, or None if there is no train.
+    """
+
+    # parse returned json
+    train_list = next(iter(rj.values()))
+    if len(train_list) == 0:
+        return None
+    if direction == "S":
+        train_list = train_list[0]["Southbound"]
+    elif direction == "N":
+        train_list = train_list[0]["Northbound"]
+
+    train_list = [t for t in train_list if t["line"] == line_name]
+    if len(train_list) == 0:
+        return None
+
+    # get first scheduled (account for multiple trains on the same line). The
+    # zero-padded date format sorts as text in time order, so no parsing is needed
+    return min(train_list, key=lambda t: t["sched_time"])
+
+
+def parse_sched_time(train: Any) -> datetime:
+    """
+    Get the scheduled time of a train from the Arrivals API.
+
+    Parameters
+    ----------
+    train : Any
+        A JSON object with the train data.
+
+    Returns
+    -------
+    datetime
+        The time the train is scheduled at the station.
+    """
+    return datetime.strptime(train["sched_time"], septa_date_format)
+
+
+def parse_upcoming_trains(rj: Any, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+    """
+    Get the upcoming trains on a particular line from an Arrivals API response.
+
+    Parameters
+    ----------
+    rj : Any
+        The parsed JSON response of the SEPTA Arrivals API for a station.
+    line_name : str
+        The SEPTA train line name
+    direction : str
+        Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+    Returns
+    -------
+    list
+        The JSON objects with the train data, earliest scheduled first.
+    """
+
+    train_list = next(iter(rj.values()))
+    if len(train_list) == 0:
+        return []
+    train_list = train_list[0]["Northbound" if direction == "N" else "Southbound"]
+    # the zero-padded date format sorts as text in time order
+    return sorted((t for t in train_list if t["line"] == line_name), key=lambda t: t["sched_time"])
+
+
+def mark_stale(rj: Any, fetched_at: datetime) -> Any:
+    """
+    Mark the trains of an old Arrivals API response as stale.
+
+    Parameters
+    ----------
+    rj : Any
+        The parsed JSON response of the SEPTA Arrivals API for a station.
+    fetched_at : datetime
+        The time the response was received.
+
+    Returns
+    -------
+    Any
+        A copy of the response, with `stale` set to True and `fetched_at` set to
+        the time of the response on every train.
+    """
+    fetched = fetched_at.strftime(septa_date_format)
+    return {
+        title: [
+            {
+                direction: [{**t, "stale": True, "fetched_at": fetched} for t in trains]
+                for direction, trains in group.items()
+            }
+            for group in groups
+        ]
+        for title, groups in rj.items()
+    }
+
+
+class SeptaClient:
+    """
+    Client for the SEPTA Arrivals API.
+
+    Requests go through a persistent connection pool, so repeated calls reuse the
+    TCP/TLS connection to SEPTA. Responses are cached per station and direction
+    for a short time, and concurrent requests for the same station and direction
+    share a single upstream call. The client is safe to use from multiple threads.
+
+    With a circuit breaker, requests fail fast while SEPTA keeps failing, instead
+    of each waiting for the timeout. With a `stale_ttl`, the last response of each
+    station and direction is kept, and served with its trains marked stale (see
+    `mark_stale`) when a request fails or the circuit is open.
+
+    Parameters
+    ----------
+    url : str, optional
+        The Arrivals API endpoint.
+        Defaults to the public SEPTA endpoint.
+    timeout : float, optional
+        The request timeout in seconds.
+        Defaults to 30 seconds.
+    cache_ttl : float, optional
+        How long responses are cached, in seconds. 0 disables the cache.
+        Defaults to 15 seconds.
+    pool_maxsize : int, optional
+        The maximum number of connections kept open to SEPTA.
+        Defaults to 10.
+    session : requests.Session, optional
+        The session to send requests with. If None, a new session is created.
+        Defaults to None.
+    breaker : CircuitBreaker, optional
+        The circuit breaker of the requests to SEPTA.
+        Defaults to None, for no circuit breaker.
+    stale_ttl : float, optional
+        How long the last response of each station and direction can be served
+        when SEPTA fails, in seconds. 0 disables serving stale responses.
+        Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        url: str = arrivals_url,
+        timeout: float = 30,
+        cache_ttl: float = 15,
+        pool_maxsize: int = 10,
+        session: "requests.Session | None" = None,
+        breaker: CircuitBreaker | None = None,
+        stale_ttl: float = 0,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.breaker = breaker
+        self.stale_ttl = stale_ttl
+
+        if session is None:
+            # requests is only imported once a client is created, not on import
+            import requests
+
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+        self._lock = threading.Lock()
+        self._cache: dict[tuple[str, str], tuple[float, Any]] = {}
+        self._in_flight: dict[tuple[str, str], Future] = {}
+        # (stop_id, direction) -> (monotonic time, wall clock time, response) of the last response
+        self._last_good: dict[tuple[str, str], tuple[float, datetime, Any]] = {}
+
+    def _fetch(self, stop_id: str, direction: str) -> Any:
+        """Request the arrivals at a station from SEPTA, bypassing the cache."""
+        import requests
+
+        if self.breaker is not None and not self.breaker.allow():
+            raise RuntimeError("API request failed: circuit open after repeated SEPTA failures")
+
+        params = {"station": stop_id, "direction": direction}
+        ok = False
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            rj = response.json()  # Parse and return the JSON response
+            ok = True
+            return rj
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"API request failed: {e}") from e
+        finally:
+            if self.breaker is not None:
+                if ok:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+
+    def get_stale_arrivals(self, stop_id: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the last response for a station, with its trains marked stale.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        direction : str
+            Which direction the trains are traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any or None
+            The last parsed JSON response of the Arrivals API, marked stale, or None
+            if there is none younger than `stale_ttl`.
+        """
+        last_good = self._last_good.get((stop_id, direction))
+        if last_good is None or time.monotonic() - last_good[0] > self.stale_ttl:
+            return None
+        return mark_stale(last_good[2], last_good[1])
+
+    def get_arrivals(self, stop_id: str, direction: Literal["N", "S"], allow_stale: bool = True) -> Any:
+        """
+        Get the upcoming arrivals at a station in a particular direction.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        direction : str
+            Which direction the trains are traveling in, either nortbound or southbound ("N", "S")
+        allow_stale : bool, optional
+            Whether the last response can be served, marked stale, when the request
+            to SEPTA fails.
+            Defaults to True.
+
+        Returns
+        -------
+        Any
+            The parsed JSON response of the Arrivals API.
+
+        Raises
+        ------
+        RuntimeError
+            If the request to SEPTA fails, or the circuit is open, and there is no
+            stale response to serve.
+        """
+
+        key = (stop_id, direction)
+        with self._lock:
+            # serve from the cache if the response is fresh
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+            # otherwise join a request already in flight, or start one
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if future is None:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_owner:
+            try:
+                return future.result()
+            except RuntimeError:
+                stale = self.get_stale_arrivals(stop_id, direction) if allow_stale else None
+                if stale is None:
+                    raise
+                return stale
+
+        try:
+            rj = self._fetch(stop_id, direction)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            stale = self.get_stale_arrivals(stop_id, direction) if allow_stale and isinstance(e, RuntimeError) else None
+            if stale is None:
+                raise
+            logger.warning("Serving stale SEPTA arrivals for %s %s: %s", stop_id, direction, e)
+            return stale
+
+        with self._lock:
+            del self._in_flight[key]
+            now = time.monotonic()
+            if self.cache_ttl > 0:
+                # drop expired entries so the cache stays bounded by the number of stations
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+                self._cache[key] = (now + self.cache_ttl, rj)
+            if self.stale_ttl > 0:
+                self._last_good[key] = (now, datetime.now(), rj)
+        future.set_result(rj)
+        return rj
+
+    def get_cached_arrivals(self, stop_id: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the arrivals at a station from the cache only, without calling SEPTA.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        direction : str
+            Which direction the trains are traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any or None
+            The parsed JSON response of the Arrivals API, or None if there is no
+            fresh response in the cache.
+        """
+        cached = self._cache.get((stop_id, direction))
+        if cached is None or cached[0] <= time.monotonic():
+            return None
+        return cached[1]
+
+    def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the next arriving train at a given station going in a particular direction
+        on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any
+            A JSON object with the train data
+
+        Raises
+        ------
+        RuntimeError
+            If the request to SEPTA fails.
+        """
+        return parse_next_arrival(self.get_arrivals(stop_id, direction), line_name, direction)
+
+    def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+        """
+        Get the upcoming trains at a given station going in a particular direction
+        on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        list
+            The JSON objects with the train data, earliest scheduled first.
+
+        Raises
+        ------
+        RuntimeError
+            If the request to SEPTA fails.
+        """
+        return parse_upcoming_trains(self.get_arrivals(stop_id, direction), line_name, direction)
+
+    def clear_cache(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """Close the connection pool."""
+        self.session.close()
+
+
+class AsyncSeptaClient:
+    """
+    Asyncio client for the SEPTA Arrivals API.
+
+    Requests are sent by a `SeptaClient` in worker threads, so they share its
+    connection pool and response cache. Concurrent requests for the same station
+    and direction within an event loop are coalesced into one, so duplicates do
+    not occupy worker threads. At most `max_concurrency` upstream requests run at
+    once, in a thread pool of the client, and a caller waits at most `timeout`
+    seconds for a response, so a slow SEPTA ties up a bounded number of threads
+    instead of every worker. The client should only be used from one event loop.
+
+    Parameters
+    ----------
+    client : SeptaClient, optional
+        The client used to send requests. If None, a new client is created.
+        Defaults to None.
+    max_concurrency : int, optional
+        The maximum number of upstream requests running at once.
+        Defaults to 10.
+    timeout : float, optional
+        The time budget of a call in seconds, including waiting for a free thread.
+        A request that takes longer keeps running, and its response is still
+        cached, but the caller gets a RuntimeError. If None, the timeout of the
+        client.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        If max_concurrency is less than 1.
+    """
+
+    def __init__(self, client: SeptaClient | None = None, max_concurrency: int = 10, timeout: float | None = None):
+        if max_concurrency < 1:
+            raise ValueError(f"Invalid max_concurrency: {max_concurrency}. Must be at least 1.")
+        self.client = SeptaClient() if client is None else client
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        # a pool of its own, so the requests neither wait on nor hold up other work
+        # run in the default executor of the event loop
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="trainchallenge-septa")
+        self._in_flight: dict[tuple[str, str], asyncio.Future[Any]] = {}
+
+    def _done(self, key: tuple[str, str], future: asyncio.Future[Any]) -> None:
+        """Forget a finished request, retrieving its error in case every caller gave up on it."""
+        self._in_flight.pop(key, None)
+        if not future.cancelled():
+            future.exception()
+
+    async def get_arrivals(self, stop_id: str, direction: Literal["N", "S"]) -> Any:
+        """
+        Get the upcoming arrivals at a station in a particular direction.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        direction : str
+            Which direction the trains are traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any
+            The parsed JSON response of the Arrivals API.
+
+        Raises
+        ------
+        RuntimeError
+            If the request to SEPTA fails, does not finish within the timeout, or
+            the circuit is open, and there is no stale response to serve.
+        """
+
+        # a cached response is served right away, without a trip to a worker thread
+        rj = self.client.get_cached_arrivals(stop_id, direction)
+        if rj is not None:
+            return rj
+        # and so is a stale response, or the failure, while the circuit is open
+        breaker = self.client.breaker
+        if breaker is not None and breaker.state == "open":
+            rj = self.client.get_stale_arrivals(stop_id, direction)
+            if rj is None:
+                raise RuntimeError("API request failed: circuit open after repeated SEPTA failures")
+            return rj
+
+        key = (stop_id, direction)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, self.client.get_arrivals, stop_id, direction
+            )
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        # shield the shared request so one caller giving up does not cancel the others
+        timeout = self.client.timeout if self.timeout is None else self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            rj = self.client.get_stale_arrivals(stop_id, direction)
+            if rj is None:
+                raise RuntimeError(f"API request failed: no response within {timeout} seconds") from None
+            logger.warning(
+                "Serving stale SEPTA arrivals for %s %s: no response within %s seconds", stop_id, direction, timeout
+            )
+            return rj
+
+    async def get_next_arrival(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None:
+        """
+        Get the next arriving train at a given station going in a particular direction
+        on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        Any
+            A JSON object with the train data
+
+        Raises
+        ------
+        RuntimeError
+            If the request to SEPTA fails.
+        """
+        return parse_next_arrival(await self.get_arrivals(stop_id, direction), line_name, direction)
+
+    async def get_upcoming_trains(self, stop_id: str, line_name: str, direction: Literal["N", "S"]) -> list[Any]:
+        """
+        Get the upcoming trains at a given station going in a particular direction
+        on a particular line.
+
+        Parameters
+        ----------
+        stop_id: str
+            The SEPTA stop id of the station
+        line_name : str
+            The SEPTA train line name
+        direction : str
+            Which direction the train is traveling in, either nortbound or southbound ("N", "S")
+
+        Returns
+        -------
+        list
+            The JSON objects with the train data, earliest scheduled first.
+
+        Raises
+        ------
+        RuntimeError
+            If the request to SEPTA fails or does not finish within the timeout.
+        """
+        return parse_upcoming_trains(await self.get_arrivals(stop_id, direction), line_name, direction)
+
+    def close(self) -> None:
+        """Stop the worker threads once the requests in flight are done."""
+        self._executor.shutdown(wait=False)
+
+
+_default_client: SeptaClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> SeptaClient:
+    """
+    Get the shared client used by the module level functions.
+
+    Returns
+    -------
+    SeptaClient
+        The shared client, created on first use.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = SeptaClient()
+        return _default_client
 
 
 def get_next_arrival(stop_id: str, line_name: str, direction: Literal["N", "S"]) -> Any | None:
@@ -13,6 +599,9 @@ def get_next_arrival(stop_id: str, line_name: str, direction: Literal["N", "S"])
     Get the next arriving train at a given station going in a particular direction
     on a particular line.
 
+    Requests go through the shared `SeptaClient`, so they reuse its connection
+    pool and response cache.
+
     Parameters
     ----------
     stop_id: str
@@ -27,37 +616,4 @@ def get_next_arrival(stop_id: str, line_name: str, direction: Literal["N", "S"])
     Any
         A JSON object with the train data
     """
-    params = {"station": stop_id, "direction": direction}
-    try:
-        response = requests.request(
-            method="GET", url="https://www3.septa.org/api/Arrivals/index.php", params=params, timeout=30
-        )
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        rj = response.json()  # Parse and return the JSON response
-
-        # parse returned json
-        train_list = next(iter(rj.values()))
-        if len(train_list) == 0:
-            return None
-        if direction == "S":
-            train_list = train_list[0]["Southbound"]
-        elif direction == "N":
-            train_list = train_list[0]["Northbound"]
-
-        train_list = [t for t in train_list if t["line"] == line_name]
-        if len(train_list) == 0:
-            return None
-
-        # get first scheduled (account for multiple trains on the same line)
-        earliest_idx = 0
-        if len(train_list) > 1:
-            earliest_dt = datetime.strptime(train_list[0]["sched_time"], septa_date_format)
-            for train_idx in range(1, len(train_list)):
-                train_sched = datetime.strptime(train_list[train_idx]["sched_time"], septa_date_format)
-                if train_sched < earliest_dt:
-                    earliest_dt = train_sched
-                    earliest_idx = train_idx
-        return train_list[earliest_idx]
-
-    except requests.exceptions.RequestException as e:
-        raise RuntimeError(f"API request failed: {e}") from e
+    return get_default_client().get_next_arrival(stop_id, line_name, direction)
@@ -0,0 +1,221 @@
+import threading
+import time
+
+from collections.abc import Mapping
+from types import TracebackType
+from typing import TYPE_CHECKING
+from typing import Any
+
+
+try:
+    from opentelemetry import metrics
+    from opentelemetry import propagate
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover - depends on the environment
+    metrics = None
+    propagate = None
+    trace = None
+
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+# Name of the histogram of stage durations, in milliseconds
+STAGE_DURATION_METRIC = "trainchallenge.stage.duration"
+
+_lock = threading.Lock()
+_tracer_provider: Any = None
+_meter_provider: Any = None
+# the tracer and histogram once a provider is configured, or None until then
+_instruments: tuple[Any, Any] | None = None
+
+# Seconds between checks for a configured provider while there is none, getting the
+# global providers takes longer than a whole stage otherwise does
+_CHECK_INTERVAL = 1.0
+_next_check = 0.0
+
+
+def _is_tracing(tracer_provider: Any) -> bool:
+    """Whether a tracer provider records anything, i.e. is not an API default."""
+    # the API defaults are a no-op provider, or a proxy until an SDK provider is set
+    return trace is not None and not isinstance(tracer_provider, (trace.NoOpTracerProvider, trace.ProxyTracerProvider))
+
+
+def _is_metering(meter_provider: Any, tracing: bool) -> bool:
+    """Whether a meter provider records anything, i.e. is not an API default."""
+    if metrics is None or isinstance(meter_provider, metrics.NoOpMeterProvider):
+        return False
+    # the API has no public way to tell its global proxy from a set provider, so
+    # the global one is only trusted along with tracing, as SDK setups such as
+    # `configure_azure_monitor` set both, and a proxy forwards to the provider set later
+    return _meter_provider is not None or tracing
+
+
+def _get_instruments() -> tuple[Any, Any] | None:
+    """Get the tracer and the duration histogram, or None when nothing is configured."""
+
+    global _instruments, _next_check
+
+    if _instruments is not None or trace is None or metrics is None:
+        return _instruments
+    now = time.monotonic()
+    if now < _next_check:
+        return None
+    _next_check = now + _CHECK_INTERVAL
+
+    tracer_provider = _tracer_provider or trace.get_tracer_provider()
+    meter_provider = _meter_provider or metrics.get_meter_provider()
+    tracing = _is_tracing(tracer_provider)
+    metering = _is_metering(meter_provider, tracing)
+    if not (tracing or metering):
+        return None
+
+    with _lock:
+        if _instruments is None:
+            tracer = tracer_provider.get_tracer(__name__) if tracing else None
+            histogram = None
+            if metering:
+                histogram = meter_provider.get_meter(__name__).create_histogram(
+                    STAGE_DURATION_METRIC, unit="ms", description="Duration of the stages of the train challenge"
+                )
+            _instruments = (tracer, histogram)
+    return _instruments
+
+
+def configure(tracer_provider: Any = None, meter_provider: Any = None) -> None:
+    """
+    Set the providers the telemetry is sent to.
+
+    Parameters
+    ----------
+    tracer_provider : opentelemetry.trace.TracerProvider, optional
+        The provider of the spans.
+        Defaults to None, for the global tracer provider.
+    meter_provider : opentelemetry.metrics.MeterProvider, optional
+        The provider of the duration histogram.
+        Defaults to None, for the global meter provider, only used when a tracer
+        provider is configured too.
+    """
+
+    global _tracer_provider, _meter_provider, _instruments, _next_check
+
+    with _lock:
+        _tracer_provider = tracer_provider
+        _meter_provider = meter_provider
+        _instruments = None
+        _next_check = 0.0
+
+
+def is_enabled() -> bool:
+    """Whether stages emit any telemetry."""
+    return _get_instruments() is not None
+
+
+class Stage:
+    """
+    Times a stage as a context manager, emitting a span and recording its duration.
+
+    Exceptions raised in the stage are recorded on the span and propagated.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage, used as the span name and the `stage` attribute.
+    attributes : mapping of str to Any, optional
+        Attributes of the span, also recorded with the duration, so they should
+        only take a few distinct values.
+        Defaults to None.
+    carrier : mapping of str to str, optional
+        W3C trace context headers, e.g. `traceparent` and `tracestate`, of the
+        parent of the span.
+        Defaults to None, for the current span as the parent.
+    """
+
+    __slots__ = ("_instruments", "_span", "_span_cm", "_start", "attributes", "carrier", "name")
+
+    def __init__(
+        self,
+        name: str,
+        attributes: Mapping[str, Any] | None = None,
+        carrier: Mapping[str, str] | None = None,
+    ):
+        self.name = name
+        self.attributes = attributes
+        self.carrier = carrier
+        self._instruments: tuple[Any, Any] | None = None
+        self._span_cm: Any = None
+        self._span: Any = None
+        self._start = 0.0
+
+    def __enter__(self) -> "Self":
+        self._instruments = _get_instruments()
+        if self._instruments is None:
+            return self
+
+        tracer = self._instruments[0]
+        if tracer is not None:
+            context = None
+            if self.carrier and propagate is not None:
+                context = propagate.extract(self.carrier)
+            self._span_cm = tracer.start_as_current_span(self.name, context=context, attributes=self.attributes)
+            self._span = self._span_cm.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        if self._instruments is None:
+            return
+
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        histogram = self._instruments[1]
+        if histogram is not None:
+            histogram.record(elapsed_ms, {"stage": self.name, **(self.attributes or {})})
+        if self._span_cm is not None:
+            span_cm, self._span_cm, self._span = self._span_cm, None, None
+            span_cm.__exit__(exc_type, exc, tb)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute of the span only, e.g. a result of the stage."""
+        if self._span is not None:
+            self._span.set_attribute(key, value)
+
+
+def stage(
+    name: str,
+    attributes: Mapping[str, Any] | None = None,
+    carrier: Mapping[str, str] | None = None,
+) -> Stage:
+    """
+    Time a stage, as a context manager.
+
+    The stage emits an OpenTelemetry span and records its duration in the
+    `trainchallenge.stage.duration` histogram, with the name in the `stage`
+    attribute. When OpenTelemetry is not installed, or no SDK tracer or meter
+    provider is configured, e.g. by `configure_azure_monitor`, it does nothing, and
+    a provider configured later is picked up within a second.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    attributes : mapping of str to Any, optional
+        Attributes of the span, also recorded with the duration.
+        Defaults to None.
+    carrier : mapping of str to str, optional
+        W3C trace context headers of the parent of the span.
+        Defaults to None, for the current span as the parent.
+
+    Returns
+    -------
+    Stage
+        The context manager timing the stage.
+
+    Examples
+    --------
+    >>> with stage("nearest_lookup", {"network": "septa"}):
+    ...     pass
+    """
+    return Stage(name, attributes, carrier)